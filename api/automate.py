@@ -10,7 +10,8 @@ import os
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.form_automation import GoogleFormBot, MessageParser
+from src.form_automation import GoogleFormBot
+from src.parser_only import MessageParser
 
 async def process_form_data(message: str, headless: bool = True) -> dict:
     """Process form data and return results."""
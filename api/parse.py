@@ -31,10 +31,10 @@ except ImportError:
 
 # Optional normalizer import with safe fallback
 try:
-    from src.normalizer import normalize_email_text
+    from src.normalizer import extract_form_data
 except Exception:
-    def normalize_email_text(text: str) -> str:
-        return text
+    def extract_form_data(text: str):
+        return MessageParser().extract_data(text)
 
 
 def handler(request):
@@ -60,12 +60,8 @@ def handler(request):
         body = json.loads(request.body or '{}')
         message = body.get('message', '')
         
-        # Pre-normalize message when available
-        message = normalize_email_text(message)
-        
-        # Parse the message
-        parser = MessageParser()
-        extracted = parser.extract_data(message)
+        # Normalize (when available) and parse the message
+        extracted = extract_form_data(message)
         
         # Build response
         result = {
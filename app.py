@@ -1,12 +1,28 @@
-from flask import Flask, render_template_string, request, jsonify
-import asyncio
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
+import hashlib
 import json
 import os
+import threading
+import uuid
+from src.admission import AdmissionController
+from src.artifacts import artifact_store, valid_job_id
+from src.compression import PrecompressedBody, choose_encoding, compress_response
+from src.browser_pool import BrowserPool
+from src.checkpoints import RESUME_ACTIONS, checkpoints
+from src.config import config
+from src.event_loop import background_loop
 from src.form_automation import GoogleFormBot
-from src.parser_only import MessageParser
-from src.normalizer import normalize_email_text
+from src.form_registry import UnknownFormError, form_registry
+from src.preflight import preflight_validate
+from src.progress import progress_hub
+from src.selector_cache import selector_cache
+from src.timeouts import timeout_manager
+from src.normalizer import extract_form_data
+from src.ingest import parse_email_message
 
 app = Flask(__name__, static_folder='static')
+# Static assets (logo) are immutable between deploys
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = config.STATIC_CACHE_MAX_AGE
 
 HTML_TEMPLATE = '''
 <!DOCTYPE html>
@@ -484,6 +500,10 @@ HTML_TEMPLATE = '''
                             </div>
                         </div>
                         
+                        <div class="data-field">
+                            <label><input type="checkbox" id="page_by_page" name="page_by_page" value="1"> Pause for review after each page</label>
+                        </div>
+                        
                         <div class="button-group">
                             <button type="button" class="button-secondary" onclick="goBack()">Go Back</button>
                             <button type="submit">Submit to Form</button>
@@ -498,6 +518,11 @@ HTML_TEMPLATE = '''
                     <div class="loading">
                         <div class="spinner"></div>
                         <p style="margin-top: 20px;">Processing your form submission...</p>
+                        <p id="progressMessage" style="margin-top: 8px;"></p>
+                        <div id="reviewControls" class="button-group hidden">
+                            <button type="button" class="button-secondary" onclick="resumeJob('abort')">Abort</button>
+                            <button type="button" onclick="resumeJob('continue')">Continue</button>
+                        </div>
                     </div>
                 </div>
             </div>
@@ -538,7 +563,7 @@ HTML_TEMPLATE = '''
             const response = await fetch('/parse', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ message: emailContent })
+                body: JSON.stringify({ message: emailContent, form_id: formId })
             });
             
             const data = await response.json();
@@ -591,35 +616,77 @@ HTML_TEMPLATE = '''
         // Show processing
         showStep(3);
         
+        // Subscribe to live progress before starting the job
+        const jobId = crypto.randomUUID();
+        currentJobId = jobId;
+        const progress = document.getElementById('progressMessage');
+        const reviewControls = document.getElementById('reviewControls');
+        progress.textContent = '';
+        const events = new EventSource('/jobs/' + jobId + '/events');
+        events.onmessage = function(e) {
+            const event = JSON.parse(e.data);
+            progress.textContent = describeProgress(event);
+            reviewControls.classList.toggle('hidden', event.type !== 'paused');
+            if (event.type === 'done') events.close();
+        };
+        const pageByPage = data.page_by_page ? '&page_by_page=1' : '';
+        
         try {
             const response = await fetch('/submit', {
                 method: 'POST',
-                headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
-                body: 'message=' + encodeURIComponent(message)
+                headers: {
+                    'Content-Type': 'application/x-www-form-urlencoded',
+                    'Accept': 'application/json'
+                },
+                body: 'message=' + encodeURIComponent(message) + '&job_id=' + encodeURIComponent(jobId)
+                    + '&form_id=' + encodeURIComponent(formId) + pageByPage
             });
             
-            const html = await response.text();
+            const result = await response.json();
             
-            // Extract success/error message from response
-            const parser = new DOMParser();
-            const doc = parser.parseFromString(html, 'text/html');
-            const alert = doc.querySelector('.alert');
-            
-            if (alert) {
-                document.getElementById('resultMessage').innerHTML = alert.outerHTML;
-            } else {
-                document.getElementById('resultMessage').innerHTML = 
-                    '<div class="alert alert-success">Form submitted successfully!</div>';
-            }
+            const resultAlert = document.createElement('div');
+            resultAlert.className = 'alert ' + (result.success ? 'alert-success' : 'alert-error');
+            resultAlert.textContent = result.status;
+            document.getElementById('resultMessage').replaceChildren(resultAlert);
             
             showStep(4);
         } catch (error) {
             document.getElementById('resultMessage').innerHTML = 
                 '<div class="alert alert-error">Error: ' + error.message + '</div>';
             showStep(4);
+        } finally {
+            events.close();
         }
     });
     
+    let currentJobId = null;
+    // Which registered form this page fills (?form=<form_id>, default form if absent)
+    const formId = new URLSearchParams(window.location.search).get('form') || '';
+    
+    async function resumeJob(action) {
+        // Release the paused job; the next progress event updates the controls
+        document.getElementById('reviewControls').classList.add('hidden');
+        await fetch('/jobs/' + currentJobId + '/resume', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ action: action })
+        });
+    }
+    
+    function describeProgress(event) {
+        switch (event.type) {
+            case 'navigated': return 'Opened the form';
+            case 'page_filled': return 'Filled ' + event.name + ' (' + event.index + ' of ' + event.total + ')';
+            case 'validation_errors': return 'Validation errors: ' + event.errors.join(', ');
+            case 'submitted': return 'Submitted, waiting for confirmation...';
+            case 'confirmed': return 'Response recorded';
+            case 'paused': return 'Paused for review: ' + event.message;
+            case 'resumed': return 'Resumed';
+            case 'done': return event.status;
+            default: return '';
+        }
+    }
+    
     function buildFormMessage(data) {
         // Build structured message from form data
         const lines = [];
@@ -648,13 +715,100 @@ HTML_TEMPLATE = '''
 </html>
 '''
 
+# Limits concurrent browser jobs; excess requests are rejected with 429
+admissions = {
+    form.form_id: AdmissionController(
+        max_in_flight=form.max_in_flight,
+        max_queued=form.max_queued,
+        default_retry_after=config.ADMISSION_RETRY_AFTER
+    )
+    for form in form_registry.all()
+}
+
+# One warm browser shared by all jobs on the background event loop
+browser_pool = BrowserPool(headless=True)
+warmup_state = {'started': False, 'finished': False, 'error': None}
+warmup_lock = threading.Lock()
+
+def warm_up():
+    """Launch the browser pool, load the form schema and optionally open a hot form page"""
+    try:
+        print("Warm-up: starting browser pool...")
+        background_loop.run(browser_pool.start(), timeout=120)
+        
+        for form in form_registry.all():
+            print(f"Warm-up: {form.form_id} schema loaded ({len(form.structure)} pages)")
+            if form.warm:
+                print(f"Warm-up: opening hot page for {form.form_id}...")
+                background_loop.run(browser_pool.warm(form.url), timeout=120)
+        
+        print("Warm-up complete")
+    except Exception as e:
+        warmup_state['error'] = str(e)
+        print(f"Warm-up failed: {type(e).__name__}: {str(e)}")
+    finally:
+        warmup_state['finished'] = True
+
+def start_warm_up():
+    """Run warm-up in the background so liveness probes answer immediately (once per process)"""
+    with warmup_lock:
+        if warmup_state['started']:
+            return
+        warmup_state['started'] = True
+    threading.Thread(target=warm_up, name='warm-up', daemon=True).start()
+
+@app.before_request
+def warm_up_worker():
+    # Under gunicorn/uwsgi __main__ never runs and threads started before a
+    # fork do not survive it, so each worker warms up on its first request
+    if config.WARMUP_ON_START and not warmup_state['started']:
+        start_warm_up()
+
+# The UI shell is static: compile and render it once at startup, then serve the
+# cached (and per-encoding precompressed) bytes with an ETag
+HOME_TEMPLATE = app.jinja_env.from_string(HTML_TEMPLATE)
+HOME_BODY = PrecompressedBody(HOME_TEMPLATE.render().encode('utf-8'))
+HOME_ETAG = hashlib.sha256(HOME_BODY.body).hexdigest()[:32]
+
+def home_response():
+    """Serve the cached UI shell, honouring If-None-Match and Accept-Encoding"""
+    body, encoding = HOME_BODY.get(choose_encoding(request.headers.get('Accept-Encoding', '')))
+    response = Response(body, mimetype='text/html')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.set_etag(f"{HOME_ETAG}-{encoding or 'identity'}")
+    response.cache_control.public = True
+    response.cache_control.max_age = config.UI_CACHE_MAX_AGE
+    return response.make_conditional(request)
+
+@app.after_request
+def compress_dynamic_response(response):
+    return compress_response(response, request.headers.get('Accept-Encoding', ''))
+
+def requested_form():
+    """The registered form a request targets (form_id in the query, form or JSON body)"""
+    payload = request.get_json(silent=True) if request.is_json else None
+    form_id = request.values.get('form_id') or (payload or {}).get('form_id')
+    return form_registry.get(form_id)
+
+@app.errorhandler(UnknownFormError)
+def unknown_form(e):
+    return jsonify({'success': False, 'error': f"Unknown form: {e.args[0]}"}), 404
+
+def wants_json():
+    best = request.accept_mimetypes.best_match(['application/json', 'text/html'])
+    return best == 'application/json'
+
 @app.route('/')
 def home():
-    return render_template_string(HTML_TEMPLATE)
+    return home_response()
 
 @app.route('/parse', methods=['POST'])
 def parse():
     """Parse email content and extract form data"""
+    # Resolved outside the try so an unknown form_id is a 404, as on /submit
+    form = requested_form()
     try:
         data = request.get_json()
         message = data.get('message', '')
@@ -662,13 +816,8 @@ def parse():
         print(f"\n=== DEBUG: Original message ===")
         print(f"Message: {message[:200]}...")
         
-        normalized_message = normalize_email_text(message)
-        
-        print(f"\n=== DEBUG: Normalized message ===")
-        print(f"Normalized: {normalized_message[:200]}...")
-        
-        parser = MessageParser()
-        extracted = parser.extract_data(normalized_message)
+        extracted = extract_form_data(message, parser=form.parser())
+        validation = preflight_validate(extracted, form)
         
         print(f"\n=== DEBUG: Extracted data ===")
         print(f"Name: '{extracted.name}'")
@@ -696,7 +845,8 @@ def parse():
                 'shipping_address': extracted.shipping_address,
                 'vat_tax_id': extracted.vat_tax_id,
                 'user_names_emails': extracted.user_names_emails
-            }
+            },
+            'validation': validation.to_dict()
         })
     except Exception as e:
         print(f"\n=== DEBUG: Error ===")
@@ -709,90 +859,31 @@ def parse():
             'error': str(e)
         })
 
-@app.route('/submit', methods=['POST'])
-def submit():
-    """Submit the reviewed data to the form"""
-    message = request.form.get('message', '')
+@app.route('/validate', methods=['POST'])
+def validate():
+    """Pre-flight validate reviewed form fields (or a raw message) without launching a browser"""
+    payload = request.get_json(silent=True) or {}
+    form = requested_form()
+    if payload.get('data'):
+        data = form.parser().build_from_fields(payload['data'])
+    else:
+        data = form.parser().extract_data(payload.get('message', ''))
     
-    print(f"\n=== SUBMIT ENDPOINT CALLED ===")
-    print(f"Message received: {message[:100]}...")  # First 100 chars
-    
-    try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        async def run_automation():
-            print("Creating bot instance...")
-            bot = GoogleFormBot(headless=True, page_by_page=False)
-            
-            try:
-                print("Setting up browser...")
-                await bot.setup()
-                
-                print("Running automation...")
-                await bot.run_automation(message)
-                
-                print("Cleaning up...")
-                await bot.cleanup()
-                
-                return True, "Successfully submitted! Your form has been filled automatically."
-            except Exception as e:
-                print(f"ERROR in automation: {type(e).__name__}: {str(e)}")
-                import traceback
-                traceback.print_exc()
-                return False, f"Something went wrong: {str(e)}"
-        
-        print("Starting event loop...")
-        success, status = loop.run_until_complete(run_automation())
-        loop.close()
-        
-        print(f"Result: Success={success}, Status={status}")
-        
-        return render_template_string(
-            HTML_TEMPLATE, 
-            status=status,
-            status_type='success' if success else 'error'
-        )
-    except Exception as e:
-        print(f"ERROR in route: {type(e).__name__}: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        
-        return render_template_string(
-            HTML_TEMPLATE, 
-            status=f"System error: {str(e)}",
-            status_type='error'
-        )
+    validation = preflight_validate(data, form)
+    return jsonify({
+        'success': validation.ok,
+        'validation': validation.to_dict()
+    }), 200 if validation.ok else 422
 
-if __name__ == '__main__':
-    import os
-    port = int(os.environ.get('PORT', 8080))
-    print(f"Starting server on port {port}")
-    app.run(host='0.0.0.0', port=port, debug=False)
-
-#Debugging
-@app.route('/parse', methods=['POST'])
-def parse():
-    """Parse email content and extract form data"""
+@app.route('/parse/eml', methods=['POST'])
+def parse_eml():
+    """Parse an uploaded raw email (.eml / RFC 822) and extract form data"""
+    form = requested_form()
     try:
-        data = request.get_json()
-        message = data.get('message', '')
-        
-        print(f"\n=== DEBUG: Original message ===")
-        print(f"Message: {message[:200]}...")
-        
-        normalized_message = normalize_email_text(message)
-        
-        print(f"\n=== DEBUG: Normalized message ===")
-        print(f"Normalized: {normalized_message[:200]}...")
-        
-        parser = MessageParser()
-        extracted = parser.extract_data(normalized_message)
-        
-        print(f"\n=== DEBUG: Extracted data ===")
-        print(f"Name: '{extracted.name}'")
-        print(f"Email: '{extracted.email}'")
-        print(f"Organization: '{extracted.organization_name}'")
+        upload = request.files.get('file')
+        # Stream the upload so attachments are never held in memory
+        source = upload.stream if upload else request.stream
+        extracted = parse_email_message(source, parser=form.parser())
         
         return jsonify({
             'success': True,
@@ -824,4 +915,229 @@ def parse():
         return jsonify({
             'success': False,
             'error': str(e)
-        })
\ No newline at end of file
+        })
+
+@app.route('/submit', methods=['POST'])
+def submit():
+    """Submit the reviewed data to the form"""
+    message = request.form.get('message', '')
+    job_id = request.form.get('job_id') or uuid.uuid4().hex
+    if not valid_job_id(job_id):
+        return jsonify({'success': False, 'error': 'Invalid job_id'}), 400
+    # Fill every page but intercept the final submission (for load tests and benchmarks)
+    dry_run = request.form.get('dry_run', '').lower() in ('1', 'true', 'yes', 'on')
+    # Pause after each page until the operator resumes from the UI (POST /jobs/<job_id>/resume)
+    page_by_page = request.form.get('page_by_page', '').lower() in ('1', 'true', 'yes', 'on')
+    
+    print(f"\n=== SUBMIT ENDPOINT CALLED ===")
+    print(f"Message received: {message[:100]}...")  # First 100 chars
+    
+    # Route by form id; each form has its own schema, parser labels and limits
+    form = requested_form()
+    admission = admissions[form.form_id]
+    
+    # Reject incomplete requests before they take an admission slot or a browser
+    data = form.parser().extract_data(message)
+    validation = preflight_validate(data, form)
+    if not validation.ok:
+        status = f"Needs review - missing required fields: {validation.summary()}"
+        progress_hub.publish(job_id, {'type': 'done', 'success': False, 'status': status})
+        return jsonify({
+            'success': False,
+            'status': status,
+            'status_type': 'error',
+            'job_id': job_id,
+            'validation': validation.to_dict()
+        }), 422
+    
+    ticket = admission.try_admit()
+    if ticket is None:
+        retry_after = admission.retry_after()
+        status = "The automation service is busy. Please try again shortly."
+        progress_hub.publish(job_id, {'type': 'done', 'success': False, 'status': status})
+        response = jsonify({
+            'success': False,
+            'status': status,
+            'status_type': 'error',
+            'job_id': job_id,
+            'retry_after': retry_after
+        })
+        response.status_code = 429
+        response.headers['Retry-After'] = str(retry_after)
+        return response
+    
+    try:
+        async def run_automation():
+            print("Creating bot instance...")
+            # Reviewers follow along over SSE; a visible browser needs a display on the server
+            headed = page_by_page and config.REVIEW_HEADED
+            bot = GoogleFormBot(
+                headless=not headed,
+                page_by_page=page_by_page,
+                on_event=lambda event: progress_hub.publish(job_id, event),
+                # Fall back to a per-job browser if the pool never came up
+                pool=browser_pool if browser_pool.started and not headed else None,
+                job_id=job_id,
+                form=form,
+                # A paused review lends its slot to other jobs; there is nothing to review after submit
+                while_paused=lambda: admission.paused(ticket),
+                review_when_finished=False
+            )
+            
+            try:
+                # run_automation launches the browser and cleans up itself
+                print("Running automation...")
+                result = await bot.run_automation(data=data, dry_run=dry_run)
+                details = {
+                    'confirmation': result.confirmation.to_dict() if result.confirmation else None,
+                    'timings': result.timings,
+                    'artifacts': [artifact['name'] for artifact in artifact_store.list(job_id)],
+                }
+                if dry_run:
+                    details['intercepted_request'] = result.intercepted_request
+                
+                if result.success and dry_run:
+                    return True, result.status, details
+                if result.success:
+                    return True, "Successfully submitted! Your form has been filled automatically.", details
+                return False, f"Something went wrong: {result.status}", details
+            except Exception as e:
+                print(f"ERROR in automation: {type(e).__name__}: {str(e)}")
+                import traceback
+                traceback.print_exc()
+                return False, f"Something went wrong: {str(e)}", {}
+        
+        print("Submitting to background event loop...")
+        # Reviewed jobs are bounded by their checkpoint timeouts instead
+        success, status, details = background_loop.run(admission.run(ticket, run_automation()),
+                                                       timeout=None if page_by_page else config.JOB_TIMEOUT)
+        
+        print(f"Result: Success={success}, Status={status}")
+    except Exception as e:
+        print(f"ERROR in route: {type(e).__name__}: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        
+        success, status, details = False, f"System error: {str(e)}", {}
+        admission.release(ticket)
+        progress_hub.publish(job_id, {'type': 'done', 'success': False, 'status': status})
+    
+    if not wants_json():
+        # Plain form posts get the cached shell; status is only delivered as JSON
+        return home_response()
+    
+    return jsonify({
+        'success': success,
+        'status': status,
+        'status_type': 'success' if success else 'error',
+        'job_id': job_id,
+        'form_id': form.form_id,
+        'dry_run': dry_run,
+        **details
+    })
+
+@app.route('/healthz')
+def healthz():
+    """Liveness: the process and its automation event loop are running"""
+    alive = background_loop.is_alive() or not warmup_state['started']
+    return jsonify({'alive': alive}), 200 if alive else 503
+
+@app.route('/readyz')
+def readyz():
+    """Readiness: warm-up finished and the browser pool can take jobs"""
+    pool = browser_pool.health()
+    if config.WARMUP_ON_START:
+        ready = warmup_state['finished'] and pool['ready']
+    else:
+        # No warm-up: jobs launch their own browser, so there is nothing to wait for
+        ready = pool['ready'] if browser_pool.started else True
+    return jsonify({
+        'ready': ready,
+        'warmup': dict(warmup_state, enabled=config.WARMUP_ON_START),
+        'pool': pool
+    }), 200 if ready else 503
+
+@app.route('/metrics')
+def metrics():
+    """Admission control utilization and rejection counters"""
+    return jsonify({
+        'admission': {form_id: controller.metrics() for form_id, controller in admissions.items()},
+        'browser_pool': browser_pool.health(),
+        'artifacts': artifact_store.stats(),
+        'timeouts': timeout_manager.stats(),
+        'selector_cache': {
+            'fields': len(selector_cache.selectors),
+            'hits': selector_cache.hits,
+            'misses': selector_cache.misses
+        }
+    })
+
+@app.route('/forms')
+def forms():
+    """Registered forms that requests can be routed to by form_id"""
+    return jsonify({
+        'default': form_registry.default_id,
+        'forms': [form.to_dict() for form in form_registry.all()]
+    })
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """Stream a submission job's progress events as Server-Sent Events"""
+    channel = progress_hub.channel(job_id)
+    
+    def stream():
+        for event in channel.subscribe():
+            if event is None:
+                # Keepalive comment so proxies don't drop an idle stream
+                yield ': keepalive\n\n'
+            else:
+                yield f"data: {json.dumps(event)}\n\n"
+    
+    response = Response(stream_with_context(stream()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/jobs/<job_id>/artifacts')
+def job_artifacts(job_id):
+    """Debug artifacts (traces, screenshots) kept for a job"""
+    if not valid_job_id(job_id):
+        return jsonify({'success': False, 'error': 'Invalid job_id'}), 400
+    return jsonify({'job_id': job_id, 'artifacts': artifact_store.list(job_id)})
+
+@app.route('/jobs/<job_id>/artifacts/<name>')
+def job_artifact(job_id, name):
+    """Download one artifact, e.g. trace.zip for `playwright show-trace`"""
+    if not valid_job_id(job_id):
+        return jsonify({'success': False, 'error': 'Invalid job_id'}), 400
+    path = artifact_store.get(job_id, name)
+    if not path:
+        return jsonify({'success': False, 'error': 'Artifact not found'}), 404
+    return send_file(os.path.abspath(path), as_attachment=True, download_name=name)
+
+@app.route('/jobs/<job_id>/checkpoint')
+def job_checkpoint(job_id):
+    """The review checkpoint a page-by-page job is paused at, if any"""
+    checkpoint = checkpoints.get(job_id)
+    if not checkpoint:
+        return jsonify({'paused': False, 'job_id': job_id}), 404
+    return jsonify({'paused': True, **checkpoint.to_dict()})
+
+@app.route('/jobs/<job_id>/resume', methods=['POST'])
+def resume_job(job_id):
+    """Resume (or abort) a page-by-page job paused at a review checkpoint"""
+    payload = request.get_json(silent=True) or {}
+    action = payload.get('action') or request.form.get('action') or 'continue'
+    if action not in RESUME_ACTIONS:
+        return jsonify({'success': False, 'error': f"action must be one of {sorted(RESUME_ACTIONS)}"}), 400
+    if not checkpoints.resume(job_id, action):
+        return jsonify({'success': False, 'error': 'Job is not paused'}), 404
+    return jsonify({'success': True, 'job_id': job_id, 'action': action})
+
+if __name__ == '__main__':
+    import os
+    port = int(os.environ.get('PORT', 8080))
+    if config.WARMUP_ON_START:
+        start_warm_up()
+    print(f"Starting server on port {port}")
+    app.run(host='0.0.0.0', port=port, debug=False)
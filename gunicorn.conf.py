@@ -0,0 +1,17 @@
+# Optional gunicorn settings: gunicorn -c gunicorn.conf.py app:app
+# Each worker warms its browser pool right after the fork instead of on its
+# first request. Run a shared browser server (BROWSER_CDP_ENDPOINT or
+# BROWSER_WS_ENDPOINT) to keep one Chromium per host across workers.
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8080)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+timeout = 300
+
+
+def post_fork(server, worker):
+    from app import start_warm_up
+    from src.config import config
+    if config.WARMUP_ON_START:
+        start_warm_up()
@@ -0,0 +1,170 @@
+"""
+Admission control for browser automation jobs.
+
+Caps the number of jobs running a browser at once and the number waiting
+for a slot. Once both are full, new jobs are rejected immediately with a
+Retry-After hint instead of piling up Chromium instances until the container
+runs out of memory. A job paused at a review checkpoint hands its slot to
+other jobs until the reviewer resumes it.
+"""
+
+import asyncio
+import contextlib
+import logging
+import math
+import threading
+import time
+from typing import AsyncIterator, Awaitable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Weight of the newest sample in the job duration moving average
+DURATION_EWMA_ALPHA = 0.2
+
+
+class AdmissionTicket:
+    """A reserved place for one job (queued until it gets a browser slot)."""
+    def __init__(self, controller: 'AdmissionController'):
+        self.controller = controller
+        self.admitted_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        self.released = False
+        # Holding a browser slot; False while paused for a reviewer
+        self.holding = False
+        self.paused = False
+        self.paused_seconds = 0.0
+
+
+class AdmissionController:
+    """Bounded in-flight + queued job limits with utilization and rejection metrics."""
+    def __init__(self, max_in_flight: int, max_queued: int, default_retry_after: int = 30):
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.default_retry_after = default_retry_after
+        self.in_flight = 0
+        self.queued = 0
+        self.paused_jobs = 0
+        self.admitted_total = 0
+        self.rejected_total = 0
+        self.completed_total = 0
+        self.failed_total = 0
+        self.avg_duration: Optional[float] = None
+        self._lock = threading.Lock()
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def try_admit(self) -> Optional[AdmissionTicket]:
+        """Reserve a place for a job, or return None when saturated (thread-safe)."""
+        with self._lock:
+            if self.in_flight + self.queued >= self.max_in_flight + self.max_queued:
+                self.rejected_total += 1
+                logger.warning(f"Rejecting job: {self.in_flight} in flight, {self.queued} queued")
+                return None
+            self.queued += 1
+            self.admitted_total += 1
+            return AdmissionTicket(self)
+
+    def retry_after(self) -> int:
+        """Seconds a rejected client should wait, from the observed job duration."""
+        with self._lock:
+            if not self.avg_duration:
+                return self.default_retry_after
+            waves = (self.queued + 1) / max(self.max_in_flight, 1)
+            return max(1, math.ceil(self.avg_duration * waves))
+
+    async def run(self, ticket: AdmissionTicket, job: Awaitable):
+        """Wait for a browser slot, then run the job. Must be called on the automation loop."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+        try:
+            await self._slots.acquire()
+            ticket.holding = True
+            try:
+                with self._lock:
+                    self.queued -= 1
+                    self.in_flight += 1
+                ticket.started_at = time.monotonic()
+                try:
+                    result = await job
+                except BaseException:
+                    with self._lock:
+                        self.failed_total += 1
+                    raise
+                finally:
+                    self._finish(ticket)
+                return result
+            finally:
+                if ticket.holding:
+                    ticket.holding = False
+                    self._slots.release()
+        finally:
+            if ticket.started_at is None:
+                # Never got a slot (cancelled or timed out while queued)
+                self.release(ticket)
+                if asyncio.iscoroutine(job):
+                    job.close()
+
+    @contextlib.asynccontextmanager
+    async def paused(self, ticket: AdmissionTicket) -> AsyncIterator[None]:
+        """Lend the ticket's slot to other jobs while its job waits on a reviewer."""
+        if not ticket.holding:
+            yield
+            return
+        with self._lock:
+            self.in_flight -= 1
+            self.paused_jobs += 1
+        ticket.holding = False
+        ticket.paused = True
+        self._slots.release()
+        paused_at = time.monotonic()
+        try:
+            yield
+        finally:
+            ticket.paused_seconds += time.monotonic() - paused_at
+            # Resuming waits for a free slot like any other job
+            await self._slots.acquire()
+            ticket.holding = True
+            ticket.paused = False
+            with self._lock:
+                self.paused_jobs -= 1
+                self.in_flight += 1
+
+    def _finish(self, ticket: AdmissionTicket):
+        # Review pauses are not job time
+        duration = time.monotonic() - ticket.started_at - ticket.paused_seconds
+        with self._lock:
+            if ticket.paused:
+                # Cancelled while waiting to get its slot back
+                self.paused_jobs -= 1
+            else:
+                self.in_flight -= 1
+            self.completed_total += 1
+            ticket.released = True
+            if self.avg_duration is None:
+                self.avg_duration = duration
+            else:
+                self.avg_duration += DURATION_EWMA_ALPHA * (duration - self.avg_duration)
+
+    def release(self, ticket: AdmissionTicket):
+        """Give back a ticket whose job never ran."""
+        with self._lock:
+            if ticket.released or ticket.started_at is not None:
+                return
+            ticket.released = True
+            self.queued -= 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                'in_flight': self.in_flight,
+                'queued': self.queued,
+                'paused': self.paused_jobs,
+                'max_in_flight': self.max_in_flight,
+                'max_queued': self.max_queued,
+                'utilization': self.in_flight / self.max_in_flight if self.max_in_flight else 0.0,
+                'queue_utilization': self.queued / self.max_queued if self.max_queued else 0.0,
+                'admitted_total': self.admitted_total,
+                'rejected_total': self.rejected_total,
+                'completed_total': self.completed_total,
+                'failed_total': self.failed_total,
+                'avg_job_seconds': round(self.avg_duration, 2) if self.avg_duration else None,
+            }
@@ -0,0 +1,152 @@
+"""
+Job-scoped debug artifact store (Playwright traces, screenshots).
+
+Artifacts live under ARTIFACT_DIR/<job_id>/<name>, so concurrent jobs never
+overwrite each other. The store is bounded: files older than the retention
+period are deleted, and once the total size exceeds the cap the least
+recently used files go first (reading an artifact marks it as used).
+"""
+
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from typing import List, Optional
+
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+_SAFE_NAME = re.compile(r'[^A-Za-z0-9._-]')
+# Job ids become directory names; clients may supply their own, so keep them plain
+JOB_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+def valid_job_id(job_id: str) -> bool:
+    return bool(job_id and JOB_ID_PATTERN.match(job_id))
+
+
+def _safe(part: str) -> str:
+    part = _SAFE_NAME.sub('_', part)[:100]
+    return '_' if part in ('', '.', '..') else part
+
+
+class ArtifactStore:
+    """Size-capped, retention-limited files keyed by job id."""
+    def __init__(self, root: str, max_bytes: int, retention_seconds: float):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.retention_seconds = retention_seconds
+        self.evicted = 0
+        self._lock = threading.Lock()
+
+    def _resolve(self, job_id: str, name: Optional[str] = None) -> Optional[str]:
+        """Path of a job directory (or an artifact in it), or None if it would leave the store."""
+        if not valid_job_id(job_id):
+            return None
+        parts = [self.root, job_id] + ([_safe(name)] if name is not None else [])
+        path = os.path.join(*parts)
+        root = os.path.realpath(self.root)
+        if os.path.commonpath([root, os.path.realpath(path)]) != root:
+            return None
+        return path
+
+    def path_for(self, job_id: str, name: str) -> str:
+        """Where an artifact should be written (its job directory is created)."""
+        path = self._resolve(job_id, name)
+        if path is None:
+            raise ValueError(f"Invalid artifact path for job {job_id!r}: {name!r}")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def add(self, job_id: str, name: str, data: bytes) -> str:
+        """Write an artifact and enforce the store's limits. Blocking; call off the event loop."""
+        path = self.path_for(job_id, name)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self.enforce_limits()
+        return path
+
+    def register(self, path: str):
+        """Account for an artifact written directly to `path_for` (e.g. by Playwright)."""
+        self.enforce_limits()
+
+    def get(self, job_id: str, name: str) -> Optional[str]:
+        """Path of an existing artifact, marking it as recently used."""
+        path = self._resolve(job_id, name)
+        if not path or not os.path.isfile(path):
+            return None
+        os.utime(path)
+        return path
+
+    def list(self, job_id: str) -> List[dict]:
+        job_dir = self._resolve(job_id)
+        if not job_dir or not os.path.isdir(job_dir):
+            return []
+        return [
+            {'name': entry.name, 'bytes': entry.stat().st_size, 'modified': entry.stat().st_mtime}
+            for entry in sorted(os.scandir(job_dir), key=lambda e: e.name)
+            if entry.is_file() and not entry.name.endswith('.tmp')
+        ]
+
+    def _files(self) -> List[os.DirEntry]:
+        files = []
+        if not os.path.isdir(self.root):
+            return files
+        for job_dir in os.scandir(self.root):
+            if job_dir.is_dir():
+                files.extend(entry for entry in os.scandir(job_dir.path)
+                             if entry.is_file() and not entry.name.endswith('.tmp'))
+        return files
+
+    def enforce_limits(self):
+        """Delete expired artifacts, then least recently used ones until under the size cap."""
+        with self._lock:
+            cutoff = time.time() - self.retention_seconds
+            files = []
+            for entry in self._files():
+                stat = entry.stat()
+                if stat.st_mtime < cutoff:
+                    self._remove(entry.path)
+                else:
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+
+            total = sum(size for _, size, _ in files)
+            for _, size, path in sorted(files):
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+
+            # Drop job directories left empty
+            for job_dir in os.scandir(self.root) if os.path.isdir(self.root) else []:
+                if job_dir.is_dir() and not any(os.scandir(job_dir.path)):
+                    shutil.rmtree(job_dir.path, ignore_errors=True)
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+            self.evicted += 1
+        except OSError as e:
+            logger.debug(f"Could not evict artifact {path}: {e}")
+
+    def stats(self) -> dict:
+        files = self._files()
+        return {
+            'files': len(files),
+            'bytes': sum(entry.stat().st_size for entry in files),
+            'max_bytes': self.max_bytes,
+            'retention_seconds': self.retention_seconds,
+            'evicted': self.evicted,
+        }
+
+
+artifact_store = ArtifactStore(
+    root=config.ARTIFACT_DIR,
+    max_bytes=config.ARTIFACT_MAX_MB * 1024 * 1024,
+    retention_seconds=config.ARTIFACT_RETENTION_HOURS * 3600,
+)
@@ -0,0 +1,172 @@
+"""
+Concurrent batch normalization for bulk imports.
+
+Runs `normalize_email_text`'s request path for many messages at once under a
+token-bucket limiter (requests and tokens per minute), retries 429s with
+backoff, reuses the on-disk normalizer cache so interrupted runs resume, and
+returns results in input order.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Iterable, List, Optional, Tuple
+
+from .config import config
+from .normalizer import (
+    NORMALIZE_MAX_TOKENS,
+    NORMALIZE_SYSTEM_PROMPT,
+    _get_client,
+    _prepare_input,
+    read_cached_normalization,
+    request_normalized_text,
+    write_cached_normalization,
+)
+from .preprocess import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRIES = 6
+BASE_BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 60.0
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at `rate_per_minute`."""
+    def __init__(self, rate_per_minute: int):
+        self.capacity = float(rate_per_minute)
+        self.rate = rate_per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0):
+        """Wait until `amount` tokens are available and take them."""
+        # A single request larger than the bucket could never fit; cap it
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class RateLimiter:
+    """Combined requests-per-minute and tokens-per-minute limiter."""
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+    async def acquire(self, token_count: int):
+        await self.requests.acquire(1)
+        await self.tokens.acquire(token_count)
+
+
+# openai error types retried like 429s (matched by name: the SDK is an optional import)
+TRANSIENT_ERRORS = {'APIConnectionError', 'APITimeoutError', 'InternalServerError'}
+
+
+def _is_rate_limited(error: Exception) -> bool:
+    return getattr(error, 'status_code', None) == 429 or type(error).__name__ == 'RateLimitError'
+
+
+def _is_transient(error: Exception) -> bool:
+    """Rate limits, 5xx responses, timeouts and dropped connections are worth retrying."""
+    if _is_rate_limited(error) or isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, 'status_code', None)
+    if isinstance(status, int) and status >= 500:
+        return True
+    return any(cls.__name__ in TRANSIENT_ERRORS for cls in type(error).__mro__)
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        return float(headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
+
+
+async def _normalize_one(index: int, raw: str, client, limiter: RateLimiter,
+                         semaphore: asyncio.Semaphore) -> Tuple[str, bool]:
+    """(text, normalized): the model's output, or the raw text when normalization failed."""
+    if not raw or not raw.strip():
+        return raw, True
+
+    cleaned = _prepare_input(raw)
+    cached = read_cached_normalization(cleaned)
+    if cached is not None:
+        logger.info(f"[batch {index}] cache hit")
+        return cached, True
+
+    prompt_tokens = estimate_tokens(NORMALIZE_SYSTEM_PROMPT) + estimate_tokens(cleaned)
+    async with semaphore:
+        for attempt in range(1, MAX_RETRIES + 1):
+            await limiter.acquire(prompt_tokens + NORMALIZE_MAX_TOKENS)
+            try:
+                result = await asyncio.to_thread(request_normalized_text, client, cleaned)
+            except Exception as e:
+                if not _is_transient(e) or attempt == MAX_RETRIES:
+                    logger.error(f"[batch {index}] normalization failed: {e}")
+                    # Fail open to original raw text, like normalize_email_text
+                    return raw, False
+                delay = _retry_after_seconds(e) or min(
+                    MAX_BACKOFF_SECONDS, BASE_BACKOFF_SECONDS * 2 ** (attempt - 1))
+                delay += random.uniform(0, delay / 4)
+                reason = "rate limited" if _is_rate_limited(e) else type(e).__name__
+                logger.warning(f"[batch {index}] {reason}, retrying in {delay:.1f}s "
+                               f"(attempt {attempt}/{MAX_RETRIES})")
+                await asyncio.sleep(delay)
+                continue
+
+            if not result:
+                return raw, False
+            write_cached_normalization(cleaned, result)
+            return result, True
+
+    return raw, False
+
+
+async def normalize_batch(messages: Iterable[str],
+                          concurrency: Optional[int] = None,
+                          requests_per_minute: Optional[int] = None,
+                          tokens_per_minute: Optional[int] = None) -> List[str]:
+    """Normalize many raw emails concurrently. Output order matches input order."""
+    messages = list(messages)
+    api_key = os.getenv('OPENAI_API_KEY')
+    if not api_key:
+        logger.warning("OPENAI_API_KEY not set; returning messages unchanged")
+        return messages
+
+    # Retries are ours (429 backoff under the limiter); SDK retries would bypass the bucket
+    client = _get_client(api_key, max_retries=0)
+    limiter = RateLimiter(requests_per_minute or config.OPENAI_REQUESTS_PER_MINUTE,
+                          tokens_per_minute or config.OPENAI_TOKENS_PER_MINUTE)
+    semaphore = asyncio.Semaphore(concurrency or config.BATCH_CONCURRENCY)
+
+    started = time.monotonic()
+    results = await asyncio.gather(*(
+        _normalize_one(i, raw, client, limiter, semaphore) for i, raw in enumerate(messages)
+    ))
+    failed = [i for i, (_, normalized) in enumerate(results) if not normalized]
+    logger.info(f"Normalized {len(messages)} messages in {time.monotonic() - started:.1f}s")
+    if failed:
+        logger.warning(f"{len(failed)} of {len(messages)} messages were left unnormalized "
+                       f"(indexes {failed[:20]}{'...' if len(failed) > 20 else ''})")
+    return [text for text, _ in results]
+
+
+def normalize_batch_sync(messages: Iterable[str], **kwargs) -> List[str]:
+    """Blocking wrapper around `normalize_batch` for scripts and backfills."""
+    return asyncio.run(normalize_batch(messages, **kwargs))
@@ -0,0 +1,458 @@
+"""
+Shared browser pool for automation jobs.
+
+Keeps one Playwright driver and Chromium instance alive on the automation
+event loop, so jobs only pay for a fresh (isolated) browser context instead of
+a driver start plus browser launch. The pool can be warmed at startup and
+reports its health for readiness probes.
+
+A locally launched browser is recycled after BROWSER_MAX_JOBS jobs, after
+BROWSER_MAX_AGE seconds, once its processes exceed BROWSER_MAX_RSS_MB (needs
+psutil), or after it crashes. New jobs go to a fresh browser while the old
+one drains its in-flight jobs and is then closed.
+
+New contexts are seeded with a storage state (cookies, localStorage, accepted
+consent) captured once from a clean visit to the form, so per-job navigations
+skip consent interstitials and first-visit loads. It is never captured from a
+job's context, so no form answers leak between jobs.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Playwright
+
+from .config import config
+
+try:
+    import psutil
+except ImportError:  # memory budget is simply not enforced without it
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+RECYCLE_REASONS = ('jobs', 'age', 'memory', 'crash')
+
+# Hosts that mean a navigation did not land on the form
+INTERSTITIAL_HOSTS = ('consent.google.com', 'accounts.google.com')
+CONSENT_BUTTON = re.compile(r'^(Accept all|I agree|Agree)$', re.IGNORECASE)
+
+
+def on_interstitial(page: Page) -> bool:
+    return any(host in page.url for host in INTERSTITIAL_HOSTS)
+
+
+async def accept_consent(page: Page) -> bool:
+    """Click through a cookie consent interstitial if the page is showing one."""
+    if 'consent.google.com' not in page.url:
+        return False
+    try:
+        await page.get_by_role("button", name=CONSENT_BUTTON).first.click(timeout=5000)
+        await page.wait_for_load_state('domcontentloaded')
+        logger.info("Accepted consent interstitial")
+        return True
+    except Exception as e:
+        logger.warning(f"Could not accept consent interstitial: {e}")
+        return False
+
+
+async def launch_or_connect(playwright: Playwright, headless: bool) -> Browser:
+    """Connect to the host's shared browser server when configured, else launch Chromium locally."""
+    if config.BROWSER_CDP_ENDPOINT:
+        logger.info(f"Connecting to shared browser over CDP: {config.BROWSER_CDP_ENDPOINT}")
+        return await playwright.chromium.connect_over_cdp(config.BROWSER_CDP_ENDPOINT)
+    if config.BROWSER_WS_ENDPOINT:
+        logger.info(f"Connecting to Playwright browser server: {config.BROWSER_WS_ENDPOINT}")
+        return await playwright.chromium.connect(config.BROWSER_WS_ENDPOINT)
+    return await playwright.chromium.launch(headless=headless, args=["--start-maximized"])
+
+
+def browser_rss_mb() -> Optional[float]:
+    """Resident memory of the Chromium processes this worker launched, or None without psutil."""
+    if psutil is None:
+        return None
+    total = 0
+    for child in psutil.Process().children(recursive=True):
+        try:
+            name = child.name().lower()
+            if 'chrom' in name or 'headless_shell' in name:
+                total += child.memory_info().rss
+        except psutil.Error:
+            continue
+    return total / (1024 * 1024)
+
+
+class BrowserPool:
+    """A long-lived browser that hands out one isolated context per job."""
+
+    def __init__(self, headless: bool = True):
+        self.headless = headless
+        self.playwright: Optional[Playwright] = None
+        self.browser: Optional[Browser] = None
+        self.ready = False
+        self.started_at: Optional[float] = None
+        self.contexts_open = 0
+        self.jobs_served = 0
+        self.last_error: Optional[str] = None
+        # Hot standby: (context, page, opened_at) already on page 1, per form URL
+        self._hot: Dict[str, List[Tuple[BrowserContext, Page, float]]] = {}
+        self._replenish: Dict[str, asyncio.Task] = {}
+        self._maintenance: Optional[asyncio.Task] = None
+        self.standby_hits = 0
+        self.standby_misses = 0
+        self.standby_expired = 0
+        self._lock: Optional[asyncio.Lock] = None
+        # Seed for new contexts (Playwright storage_state dict) and its bookkeeping
+        self.storage_state: Optional[dict] = None
+        self.storage_state_at: Optional[float] = None
+        self.storage_refreshes = 0
+        self.storage_invalidations = 0
+        self._storage_refresh: Optional[asyncio.Task] = None
+        # Recycling: jobs on the current browser, old browsers draining their jobs, counts per reason
+        self.browser_jobs = 0
+        self.generation = 0
+        self._draining: List[Browser] = []
+        self.recycles: Dict[str, int] = {reason: 0 for reason in RECYCLE_REASONS}
+        self.last_rss_mb: Optional[float] = None
+
+    @property
+    def shared_server(self) -> bool:
+        return bool(config.BROWSER_CDP_ENDPOINT or config.BROWSER_WS_ENDPOINT)
+
+    @property
+    def started(self) -> bool:
+        """The pool has been started; jobs keep using it while a crashed browser relaunches."""
+        return self.playwright is not None
+
+    def _get_lock(self) -> asyncio.Lock:
+        # Created lazily so it binds to the automation loop, not the importing thread
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def start(self):
+        """Start the Playwright driver and launch the browser (idempotent)."""
+        async with self._get_lock():
+            await self._launch()
+
+    async def _launch(self):
+        """Launch (or reconnect to) the browser unless it is already up. Caller holds the lock."""
+        if self.browser and self.browser.is_connected():
+            return
+        try:
+            if self.playwright is None:
+                self.playwright = await async_playwright().start()
+            self.browser = await launch_or_connect(self.playwright, self.headless)
+            self.browser.on("disconnected", self._on_disconnected)
+            self.ready = True
+            self.started_at = time.time()
+            self.browser_jobs = 0
+            self.generation += 1
+            self.last_error = None
+            logger.info(f"Browser pool started (generation {self.generation})")
+        except Exception as e:
+            self.ready = False
+            self.last_error = str(e)
+            logger.error(f"Browser pool failed to start: {e}")
+            raise
+
+    def _on_disconnected(self, browser: Browser):
+        if browser in self._draining:
+            self._draining.remove(browser)
+            return
+        if browser is not self.browser:
+            return
+        # Unexpected: the browser crashed or was killed. Standby pages die with it.
+        self.recycles['crash'] += 1
+        self.ready = False
+        self.last_error = "browser disconnected unexpectedly"
+        logger.error("Browser crashed or disconnected; relaunching")
+        asyncio.ensure_future(self._relaunch())
+
+    async def _relaunch(self):
+        """Bring the pool back after a crash and refill the standby pages."""
+        for form_url, standby in self._hot.items():
+            for context, _, _ in standby:
+                await self.release(context)
+            self._hot[form_url] = []
+        try:
+            await self.start()
+        except Exception:
+            # Already logged by _launch; the next acquire tries again
+            return
+        for form_url in list(self._hot):
+            self._schedule_replenish(form_url)
+
+    def recycle_reason(self) -> Optional[str]:
+        """Why the current browser should be replaced, if it should."""
+        if self.shared_server or not self.browser:
+            # A shared server is recycled by its own process, not by each worker
+            return None
+        if config.BROWSER_MAX_JOBS and self.browser_jobs >= config.BROWSER_MAX_JOBS:
+            return 'jobs'
+        if config.BROWSER_MAX_AGE and time.time() - self.started_at > config.BROWSER_MAX_AGE:
+            return 'age'
+        if config.BROWSER_MAX_RSS_MB and not self._draining:
+            # Skipped while an old browser drains: its memory is about to be freed
+            self.last_rss_mb = browser_rss_mb()
+            if self.last_rss_mb is not None and self.last_rss_mb > config.BROWSER_MAX_RSS_MB:
+                return 'memory'
+        return None
+
+    async def recycle(self, reason: str):
+        """Switch new jobs to a fresh browser; the old one closes once its jobs finish."""
+        async with self._get_lock():
+            # Concurrent acquires may all see the same reason; only the first one recycles
+            if self.recycle_reason() != reason:
+                return
+            await self._recycle(reason)
+
+    async def _recycle(self, reason: str):
+        old = self.browser
+        logger.info(f"Recycling browser generation {self.generation} ({reason}, {self.browser_jobs} jobs)")
+        self.recycles[reason] += 1
+        self.browser = None
+        # Standby pages belong to the old browser; refill them on the new one
+        for form_url, standby in self._hot.items():
+            for context, _, _ in standby:
+                await self.release(context)
+            self._hot[form_url] = []
+        if old.is_connected() and old.contexts:
+            self._draining.append(old)
+        else:
+            await self._close_browser(old)
+        await self._launch()
+        for form_url in list(self._hot):
+            self._schedule_replenish(form_url)
+
+    async def _close_browser(self, browser: Browser):
+        try:
+            await browser.close()
+        except Exception as e:
+            logger.debug(f"Error closing browser: {e}")
+
+    async def new_context(self) -> BrowserContext:
+        """A fresh isolated context, seeded with the captured storage state when there is one."""
+        state = self.storage_state if config.REUSE_STORAGE_STATE else None
+        context = await self.browser.new_context(no_viewport=True, storage_state=state)
+        self.contexts_open += 1
+        return context
+
+    async def _open_form(self, context: BrowserContext, form_url: str, heading_timeout: int) -> Page:
+        page = await context.new_page()
+        await page.goto(form_url, timeout=config.NAVIGATION_TIMEOUT)
+        if await accept_consent(page):
+            await page.goto(form_url, timeout=config.NAVIGATION_TIMEOUT)
+        await page.wait_for_selector('div[role="heading"]', timeout=heading_timeout)
+        return page
+
+    async def _capture_storage_state(self, context: BrowserContext):
+        self.storage_state = await context.storage_state()
+        self.storage_state_at = time.monotonic()
+        self.storage_refreshes += 1
+        logger.info(f"Captured storage state ({len(self.storage_state.get('cookies', []))} cookies)")
+
+    def storage_state_stale(self) -> bool:
+        return (self.storage_state is None
+                or time.monotonic() - self.storage_state_at > config.STORAGE_STATE_TTL)
+
+    async def refresh_storage_state(self, form_url: str, heading_timeout: int = 20000):
+        """Capture a new storage state from a clean (unseeded) visit to the form."""
+        await self.start()
+        context = await self.browser.new_context(no_viewport=True)
+        self.contexts_open += 1
+        try:
+            await self._open_form(context, form_url, heading_timeout)
+            await self._capture_storage_state(context)
+        except Exception as e:
+            self.last_error = f"storage state refresh failed: {e}"
+            logger.warning(f"Storage state refresh failed: {e}")
+        finally:
+            await self.release(context)
+
+    def invalidate_storage_state(self, reason: str):
+        """Stop seeding contexts with the current state (e.g. it led to an interstitial)."""
+        if self.storage_state is None:
+            return
+        logger.warning(f"Invalidating storage state: {reason}")
+        self.storage_state = None
+        self.storage_state_at = None
+        self.storage_invalidations += 1
+
+    def _schedule_storage_refresh(self, form_url: str):
+        """Refresh a missing or stale storage state in the background; jobs never wait for it."""
+        if not (config.REUSE_STORAGE_STATE and self.storage_state_stale()):
+            return
+        if self._storage_refresh and not self._storage_refresh.done():
+            return
+        self._storage_refresh = asyncio.ensure_future(self.refresh_storage_state(form_url))
+
+    async def _open_standby(self, form_url: str, heading_timeout: int) -> bool:
+        """Open one context on the form's first page and add it to the standby list."""
+        # Seeded when a state exists; otherwise this clean visit is what gets captured
+        seeded = self.storage_state is not None and config.REUSE_STORAGE_STATE
+        context = await self.new_context()
+        try:
+            page = await self._open_form(context, form_url, heading_timeout)
+            if config.REUSE_STORAGE_STATE and not seeded:
+                await self._capture_storage_state(context)
+        except Exception as e:
+            self.last_error = f"standby navigation failed: {e}"
+            logger.warning(f"Standby page navigation failed: {e}")
+            await self.release(context)
+            return False
+        self._hot.setdefault(form_url, []).append((context, page, time.monotonic()))
+        return True
+
+    async def _discard_expired(self, form_url: str):
+        """Close standby pages that are closed or older than HOT_PAGE_MAX_AGE."""
+        now = time.monotonic()
+        keep = []
+        for context, page, opened_at in self._hot.get(form_url, []):
+            if page.is_closed() or now - opened_at > config.HOT_PAGE_MAX_AGE:
+                self.standby_expired += 1
+                await self.release(context)
+            else:
+                keep.append((context, page, opened_at))
+        self._hot[form_url] = keep
+
+    async def replenish(self, form_url: str, heading_timeout: int = 20000):
+        """Top the form's standby list back up to HOT_STANDBY_PAGES."""
+        await self.start()
+        await self._discard_expired(form_url)
+        while len(self._hot[form_url]) < config.HOT_STANDBY_PAGES:
+            if not await self._open_standby(form_url, heading_timeout):
+                break
+        logger.info(f"Hot standby for {form_url}: {len(self._hot[form_url])} page(s)")
+
+    def _schedule_replenish(self, form_url: str):
+        """Replenish in the background so navigation stays off the job's critical path."""
+        task = self._replenish.get(form_url)
+        if task and not task.done():
+            return
+        self._replenish[form_url] = asyncio.ensure_future(self.replenish(form_url))
+
+    async def _maintain(self):
+        """Periodically swap out standby pages before they reach their max age."""
+        interval = max(config.HOT_PAGE_MAX_AGE / 2, 30)
+        while True:
+            await asyncio.sleep(interval)
+            for form_url in list(self._hot):
+                self._schedule_replenish(form_url)
+
+    async def warm(self, form_url: str, heading_timeout: int = 20000):
+        """Keep HOT_STANDBY_PAGES contexts sitting on the form's first page for upcoming jobs."""
+        self._hot.setdefault(form_url, [])
+        await self.replenish(form_url, heading_timeout)
+        if self._maintenance is None or self._maintenance.done():
+            self._maintenance = asyncio.ensure_future(self._maintain())
+
+    async def acquire(self, form_url: Optional[str] = None) -> Tuple[BrowserContext, Page, bool]:
+        """Get an isolated context and page for one job.
+
+        Returns (context, page, on_form) where `on_form` is True when the page is
+        a pre-navigated standby page for `form_url` and navigation can be skipped.
+        """
+        if form_url:
+            self._schedule_storage_refresh(form_url)
+
+        reason = self.recycle_reason()
+        if reason:
+            await self.recycle(reason)
+
+        if form_url in self._hot:
+            await self._discard_expired(form_url)
+            standby = self._hot[form_url]
+            # Claim first, then refill behind the job
+            claimed = standby.pop(0) if standby else None
+            self._schedule_replenish(form_url)
+            if claimed:
+                self.standby_hits += 1
+                self.jobs_served += 1
+                self.browser_jobs += 1
+                return claimed[0], claimed[1], True
+            self.standby_misses += 1
+
+        if not (self.browser and self.browser.is_connected()):
+            logger.warning("Browser disconnected; relaunching")
+            self.ready = False
+            await self.start()
+
+        context = await self.new_context()
+        page = await context.new_page()
+        self.jobs_served += 1
+        self.browser_jobs += 1
+        return context, page, False
+
+    async def release(self, context: BrowserContext):
+        """Close a job's context; the browser itself stays up unless it is draining."""
+        owner = context.browser
+        try:
+            await context.close()
+        except Exception as e:
+            logger.debug(f"Error closing context: {e}")
+        finally:
+            self.contexts_open = max(self.contexts_open - 1, 0)
+        if owner in self._draining and not owner.contexts:
+            self._draining.remove(owner)
+            await self._close_browser(owner)
+            logger.info("Drained browser closed")
+
+    async def close(self):
+        """Close the pool. A shared browser server is only disconnected from, not shut down."""
+        if self._storage_refresh and not self._storage_refresh.done():
+            self._storage_refresh.cancel()
+        for task in [self._maintenance, *self._replenish.values()]:
+            if task and not task.done():
+                task.cancel()
+        for standby in self._hot.values():
+            for context, _, _ in standby:
+                await self.release(context)
+        self._hot.clear()
+        browsers, self.browser = [self.browser, *self._draining], None
+        self._draining = []
+        for browser in browsers:
+            if browser:
+                await self._close_browser(browser)
+        if self.playwright:
+            await self.playwright.stop()
+        self.browser = None
+        self.playwright = None
+        self.ready = False
+        logger.info("Browser pool closed")
+
+    def health(self) -> dict:
+        connected = bool(self.browser and self.browser.is_connected())
+        return {
+            'ready': self.ready and connected,
+            'shared_server': self.shared_server,
+            'connected': connected,
+            'uptime_seconds': round(time.time() - self.started_at, 1) if self.started_at else None,
+            'contexts_open': self.contexts_open,
+            'jobs_served': self.jobs_served,
+            'hot_pages': {form_url: len(standby) for form_url, standby in self._hot.items()},
+            'standby': {
+                'target': config.HOT_STANDBY_PAGES,
+                'max_age_seconds': config.HOT_PAGE_MAX_AGE,
+                'hits': self.standby_hits,
+                'misses': self.standby_misses,
+                'expired': self.standby_expired,
+            },
+            'storage_state': {
+                'enabled': config.REUSE_STORAGE_STATE,
+                'age_seconds': round(time.monotonic() - self.storage_state_at, 1) if self.storage_state_at else None,
+                'refreshes': self.storage_refreshes,
+                'invalidations': self.storage_invalidations,
+            },
+            'recycling': {
+                'generation': self.generation,
+                'browser_jobs': self.browser_jobs,
+                'rss_mb': round(self.last_rss_mb, 1) if self.last_rss_mb is not None else None,
+                'draining': len(self._draining),
+                'recycles': dict(self.recycles),
+            },
+            'last_error': self.last_error,
+        }
@@ -0,0 +1,67 @@
+"""
+Per-host shared browser server.
+
+Launches a single Chromium with a Chrome DevTools Protocol endpoint so every
+web worker on the host can `connect_over_cdp` to it instead of launching its
+own browser. Jobs stay isolated because each one gets its own browser context.
+
+Run once per host:
+
+    python -m src.browser_server --port 9222
+
+and point workers at it with BROWSER_CDP_ENDPOINT=http://127.0.0.1:9222.
+"""
+
+import argparse
+import asyncio
+import logging
+
+from playwright.async_api import async_playwright
+
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait before relaunching a crashed browser
+RESTART_DELAY = 2
+
+
+async def serve(host: str, port: int, headless: bool):
+    """Keep one CDP-enabled Chromium running, relaunching it if it dies."""
+    async with async_playwright() as playwright:
+        while True:
+            browser = await playwright.chromium.launch(
+                headless=headless,
+                args=[
+                    f"--remote-debugging-address={host}",
+                    f"--remote-debugging-port={port}",
+                    "--start-maximized",
+                ],
+            )
+            logger.info(f"Browser server listening for CDP on http://{host}:{port}")
+
+            disconnected = asyncio.Event()
+            browser.on("disconnected", lambda _: disconnected.set())
+            await disconnected.wait()
+
+            logger.warning(f"Browser exited; relaunching in {RESTART_DELAY}s")
+            await asyncio.sleep(RESTART_DELAY)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a shared Chromium for all workers on this host")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9222)
+    parser.add_argument('--headed', action='store_true', help="Show the browser window")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=getattr(logging, config.LOG_LEVEL),
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    try:
+        asyncio.run(serve(args.host, args.port, headless=not args.headed))
+    except KeyboardInterrupt:
+        logger.info("Browser server stopped.")
+
+
+if __name__ == "__main__":
+    main()
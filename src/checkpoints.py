@@ -0,0 +1,94 @@
+"""
+Review checkpoints for page-by-page automation.
+
+A bot in page-by-page mode pauses on an asyncio.Event after each page instead
+of calling the blocking `input()`, so one reviewer's pause never stalls the
+other jobs sharing the automation loop. The operator resumes (or aborts) the
+job from any thread: a web request handler or the CLI.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Actions a reviewer can resume a checkpoint with
+CONTINUE = 'continue'
+ABORT = 'abort'
+RESUME_ACTIONS = {CONTINUE, ABORT}
+
+
+class ReviewAborted(Exception):
+    """The reviewer aborted the job at a checkpoint (or never came back)."""
+
+
+class Checkpoint:
+    """One paused job, waiting for a reviewer's decision."""
+    def __init__(self, job_id: str, message: str, loop: asyncio.AbstractEventLoop):
+        self.job_id = job_id
+        self.message = message
+        self.created_at = time.time()
+        self.action: Optional[str] = None
+        self._loop = loop
+        self._event = asyncio.Event()
+
+    def resume(self, action: str = CONTINUE):
+        """Wake the paused job (thread-safe)."""
+        def _set():
+            if self.action is None:
+                self.action = action
+            self._event.set()
+        self._loop.call_soon_threadsafe(_set)
+
+    async def wait(self, timeout: Optional[float] = None) -> str:
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Checkpoint for job {self.job_id} timed out after {timeout}s")
+            return ABORT
+        return self.action or CONTINUE
+
+    def to_dict(self) -> dict:
+        return {
+            'job_id': self.job_id,
+            'message': self.message,
+            'paused_seconds': round(time.time() - self.created_at, 1),
+        }
+
+
+class CheckpointRegistry:
+    """Paused jobs keyed by job id."""
+    def __init__(self):
+        self.pending: Dict[str, Checkpoint] = {}
+        self._lock = threading.Lock()
+
+    async def pause(self, job_id: str, message: str, timeout: Optional[float] = None) -> str:
+        """Pause the calling job until it is resumed; returns the reviewer's action."""
+        checkpoint = Checkpoint(job_id, message, asyncio.get_running_loop())
+        with self._lock:
+            self.pending[job_id] = checkpoint
+        try:
+            return await checkpoint.wait(timeout)
+        finally:
+            with self._lock:
+                if self.pending.get(job_id) is checkpoint:
+                    del self.pending[job_id]
+
+    def resume(self, job_id: str, action: str = CONTINUE) -> bool:
+        """Resume a paused job from any thread. Returns False if it is not paused."""
+        with self._lock:
+            checkpoint = self.pending.get(job_id)
+        if not checkpoint:
+            return False
+        checkpoint.resume(action)
+        return True
+
+    def get(self, job_id: str) -> Optional[Checkpoint]:
+        with self._lock:
+            return self.pending.get(job_id)
+
+
+checkpoints = CheckpointRegistry()
@@ -0,0 +1,76 @@
+"""
+Response compression helpers (gzip, plus brotli when the package is installed).
+"""
+
+import gzip
+from typing import Dict, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # Optional dependency
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('text/html', 'text/css', 'text/plain', 'application/json', 'application/javascript')
+MIN_COMPRESS_BYTES = 500
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the best supported content-coding from an Accept-Encoding header."""
+    offered = {}
+    for item in (accept_encoding or '').split(','):
+        parts = item.strip().split(';')
+        name = parts[0].strip().lower()
+        quality = 1.0
+        for param in parts[1:]:
+            if param.strip().startswith('q='):
+                try:
+                    quality = float(param.strip()[2:])
+                except ValueError:
+                    quality = 0.0
+        if name:
+            offered[name] = quality
+
+    if brotli is not None and offered.get('br', 0) > 0:
+        return 'br'
+    if offered.get('gzip', 0) > 0:
+        return 'gzip'
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+class PrecompressedBody:
+    """A static body compressed once per encoding and reused for every response."""
+    def __init__(self, body: bytes):
+        self.body = body
+        self._variants: Dict[str, bytes] = {}
+
+    def get(self, encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        if not encoding:
+            return self.body, None
+        if encoding not in self._variants:
+            self._variants[encoding] = compress(self.body, encoding)
+        return self._variants[encoding], encoding
+
+
+def compress_response(response, accept_encoding: str):
+    """Compress a Flask response in place when the client and content type allow it."""
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(accept_encoding)
+    body = response.get_data()
+    if not encoding or len(body) < MIN_COMPRESS_BYTES:
+        return response
+
+    response.set_data(compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
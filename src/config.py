@@ -7,20 +7,112 @@ class Config:
     """Configuration settings for the automation bot."""
     # Form settings
     FORM_URL = os.getenv('FORM_URL', 'https://docs.google.com/forms/d/e/1FAIpQLScy9oI-x2tmtCuE1rb6iZFZnhoPW9qutQBiml0A-4MM2eOa0g/viewform')
+    # Form id of FORM_URL in the form registry, and a JSON file registering more forms
+    DEFAULT_FORM_ID = os.getenv('DEFAULT_FORM_ID', 'quote')
+    # Bump when the form's layout changes so learned field selectors are re-learned
+    FORM_VERSION = os.getenv('FORM_VERSION', '1')
+    FORMS_CONFIG = os.getenv('FORMS_CONFIG', '')
     
     # Run settings
     DEFAULT_HEADLESS = os.getenv('DEFAULT_HEADLESS', 'false').lower() == 'true'
+    # Web page-by-page reviews run headless unless the server has a display to show them on
+    REVIEW_HEADED = os.getenv('REVIEW_HEADED', 'false').lower() == 'true'
     DEFAULT_PAGE_BY_PAGE = os.getenv('DEFAULT_PAGE_BY_PAGE', 'true').lower() == 'true'
     
+    # Normalizer: 'text' (Key: Value lines re-parsed by MessageParser) or
+    # 'structured' (JSON schema output built into FormData directly)
+    NORMALIZER_MODE = os.getenv('NORMALIZER_MODE', 'text').lower()
+    
+    # Email pre-processing before normalization (quoted replies, signatures, HTML)
+    PREPROCESS_EMAILS = os.getenv('PREPROCESS_EMAILS', 'true').lower() == 'true'
+    PREPROCESS_TOKEN_BUDGET = int(os.getenv('PREPROCESS_TOKEN_BUDGET', '1500'))
+    
+    # On-disk cache of normalized emails (empty to disable). Entries hold customer PII,
+    # so they expire, the cache is capped, and only batch runs use it unless opted in
+    NORMALIZER_CACHE_DIR = os.getenv('NORMALIZER_CACHE_DIR', '.cache/normalizer')
+    NORMALIZER_CACHE_TTL = int(os.getenv('NORMALIZER_CACHE_TTL', str(7 * 24 * 3600)))  # seconds
+    NORMALIZER_CACHE_MAX_ENTRIES = int(os.getenv('NORMALIZER_CACHE_MAX_ENTRIES', '1000'))
+    NORMALIZER_CACHE_INTERACTIVE = os.getenv('NORMALIZER_CACHE_INTERACTIVE', 'false').lower() == 'true'
+    # Winning selector per form field, tried first on later jobs (empty disables persistence)
+    SELECTOR_CACHE_PATH = os.getenv('SELECTOR_CACHE_PATH', '.cache/selectors.json')
+    
+    # Batch normalization limits
+    BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', '8'))
+    OPENAI_REQUESTS_PER_MINUTE = int(os.getenv('OPENAI_REQUESTS_PER_MINUTE', '500'))
+    OPENAI_TOKENS_PER_MINUTE = int(os.getenv('OPENAI_TOKENS_PER_MINUTE', '200000'))
+    
+    # Mailbox watcher
+    WATCHER_MAILDIR = os.getenv('WATCHER_MAILDIR', 'mail/quotes')
+    WATCHER_CHECKPOINT = os.getenv('WATCHER_CHECKPOINT', '.cache/watcher_checkpoint.json')
+    WATCHER_POLL_INTERVAL = float(os.getenv('WATCHER_POLL_INTERVAL', '10'))
+    WATCHER_QUEUE_SIZE = int(os.getenv('WATCHER_QUEUE_SIZE', '4'))
+    # Attempts per message for transient (fetch/normalize/submit) failures before giving up
+    WATCHER_MAX_ATTEMPTS = int(os.getenv('WATCHER_MAX_ATTEMPTS', '3'))
+    
     # Logging
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
     LOG_FILE = 'form_automation.log'
     
-    # Timeouts
-    DEFAULT_TIMEOUT = 30000
-    NAVIGATION_TIMEOUT = 60000
+    # Timeouts (ms): static defaults and upper bounds for the adaptive per-operation timeouts
+    DEFAULT_TIMEOUT = int(os.getenv('DEFAULT_TIMEOUT', '30000'))
+    NAVIGATION_TIMEOUT = int(os.getenv('NAVIGATION_TIMEOUT', '60000'))
+    # Adaptive timeouts: multiplier x rolling p99 once an operation has enough samples
+    TIMEOUT_P99_MULTIPLIER = float(os.getenv('TIMEOUT_P99_MULTIPLIER', '3'))
+    TIMEOUT_FLOOR_MS = int(os.getenv('TIMEOUT_FLOOR_MS', '1000'))
+    TIMEOUT_MIN_SAMPLES = int(os.getenv('TIMEOUT_MIN_SAMPLES', '20'))
+    TIMEOUT_WINDOW = int(os.getenv('TIMEOUT_WINDOW', '200'))
+    # Overall budget for one automation job (seconds); review pauses don't count
+    JOB_DEADLINE = float(os.getenv('JOB_DEADLINE', '180'))
+    # Seconds a /submit request waits for its automation job
+    JOB_TIMEOUT = float(os.getenv('JOB_TIMEOUT', '300'))
+    # Seconds a page-by-page review checkpoint waits for the operator before aborting
+    CHECKPOINT_TIMEOUT = float(os.getenv('CHECKPOINT_TIMEOUT', '900'))
+    
+    # Shared per-host browser server (python -m src.browser_server); empty to launch locally
+    BROWSER_CDP_ENDPOINT = os.getenv('BROWSER_CDP_ENDPOINT', '')
+    BROWSER_WS_ENDPOINT = os.getenv('BROWSER_WS_ENDPOINT', '')
+    
+    # Browser pool warm-up at startup
+    WARMUP_ON_START = os.getenv('WARMUP_ON_START', 'true').lower() == 'true'
+    WARM_FORM_PAGE = os.getenv('WARM_FORM_PAGE', 'true').lower() == 'true'
+    # Contexts kept pre-navigated to page 1 of each warm form, and how long one may sit (seconds)
+    HOT_STANDBY_PAGES = int(os.getenv('HOT_STANDBY_PAGES', '2'))
+    HOT_PAGE_MAX_AGE = int(os.getenv('HOT_PAGE_MAX_AGE', '600'))
+    # Recycle a locally launched pool browser after N jobs, N seconds or N MB RSS (0 disables)
+    BROWSER_MAX_JOBS = int(os.getenv('BROWSER_MAX_JOBS', '200'))
+    BROWSER_MAX_AGE = int(os.getenv('BROWSER_MAX_AGE', '3600'))
+    BROWSER_MAX_RSS_MB = int(os.getenv('BROWSER_MAX_RSS_MB', '1500'))
+    # Seed new browser contexts with cookies/consent captured from a clean form visit
+    REUSE_STORAGE_STATE = os.getenv('REUSE_STORAGE_STATE', 'true').lower() == 'true'
+    STORAGE_STATE_TTL = int(os.getenv('STORAGE_STATE_TTL', '3600'))
+    
+    # Admission control for /submit
+    MAX_IN_FLIGHT_JOBS = int(os.getenv('MAX_IN_FLIGHT_JOBS', '2'))
+    MAX_QUEUED_JOBS = int(os.getenv('MAX_QUEUED_JOBS', '4'))
+    ADMISSION_RETRY_AFTER = int(os.getenv('ADMISSION_RETRY_AFTER', '30'))
+    
+    # HTTP caching (seconds)
+    UI_CACHE_MAX_AGE = int(os.getenv('UI_CACHE_MAX_AGE', '300'))
+    STATIC_CACHE_MAX_AGE = int(os.getenv('STATIC_CACHE_MAX_AGE', '86400'))
     
     # Directories
     SCREENSHOT_DIR = 'screenshots'
+    
+    # Job-scoped debug artifacts (traces, screenshots): location, size cap and retention
+    ARTIFACT_DIR = os.getenv('ARTIFACT_DIR', 'artifacts')
+    ARTIFACT_MAX_MB = int(os.getenv('ARTIFACT_MAX_MB', '500'))
+    ARTIFACT_RETENTION_HOURS = float(os.getenv('ARTIFACT_RETENTION_HOURS', '72'))
+    
+    # Playwright tracing: full traces for a sampled fraction of jobs; all other jobs get a
+    # light trace (no screenshots/snapshots) that is only kept if they fail or run slow
+    TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '0.02'))
+    TRACE_TAIL_JOBS = os.getenv('TRACE_TAIL_JOBS', 'true').lower() == 'true'
+    TRACE_SLOW_SECONDS = float(os.getenv('TRACE_SLOW_SECONDS', '90'))
+    
+    # Debug screenshots: off, error (only when a job errors), sampled (per-page for a
+    # fraction of jobs, plus errors) or all; stored as JPEG in the artifact store
+    SCREENSHOT_MODE = os.getenv('SCREENSHOT_MODE', 'error').lower()
+    SCREENSHOT_SAMPLE_RATE = float(os.getenv('SCREENSHOT_SAMPLE_RATE', '0.05'))
+    SCREENSHOT_QUALITY = int(os.getenv('SCREENSHOT_QUALITY', '60'))
 
 config = Config()
\ No newline at end of file
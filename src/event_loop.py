@@ -0,0 +1,88 @@
+"""
+A single long-lived asyncio event loop running in a background thread.
+
+Flask handlers are synchronous; instead of creating and closing a fresh loop
+per request, they submit coroutines here and wait on the returned future.
+Because the loop outlives requests, async resources (browser pools, HTTP
+sessions, API clients) can be created once and shared.
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Any, Awaitable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundLoop:
+    """Owns an event loop thread and runs coroutines on it from any thread."""
+
+    def __init__(self, name: str = 'automation-loop'):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        self.start()
+        return self._loop
+
+    def is_alive(self) -> bool:
+        return bool(self._thread and self._thread.is_alive() and self._loop and self._loop.is_running())
+
+    def start(self):
+        """Start the loop thread if it is not already running (idempotent, thread-safe)."""
+        with self._lock:
+            if self.is_alive():
+                return
+            self._started.clear()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        self._started.wait()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._loop.call_soon(self._started.set)
+        logger.info(f"Background event loop '{self.name}' started")
+        try:
+            self._loop.run_forever()
+        finally:
+            pending = asyncio.all_tasks(self._loop)
+            for task in pending:
+                task.cancel()
+            if pending:
+                self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+            self._loop.close()
+            logger.info(f"Background event loop '{self.name}' stopped")
+
+    def submit(self, coro: Awaitable) -> concurrent.futures.Future:
+        """Schedule a coroutine on the loop; returns a thread-safe future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the loop and block the calling thread for its result."""
+        future = self.submit(coro)
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def stop(self):
+        """Stop the loop and wait for its thread to exit."""
+        with self._lock:
+            if not self._loop or not self._thread:
+                return
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._thread = None
+            self._loop = None
+
+
+background_loop = BackgroundLoop()
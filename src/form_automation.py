@@ -6,14 +6,28 @@ It uses Playwright for browser automation and can run in either headless or head
 """
 
 import asyncio
+import contextlib
 import logging
 import re
 import os
-from typing import List, Optional, Tuple
-
-from playwright.async_api import async_playwright, Browser, Page, Playwright
+import random
+import time
+import uuid
+from urllib.parse import parse_qs, urlparse
+from typing import AsyncContextManager, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Playwright
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from .artifacts import artifact_store
+from .browser_pool import BrowserPool, accept_consent, launch_or_connect, on_interstitial
+from .checkpoints import ABORT, CONTINUE, ReviewAborted, checkpoints
 from .config import config
-from src.parser_only import MessageParser, FormData
+from .form_registry import FormDefinition, form_registry
+from .form_schema import NAV_LABELS, missing_required_fields
+from .preflight import PreflightResult, preflight_validate
+from .selector_cache import SelectorCache, selector_cache
+from .timeouts import DeadlineExceeded, JobDeadline, timeout_manager
+from src.parser_only import FormData
 
 # --- Configuration ---
 LOG_FILE = 'form_automation.log'
@@ -31,154 +45,407 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# --- Form Structure Definition ---
-FORM_STRUCTURE = {
-    'page_1': {
-        'name': 'Contact Information',
-        'fields': [
-            {'field': 'name', 'required': True, 'type': 'text', 'label': 'Your name'},
-            {'field': 'email', 'required': True, 'type': 'email', 'label': 'Your email'},
-            {'field': 'send_to', 'required': False, 'type': 'email', 'label': 'Send to', 'default_to': 'email'}
-        ]
-    },
-    'page_2': {
-        'name': 'Organization Details',
-        'fields': [
-            {'field': 'organization_name', 'required': True, 'type': 'text', 'label': "Organization's Name"},
-            {'field': 'organization_sector', 'required': True, 'type': 'radio', 'label': 'Sector', 'options': ['Academic', 'Industry']}
-        ]
-    },
-    'page_3': {
-        'name': 'License Details',
-        'fields': [
-            {'field': 'num_premium_users', 'required': True, 'type': 'dropdown', 'label': 'Number of Premium users'},
-            {'field': 'license_length_years', 'required': True, 'type': 'dropdown', 'label': 'Length of license'}
-        ]
-    },
-    'page_4': {
-        'name': 'Admin Information (5+ users)',
-        'condition': lambda data: data.num_premium_users >= 5,
-        'fields': [
-            {'field': 'institution_name', 'required': False, 'type': 'text', 'label': 'Institution name', 'default_to': 'organization_name'},
-            {'field': 'admin_name', 'required': False, 'type': 'text', 'label': 'Admin name', 'default_to': 'name'},
-            {'field': 'admin_email', 'required': False, 'type': 'email', 'label': 'Admin email', 'default_to': 'email'}
-        ]
-    },
-    'page_5': {
-        'name': 'Individual User (1 person)',
-        'condition': lambda data: data.num_premium_users == 1,
-        'fields': [
-            {'field': 'first_user_name', 'required': False, 'type': 'text', 'label': 'First user name', 'default_to': 'name'},
-            {'field': 'first_user_email', 'required': False, 'type': 'email', 'label': 'First user email', 'default_to': 'email'}
-        ]
-    },
-    'page_6': {
-        'name': 'Two Users Information',
-        'condition': lambda data: data.num_premium_users == 2,
-        'fields': [
-            {'field': 'first_user_name', 'required': False, 'type': 'text', 'label': 'First user name', 'default_to': 'name'},
-            {'field': 'first_user_email', 'required': False, 'type': 'email', 'label': 'First user email', 'default_to': 'email'},
-            {'field': 'second_user_name', 'required': True, 'type': 'text', 'label': 'Second user name'},
-            {'field': 'second_user_email', 'required': True, 'type': 'email', 'label': 'Second user email'}
-        ]
-    },
-    'page_7': {
-        'name': 'Billing Information',
-        'fields': [
-            {'field': 'billing_name', 'required': False, 'type': 'text', 'label': 'Billing name'},
-            {'field': 'billing_email', 'required': False, 'type': 'email', 'label': 'Billing email'},
-            {'field': 'billing_address', 'required': False, 'type': 'textarea', 'label': 'Billing address'},
-            {'field': 'shipping_address', 'required': False, 'type': 'textarea', 'label': 'Shipping address'},
-            {'field': 'vat_tax_id', 'required': False, 'type': 'text', 'label': 'VAT or Tax ID'}
-        ]
+# Injected into every document the bot opens. A MutationObserver records
+# validation alerts and page transitions as they happen; events live in
+# sessionStorage so they survive the full-page navigation of a Next click.
+FORM_EVENTS_SCRIPT = """
+(() => {
+    if (window.__formBotInstalled) return;
+    window.__formBotInstalled = true;
+    const KEY = '__formBotEvents';
+    const load = () => {
+        try { return JSON.parse(sessionStorage.getItem(KEY) || '[]'); } catch (e) { return []; }
+    };
+    const push = (event) => {
+        const events = load();
+        events.push(Object.assign({t: Date.now()}, event));
+        sessionStorage.setItem(KEY, JSON.stringify(events));
+    };
+    window.__formBotPending = () => load().length;
+    window.__formBotDrain = () => {
+        const events = load();
+        sessionStorage.removeItem(KEY);
+        return events;
+    };
+    const start = () => {
+        const headingText = () => {
+            const heading = document.querySelector('div[role="heading"]');
+            return heading ? heading.textContent.trim() : '';
+        };
+        let lastHeading = headingText();
+        push({type: 'page', heading: lastHeading, url: location.href});
+        const alertText = new WeakMap();
+        const scan = () => {
+            document.querySelectorAll('[role="alert"]').forEach((el) => {
+                const text = (el.textContent || '').trim();
+                if (text && alertText.get(el) !== text) push({type: 'alert', text: text});
+                alertText.set(el, text);
+            });
+            const heading = headingText();
+            if (heading && heading !== lastHeading) {
+                lastHeading = heading;
+                push({type: 'page', heading: heading, url: location.href});
+            }
+        };
+        // Alerts rendered by the server (e.g. a rejected submission) are already in the DOM
+        scan();
+        new MutationObserver(scan).observe(document.body, {childList: true, subtree: true, characterData: true});
+    };
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', start);
+    } else {
+        start();
     }
+})();
+"""
+
+# The form's submission endpoint
+FORM_RESPONSE_PATH = '/formResponse'
+CONFIRMATION_TEXT = re.compile(r'response has been recorded', re.IGNORECASE)
+
+# Served in place of the real confirmation page when a dry run intercepts the submission
+DRY_RUN_CONFIRMATION_PAGE = (
+    '<html><body><div role="heading">Dry run</div>'
+    '<div>Your response has been recorded (dry run - nothing was sent).</div></body></html>'
+)
+
+
+# Finds every visible Next/Back/Submit control in one pass and tags it with
+# data-formbot-nav so the chosen one can be clicked without another search
+NAV_CONTROLS_SCRIPT = """
+(labels) => {
+    document.querySelectorAll('[data-formbot-nav]').forEach((el) => el.removeAttribute('data-formbot-nav'));
+    const found = {};
+    for (const el of document.querySelectorAll('[role="button"], button, input[type="submit"]')) {
+        const rect = el.getBoundingClientRect();
+        if (!rect.width || !rect.height) continue;
+        const text = (el.innerText || el.value || el.getAttribute('aria-label') || '').trim().toLowerCase();
+        for (const [kind, names] of Object.entries(labels)) {
+            const name = names.find((n) => n.toLowerCase() === text);
+            if (name && !found[kind]) {
+                el.setAttribute('data-formbot-nav', kind);
+                found[kind] = name;
+            }
+        }
+    }
+    return found;
 }
+"""
+
+# Tries every candidate selector in one pass and tags the first (in preference
+# order) that has a visible element; returns its index or -1
+FIELD_RESOLVE_SCRIPT = """
+([selectors, token]) => {
+    const visible = (el) => {
+        const rect = el.getBoundingClientRect();
+        return rect.width > 0 && rect.height > 0 && getComputedStyle(el).visibility !== 'hidden';
+    };
+    for (let i = 0; i < selectors.length; i++) {
+        // ':visible' is Playwright-only; every candidate gets the visibility check anyway
+        const css = selectors[i].split(':visible').join('');
+        let matches;
+        try { matches = document.querySelectorAll(css); } catch (e) { continue; }
+        const el = Array.from(matches).find(visible);
+        if (el) {
+            el.setAttribute('data-formbot-field', token);
+            return i;
+        }
+    }
+    return -1;
+}
+"""
+
+# Resolved control names per (form url, page): {'next': 'Next', 'submit': 'Submit', ...}
+_nav_controls: Dict[Tuple[str, str], Dict[str, str]] = {}
+
+
+class SubmissionConfirmation:
+    """What actually happened after clicking Submit, as observed on the network."""
+    def __init__(self):
+        self.clicked = False
+        self.confirmed = False
+        self.response_status: Optional[int] = None
+        self.response_url: Optional[str] = None
+        self.redirect_location: Optional[str] = None
+        self.landed_url: Optional[str] = None
+        self.confirmation_text = False
+        self.errors: List[str] = []
+        self.response_ms: Optional[int] = None
+        self.elapsed_ms: Optional[int] = None
+
+    def decide(self) -> bool:
+        """Settle `confirmed` from the observations: a clean response AND the confirmation page."""
+        if self.response_status is not None:
+            if self.response_status >= 400:
+                self.errors.append(f"Submission returned HTTP {self.response_status}")
+            elif 'accounts.google.com' in (self.redirect_location or self.landed_url or ''):
+                self.errors.append("Submission redirected to Google sign-in")
+            elif not self.confirmation_text and not self.errors:
+                # A 200 alone proves nothing: rejected submissions re-render the form
+                self.errors.append("Confirmation page not seen")
+        self.confirmed = self.response_status is not None and self.confirmation_text and not self.errors
+        return self.confirmed
+
+    def to_dict(self) -> dict:
+        return {
+            'clicked': self.clicked,
+            'confirmed': self.confirmed,
+            'response_status': self.response_status,
+            'response_url': self.response_url,
+            'redirect_location': self.redirect_location,
+            'landed_url': self.landed_url,
+            'confirmation_text': self.confirmation_text,
+            'errors': self.errors,
+            'response_ms': self.response_ms,
+            'elapsed_ms': self.elapsed_ms,
+        }
+
+
+class AutomationResult:
+    """Outcome of a single run_automation call."""
+    def __init__(self):
+        self.success = False
+        self.status = ""
+        self.pages_completed: List[str] = []
+        self.errors: List[str] = []
+        self.needs_review = False
+        self.preflight: Optional[PreflightResult] = None
+        self.confirmation: Optional[SubmissionConfirmation] = None
+        self.dry_run = False
+        # The final submission request a dry run intercepted instead of sending
+        self.intercepted_request: Optional[dict] = None
+        # Milliseconds per step: setup, navigate, each page key, and total
+        self.timings: Dict[str, int] = {}
+        # Playwright trace kept in the artifact store (sampled, slow or failed jobs)
+        self.trace_path: Optional[str] = None
 
 class GoogleFormBot:
     """A bot to automate filling a Google Form using Playwright."""
 
-    def __init__(self, headless=True, page_by_page=False):
+    def __init__(self, headless=True, page_by_page=False, on_event: Optional[Callable[[dict], None]] = None,
+                 pool: Optional[BrowserPool] = None, job_id: Optional[str] = None,
+                 resume_from_cli: bool = False, form: Optional[FormDefinition] = None,
+                 while_paused: Optional[Callable[[], AsyncContextManager]] = None,
+                 review_when_finished: bool = True):
         self.headless = headless
+        self.form = form or form_registry.get()
         self.page_by_page = page_by_page
+        # Page-by-page checkpoints are resumed by job id (web), or from the terminal
+        self.job_id = job_id or uuid.uuid4().hex
+        self.resume_from_cli = resume_from_cli
+        # Entered around every checkpoint wait, e.g. to lend the job's admission slot out
+        self.while_paused = while_paused
+        # Pause once more after submitting so the operator can inspect the browser
+        self.review_when_finished = review_when_finished
+        self.on_event = on_event
+        self.pool = pool
         self.playwright: Optional[Playwright] = None
         self.browser: Optional[Browser] = None
+        self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
+        self.on_form = False
+        self.current_page: Optional[str] = None
+        self.confirmation: Optional[SubmissionConfirmation] = None
+        self.dry_run = False
+        self.intercepted_request: Optional[dict] = None
+        # 'full' (sampled), 'tail' (light, kept only for slow/failed jobs) or None
+        self.trace_mode: Optional[str] = None
+        # Per-page debug screenshots for this job (see SCREENSHOT_MODE), written in the background
+        self.screenshot_pages = (config.SCREENSHOT_MODE == 'all' or
+                                 (config.SCREENSHOT_MODE == 'sampled' and random.random() < config.SCREENSHOT_SAMPLE_RATE))
+        self._artifact_writes: List[asyncio.Future] = []
+        # Overall budget for this job; every operation timeout is capped by what is left
+        self.deadline = JobDeadline(config.JOB_DEADLINE)
+
+    def timeout_for(self, op: str) -> int:
+        """Adaptive timeout for an operation type, capped by the job's remaining budget (ms)."""
+        return self.deadline.cap(timeout_manager.timeout(op), op)
+
+    async def timed(self, op: str, action: Callable[[int], Awaitable]):
+        """Run `action(timeout_ms)` and feed its latency (or its timeout) into the op's rolling window."""
+        adaptive = timeout_manager.timeout(op)
+        timeout = self.deadline.cap(adaptive, op)
+        started = time.monotonic()
+        try:
+            result = await action(timeout)
+        except PlaywrightTimeoutError:
+            # A timeout cut short by the job deadline says nothing about the op's latency
+            if timeout >= adaptive:
+                timeout_manager.record_timeout(op, timeout)
+            raise
+        timeout_manager.record(op, (time.monotonic() - started) * 1000)
+        return result
+
+    def apply_default_timeouts(self):
+        """Bound every other page operation (fills, clicks, load waits) by the job's budget."""
+        if not self.page:
+            return
+        remaining = max(self.deadline.remaining_ms(), 1)
+        self.page.set_default_timeout(min(config.DEFAULT_TIMEOUT, remaining))
+        self.page.set_default_navigation_timeout(min(config.NAVIGATION_TIMEOUT, remaining))
 
     async def setup(self):
-        """Initialize Playwright and launch the browser."""
-        self.playwright = await async_playwright().start()
-        self.browser = await self.playwright.chromium.launch(headless=self.headless, args=["--start-maximized"])
-        context = await self.browser.new_context(no_viewport=True)
-        self.page = await context.new_page()
+        """Get a page: an isolated context from the shared pool, or a locally launched browser."""
+        if self.pool:
+            self.context, self.page, self.on_form = await self.pool.acquire(self.form.url)
+        else:
+            self.playwright = await async_playwright().start()
+            self.browser = await launch_or_connect(self.playwright, self.headless)
+            self.context = await self.browser.new_context(no_viewport=True)
+            self.page = await self.context.new_page()
+        self.apply_default_timeouts()
+        await self.start_tracing()
+        await self.install_event_observer()
+
+    async def start_tracing(self):
+        """Trace a sampled fraction of jobs fully, and the rest lightly in case they fail or run slow."""
+        if random.random() < config.TRACE_SAMPLE_RATE:
+            self.trace_mode = 'full'
+        elif config.TRACE_TAIL_JOBS:
+            self.trace_mode = 'tail'
+        else:
+            return
+        full = self.trace_mode == 'full'
+        try:
+            await self.context.tracing.start(name=self.job_id, screenshots=full, snapshots=full)
+        except Exception as e:
+            logger.warning(f"Could not start tracing: {e}")
+            self.trace_mode = None
+
+    async def finish_tracing(self, result: 'AutomationResult', elapsed: float):
+        """Keep the trace in the artifact store if the job was sampled, failed or ran slow."""
+        if not self.trace_mode or not self.context:
+            return
+        keep = (self.trace_mode == 'full' or not result.success
+                or elapsed > config.TRACE_SLOW_SECONDS)
+        try:
+            if not keep:
+                await self.context.tracing.stop()
+                return
+            path = artifact_store.path_for(self.job_id, 'trace.zip')
+            await self.context.tracing.stop(path=path)
+            await asyncio.to_thread(artifact_store.register, path)
+            result.trace_path = path
+            logger.info(f"Trace saved to {path} (view with: playwright show-trace {path})")
+        except Exception as e:
+            logger.warning(f"Could not save trace: {e}")
+
+    async def install_event_observer(self):
+        """Record validation alerts and page transitions in the page as they happen."""
+        await self.context.add_init_script(FORM_EVENTS_SCRIPT)
+        # Pages that are already loaded (e.g. a warm page from the pool) need it now too
+        await self.page.evaluate(FORM_EVENTS_SCRIPT)
+
+    def emit(self, event_type: str, **data):
+        """Report a progress event (navigated, page_filled, submitted, ...) to the listener, if any."""
+        if not self.on_event:
+            return
+        try:
+            self.on_event({'type': event_type, **data})
+        except Exception as e:
+            logger.debug(f"Progress listener failed for {event_type}: {e}")
 
     async def navigate_to_form(self):
         """Navigate to the Google Form URL with retries."""
         if not self.page:
             return
 
+        if self.on_form:
+            # Pre-navigated page handed out by the browser pool
+            logger.info("Form already loaded (warm page)")
+            self.emit('navigated', url=self.form.url, attempt=0)
+            return
+
         for attempt in range(1, 4):
             try:
-                logger.info(f"Navigating to form (attempt {attempt}/3): {FORM_URL}")
-                await self.page.goto(FORM_URL, timeout=60000)
+                logger.info(f"Navigating to form (attempt {attempt}/3): {self.form.url}")
+                await self.timed('navigate', lambda t: self.page.goto(self.form.url, timeout=t))
+                if on_interstitial(self.page):
+                    # A seeded storage state that no longer gets us straight to the form is stale
+                    if self.pool:
+                        self.pool.invalidate_storage_state(f"navigation landed on {self.page.url}")
+                    if await accept_consent(self.page):
+                        await self.timed('navigate', lambda t: self.page.goto(self.form.url, timeout=t))
                 # Wait for the form title to be visible as a sign of successful load
-                await self.page.wait_for_selector('div[role="heading"]', timeout=20000)
+                await self.timed('heading', lambda t: self.page.wait_for_selector('div[role="heading"]', timeout=t))
                 logger.info("Successfully loaded form")
+                self.emit('navigated', url=self.form.url, attempt=attempt)
                 return
+            except DeadlineExceeded:
+                raise
             except Exception as e:
                 logger.warning(f"Failed to load form on attempt {attempt}: {e}")
                 if attempt == 3:
                     raise
 
     async def wait_for_user_input(self, message: str):
-        """Pause execution if in page-by-page mode."""
-        if self.page_by_page:
-            print(f"\n{message}")
-            input("Press Enter to continue...")
-
-    async def click_next_button(self) -> bool:
-        """Click the 'Next' button on the form."""
+        """Pause at a review checkpoint if in page-by-page mode, without blocking the event loop."""
+        if not self.page_by_page:
+            return
+        logger.info(f"⏸  {message}")
+        self.emit('paused', message=message)
+        paused_at = time.monotonic()
+        async with (self.while_paused() if self.while_paused else contextlib.nullcontext()):
+            if self.resume_from_cli:
+                print(f"\n{message}")
+                await asyncio.to_thread(input, "Press Enter to continue...")
+                action = CONTINUE
+            else:
+                action = await checkpoints.pause(self.job_id, message, timeout=config.CHECKPOINT_TIMEOUT)
+        # Time spent waiting on the reviewer doesn't count against the job's budget
+        self.deadline.extend(time.monotonic() - paused_at)
+        self.apply_default_timeouts()
+        if action == ABORT:
+            raise ReviewAborted(f"Aborted at review checkpoint: {message}")
+        self.emit('resumed', action=action)
+
+    async def resolve_nav_controls(self) -> Dict[str, str]:
+        """Find the page's Next/Back/Submit controls in a single query and cache their names."""
+        controls = await self.page.evaluate(NAV_CONTROLS_SCRIPT, NAV_LABELS)
+        if controls:
+            _nav_controls[(self.form.url, self.current_page)] = controls
+        return controls
+
+    async def click_nav_control(self, kind: str) -> bool:
+        """Click the page's `kind` control ('next', 'back' or 'submit')."""
         if not self.page:
             return False
 
+        cached = _nav_controls.get((self.form.url, self.current_page), {}).get(kind)
+        if cached:
+            try:
+                await self.timed('nav_click', lambda t: self.page.get_by_role(
+                    "button", name=cached, exact=True).first.click(timeout=t))
+                logger.info(f"✓ Clicked {cached} button")
+                return True
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                logger.debug(f"Cached {kind} control '{cached}' not clickable, resolving again: {e}")
+
         try:
-            # The "Next" button is a span inside a div
-            next_button = self.page.locator('span:has-text("Next")').first
-            await next_button.click(timeout=30000)
-            logger.info("✓ Clicked Next button")
+            controls = await self.resolve_nav_controls()
+            if kind not in controls:
+                logger.warning(f"Could not find a visible {kind} button")
+                return False
+            await self.timed('nav_click', lambda t: self.page.locator(f'[data-formbot-nav="{kind}"]').click(timeout=t))
+            logger.info(f"✓ Clicked {controls[kind]} button")
             return True
         except Exception as e:
-            logger.error(f"❌ Error clicking Next button: {e}")
+            logger.error(f"❌ Error clicking {kind} button: {e}")
             return False
 
-    async def click_submit_button(self) -> bool:
-        """Click the 'Submit' button on the form."""
+    async def click_next_button(self) -> bool:
+        """Click the 'Next' button on the form."""
         if not self.page:
             return False
+        # Start the event buffer fresh so only this click's outcome is read afterwards
+        await self.drain_form_events()
+        return await self.click_nav_control('next')
 
-        try:
-            # Try multiple possible submit button texts
-            button_texts = ["Submit", "Request Quote", "Send", "Finish", "Done", "Request a Quote"]
-            
-            for text in button_texts:
-                submit_button = self.page.locator(f'span:has-text("{text}")').first
-                if await submit_button.is_visible():
-                    await submit_button.click(timeout=10000)
-                    logger.info(f"✓ Clicked {text} button")
-                    return True
-            
-            # Also try role-based selection with different texts
-            for text in button_texts:
-                role_button = self.page.get_by_role("button", name=text)
-                if await role_button.is_visible():
-                    await role_button.click(timeout=10000)
-                    logger.info(f"✓ Clicked {text} button (role-based)")
-                    return True
-            
-            logger.warning("Could not find a visible submit button")
-            return False
-        except Exception as e:
-            logger.error(f"❌ Error clicking Submit button: {e}")
-            return False
+    async def click_submit_button(self) -> bool:
+        """Click the 'Submit' button on the form."""
+        return await self.click_nav_control('submit')
 
     async def debug_page_elements(self, page_name: str):
         """Log details about visible form elements for debugging."""
@@ -201,8 +468,8 @@ class GoogleFormBot:
         except:
             pass
         
-        await self.page.screenshot(path=f"quote-bot/page_{page_name.split()[1]}_debug.png")
-        logger.info(f"Screenshot saved as page_{page_name.split()[1]}_debug.png")
+        if self.screenshot_pages:
+            self.capture_screenshot(f"page_{page_name.split()[1]}")
 
         visible_inputs = await self.page.locator('input[type="text"]:visible').count()
         logger.info(f"Visible input fields: {visible_inputs}")
@@ -213,24 +480,73 @@ class GoogleFormBot:
         dropdown_buttons = await self.page.locator('div[tabindex="0"]').count()
         logger.info(f"Dropdown buttons found: {dropdown_buttons}")
 
+    def capture_screenshot(self, name: str):
+        """Take a compressed screenshot into the job's artifact store without waiting for it."""
+        if not self.page:
+            return
+
+        async def capture(page: Page):
+            try:
+                data = await page.screenshot(type='jpeg', quality=config.SCREENSHOT_QUALITY)
+                path = await asyncio.to_thread(artifact_store.add, self.job_id, f"{name}.jpg", data)
+                logger.info(f"Screenshot saved to {path}")
+            except Exception as e:
+                logger.debug(f"Screenshot {name} failed: {e}")
+
+        self._artifact_writes.append(asyncio.ensure_future(capture(self.page)))
+
+    async def flush_artifacts(self):
+        """Wait for pending screenshots before the page goes away."""
+        if self._artifact_writes:
+            await asyncio.gather(*self._artifact_writes, return_exceptions=True)
+            self._artifact_writes.clear()
+
     async def fill_field_with_retry(self, selectors: List[str], value: str, field_name: str) -> bool:
-        """Attempt to fill a field using a list of selectors."""
+        """Fill a field from candidate selectors (in priority order), the first visible match winning.
+
+        The selector that won on earlier jobs for this form version is filled
+        directly (one round trip). If it no longer matches it is forgotten and
+        every candidate is resolved again in one query; a layout change that
+        keeps it matching is handled by bumping the form's version.
+        """
         if not self.page or not value:
             return False
 
-        for i, selector in enumerate(selectors):
+        key = SelectorCache.key(self.form.form_id, self.form.version, field_name)
+        learned = selector_cache.get(key)
+        if learned and learned in selectors:
             try:
-                field = self.page.locator(selector).first
-                if await field.is_visible(timeout=5000):
-                    await field.fill(value)
-                    logger.info(f"✓ Filled {field_name}: {value} (using selector: {selector})")
-                    return True
-            except Exception:
-                logger.debug(f"Selector {i} failed for {field_name}: {selector}")
-                continue
-
-        logger.warning(f"✗ Could not fill {field_name}")
-        return False
+                # One round trip: fill auto-waits for a visible match
+                field = self.page.locator(f"{learned} >> visible=true").first
+                await self.timed('field', lambda t: field.fill(value, timeout=t))
+                selector_cache.hits += 1
+                logger.info(f"✓ Filled {field_name}: {value} (learned selector: {learned})")
+                return True
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                logger.debug(f"Learned selector for {field_name} no longer matches: {e}")
+                selector_cache.forget(key)
+        selector_cache.misses += 1
+
+        try:
+            # All candidates in one query; the first with a visible element wins
+            token = uuid.uuid4().hex[:8]
+            index = await self.page.evaluate(FIELD_RESOLVE_SCRIPT, [selectors, token])
+            if index < 0:
+                logger.warning(f"✗ Could not fill {field_name}")
+                return False
+            field = self.page.locator(f'[data-formbot-field="{token}"]')
+            await self.timed('field', lambda t: field.fill(value, timeout=t))
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.warning(f"✗ Could not fill {field_name}: {e}")
+            return False
+
+        selector_cache.record(key, selectors[index])
+        logger.info(f"✓ Filled {field_name}: {value} (using selector: {selectors[index]})")
+        return True
 
     # --- Page Filling Methods ---
 
@@ -674,24 +990,104 @@ class GoogleFormBot:
 
         await self.wait_for_user_input("Page 7 (final page) completed. Check the billing details.")
 
-        submit_success = await self.click_submit_button()
-        
-        if submit_success:
-            # Wait and check for success message
-            await asyncio.sleep(3)
-            try:
-                if await self.page.locator('text="Your response has been recorded"').count() > 0:
-                    logger.info("✅ Form submitted successfully! Response recorded.")
-                elif await self.page.locator('text="response has been recorded"').count() > 0:
-                    logger.info("✅ Form submitted successfully!")
-            except:
-                pass
-        
-        return submit_success
+        confirmation = await self.submit_and_confirm()
+        return confirmation.confirmed
+
+    async def intercept_submission(self, route):
+        """Dry run: record the final submission and answer it with a stub confirmation page.
+
+        Any other POST is aborted so nothing from a dry run reaches Google; reads go through.
+        """
+        request = route.request
+        if request.method != 'POST':
+            await route.continue_()
+            return
+        if FORM_RESPONSE_PATH not in urlparse(request.url).path:
+            logger.warning(f"🧪 Dry run: blocked unexpected POST to {request.url}")
+            await route.abort('blockedbyclient')
+            return
+        post_data = request.post_data or ''
+        self.intercepted_request = {
+            'url': request.url,
+            'method': request.method,
+            'fields': {key: values if len(values) > 1 else values[0]
+                       for key, values in parse_qs(post_data, keep_blank_values=True).items()},
+            'body': post_data,
+        }
+        logger.info(f"🧪 Dry run: intercepted submission with {len(self.intercepted_request['fields'])} fields")
+        await route.fulfill(status=200, content_type='text/html', body=DRY_RUN_CONFIRMATION_PAGE)
+
+    async def submit_and_confirm(self) -> SubmissionConfirmation:
+        """Click Submit and wait for the form's submission response and the page it lands on."""
+        confirmation = SubmissionConfirmation()
+        self.confirmation = confirmation
+        if not self.page:
+            return confirmation
+
+        def is_form_response(response) -> bool:
+            return FORM_RESPONSE_PATH in response.url and response.request.method == 'POST'
+
+        started = time.monotonic()
+        await self.drain_form_events()
+        if self.dry_run:
+            # Installed only now: Next clicks also POST to formResponse and must go through.
+            # Routes every request so a submission posted anywhere else is caught too
+            await self.page.route("**/*", self.intercept_submission)
+        # Listen before clicking so a fast response can't be missed
+        response_timeout = self.timeout_for('submit_response')
+        response_waiter = asyncio.ensure_future(
+            self.page.wait_for_event('response', predicate=is_form_response, timeout=response_timeout)
+        )
+        confirmation.clicked = await self.click_submit_button()
+        if not confirmation.clicked:
+            response_waiter.cancel()
+            confirmation.errors.append("Submit button not found")
+            return confirmation
+        self.emit('submitted')
+
+        try:
+            response = await response_waiter
+            confirmation.response_ms = int((time.monotonic() - started) * 1000)
+            timeout_manager.record('submit_response', confirmation.response_ms)
+            confirmation.response_status = response.status
+            confirmation.response_url = response.url
+            confirmation.redirect_location = response.headers.get('location')
+
+            await self.timed('confirm_load', lambda t: self.page.wait_for_load_state('domcontentloaded', timeout=t))
+            confirmation.landed_url = self.page.url
+            confirmation.confirmation_text = await self.page.get_by_text(CONFIRMATION_TEXT).count() > 0
+            # A rejected submission re-renders the form with alerts instead of the confirmation
+            alerts = [e['text'] for e in await self.drain_form_events() if e.get('type') == 'alert' and e.get('text')]
+            confirmation.errors.extend(alerts)
+        except Exception as e:
+            if isinstance(e, PlaywrightTimeoutError) and confirmation.response_status is None:
+                timeout_manager.record_timeout('submit_response', response_timeout)
+            confirmation.errors.append(f"No submission response: {e}")
+            logger.error(f"❌ No submission response observed: {e}")
+        finally:
+            confirmation.elapsed_ms = int((time.monotonic() - started) * 1000)
+
+        if confirmation.decide():
+            logger.info(f"✅ Form submitted successfully! Response recorded ({confirmation.elapsed_ms} ms).")
+            self.emit('confirmed', elapsed_ms=confirmation.elapsed_ms, status=confirmation.response_status)
+        else:
+            logger.error(f"❌ Submission not confirmed: {'; '.join(confirmation.errors)}")
+        return confirmation
 
     async def cleanup(self):
-        """Close the browser and stop Playwright."""
+        """Close the browser and stop Playwright (or return the context to the pool)."""
+        if self.pool:
+            if self.context:
+                await self.pool.release(self.context)
+            self.context = None
+            self.page = None
+            logger.info("Browser context released to pool.")
+            return
         if self.browser:
+            if self.context:
+                # On a shared browser server this is the only thing we own;
+                # browser.close() below then just disconnects
+                await self.context.close()
             await self.browser.close()
         if self.playwright:
             await self.playwright.stop()
@@ -704,132 +1100,134 @@ class GoogleFormBot:
         Validate that all required fields have data for a given page.
         Returns (is_valid, list_of_missing_fields)
         """
-        if page_key not in FORM_STRUCTURE:
-            return True, []
-
-        page_config = FORM_STRUCTURE[page_key]
-        missing_fields = []
-
-        for field_config in page_config['fields']:
-            if field_config.get('required', False):
-                field_name = field_config['field']
-                field_label = field_config['label']
-
-                value = getattr(data, field_name, None)
-
-                # Special handling for Page 6 second user fields
-                if page_key == 'page_6' and field_name in ['second_user_name', 'second_user_email']:
-                    if not value and data.user_names_emails:
-                        emails = re.findall(r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})', data.user_names_emails)
-                        non_primary_emails = [e for e in emails if e.lower() != data.email.lower()]
+        missing_fields = missing_required_fields(page_key, data, self.form.structure)
+        return len(missing_fields) == 0, missing_fields
 
-                        if field_name == 'second_user_email' and non_primary_emails:
-                            value = non_primary_emails[0]
-                        elif field_name == 'second_user_name' and non_primary_emails:
-                            email_to_remove = non_primary_emails[0]
-                            name_part = data.user_names_emails.replace(email_to_remove, '').strip()
-                            name_part = re.sub(r'[\(\)–,]', '', name_part).strip()
-                            value = name_part
-
-                if not value:
-                    missing_fields.append(field_label)
+    async def drain_form_events(self) -> List[dict]:
+        """Read and clear the observer's buffered events in a single round trip."""
+        if not self.page:
+            return []
+        try:
+            return await self.page.evaluate("() => window.__formBotDrain ? window.__formBotDrain() : []")
+        except Exception as e:
+            logger.debug(f"Could not read form events: {e}")
+            return []
 
-        is_valid = len(missing_fields) == 0
-        return is_valid, missing_fields
+    async def wait_for_form_events(self):
+        """Wait until the observer has recorded something (a page transition or an alert)."""
+        started = asyncio.get_running_loop().time()
+        settle_timeout = self.timeout_for('settle')
+        deadline = started + settle_timeout / 1000
+        while True:
+            remaining = int((deadline - asyncio.get_running_loop().time()) * 1000)
+            if remaining <= 0:
+                timeout_manager.record_timeout('settle', settle_timeout)
+                return
+            try:
+                await self.page.wait_for_function(
+                    "() => window.__formBotPending && window.__formBotPending() > 0",
+                    timeout=remaining
+                )
+                timeout_manager.record('settle', (asyncio.get_running_loop().time() - started) * 1000)
+                return
+            except PlaywrightTimeoutError:
+                timeout_manager.record_timeout('settle', settle_timeout)
+                return
+            except Exception as e:
+                # The Next click navigates; a destroyed context means "try again on the new page"
+                if 'context was destroyed' not in str(e) and 'navigation' not in str(e).lower():
+                    return
 
     async def check_for_form_errors(self) -> List[str]:
         """
         Check if the form is showing any validation errors after clicking Next/Submit.
-        Google Forms shows errors with role="alert"
+        Google Forms shows errors with role="alert"; the injected observer buffers them.
         """
         if not self.page:
             return []
 
-        try:
-            await asyncio.sleep(1)  # Give form time to show errors
+        await self.wait_for_form_events()
+        events = await self.drain_form_events()
 
-            error_elements = await self.page.locator('[role="alert"]').all()
-            errors = []
+        # Only alerts raised after the latest page transition belong to the current page
+        errors = []
+        for event in events:
+            if event.get('type') == 'page':
+                errors = []
+                logger.info(f"Page transition: {event.get('heading', '')[:60]}")
+            elif event.get('type') == 'alert' and event.get('text'):
+                errors.append(event['text'])
 
-            for element in error_elements:
-                text = await element.text_content()
-                if text and text.strip():
-                    errors.append(text.strip())
+        return errors
 
-            # Also check for the generic "Required question" indicators
-            required_indicators = await self.page.locator('span:has-text("This is a required question")').all()
-            if required_indicators and not errors:
-                errors.append(f"Found {len(required_indicators)} required field(s) not filled")
-
-            return errors
-
-        except Exception as e:
-            logger.debug(f"Error checking for form validation errors: {e}")
-            return []
-
-    async def display_validation_summary(self, data: FormData) -> None:
+    async def display_validation_summary(self, data: FormData, preflight: Optional[PreflightResult] = None) -> None:
         """Display a summary of what will be filled and what's missing"""
         logger.info("\n=== PRE-FILL VALIDATION SUMMARY ===")
 
-        # Determine which pages will be shown
-        if data.num_premium_users == 1:
-            active_pages = ['page_1', 'page_2', 'page_3', 'page_5', 'page_7']
-        elif data.num_premium_users == 2:
-            active_pages = ['page_1', 'page_2', 'page_3', 'page_6', 'page_7']
-        else:
-            active_pages = ['page_1', 'page_2', 'page_3', 'page_4', 'page_7']
-
-        all_valid = True
+        preflight = preflight or preflight_validate(data, self.form)
 
-        for page_key in active_pages:
-            if page_key not in FORM_STRUCTURE:
-                continue
+        for page_key in preflight.page_sequence:
+            page_name = self.form.structure[page_key]['name']
+            missing_fields = preflight.missing.get(page_key)
 
-            page_config = FORM_STRUCTURE[page_key]
-            page_name = page_config['name']
-
-            # Now we can use await directly since this method is async
-            is_valid, missing_fields = await self.validate_required_fields(page_key, data)
-
-            if is_valid:
+            if not missing_fields:
                 logger.info(f"✅ {page_name}: All required fields have data")
             else:
                 logger.warning(f"⚠️  {page_name}: Missing required fields: {', '.join(missing_fields)}")
-                all_valid = False
 
-        if all_valid:
+        if preflight.ok:
             logger.info("\n✅ All required fields have data! Form should submit successfully.")
         else:
             logger.warning("\n⚠️  Some required fields are missing. The form may show validation errors.")
 
         logger.info("===================================\n")
 
-    async def run_automation(self, message: str):
-        """Enhanced automation workflow with field validation"""
-        try:
-            parser = MessageParser()
-            data = parser.extract_data(message)
+    async def run_automation(self, message: str = "", data: Optional[FormData] = None,
+                             dry_run: bool = False) -> AutomationResult:
+        """Enhanced automation workflow with field validation.
 
-            await self.display_validation_summary(data)
+        Pass either the raw `message` to parse or already-extracted `data`.
+        With `dry_run`, every page is filled but the final submission is
+        intercepted and recorded instead of being sent.
+        """
+        result = AutomationResult()
+        result.dry_run = self.dry_run = dry_run
+        started = time.monotonic()
+        step_started = started
 
-            # Pre-validate critical fields
-            is_valid, missing = await self.validate_required_fields('page_1', data)
-            if not is_valid:
-                logger.error(f"❌ Cannot proceed - missing critical fields: {', '.join(missing)}")
-                logger.error("These fields are required to start the form.")
-                return
+        def lap(step: str):
+            nonlocal step_started
+            now = time.monotonic()
+            result.timings[step] = int((now - step_started) * 1000)
+            step_started = now
 
+        try:
+            if data is None:
+                parser = self.form.parser()
+                data = parser.extract_data(message)
+
+            # Validate every page up front so incomplete requests never launch a browser
+            preflight = preflight_validate(data, self.form)
+            result.preflight = preflight
+            await self.display_validation_summary(data, preflight)
+
+            if not preflight.ok:
+                logger.error(f"❌ Cannot proceed - needs review: {preflight.summary()}")
+                result.status = f"Needs review - missing required fields: {preflight.summary()}"
+                result.needs_review = True
+                result.errors.extend(preflight.missing_labels())
+                for page_key, missing in preflight.missing.items():
+                    self.emit('validation_errors', page=page_key, errors=missing)
+                return result
+
+            # The budget starts once the job actually needs a browser
+            self.deadline = JobDeadline(config.JOB_DEADLINE)
             await self.setup()
+            lap('setup')
             await self.navigate_to_form()
+            lap('navigate')
 
-            # Determine page sequence
-            page_sequence = ['page_1', 'page_2', 'page_3']
-            if data.num_premium_users == 1:
-                page_sequence.extend(['page_5', 'page_7'])
-            elif data.num_premium_users == 2:
-                page_sequence.extend(['page_6', 'page_7'])
-            else:
-                page_sequence.extend(['page_4', 'page_7'])
+            page_sequence = preflight.page_sequence
 
             page_functions = {
                 'page_1': self.fill_page_1, 'page_2': self.fill_page_2, 'page_3': self.fill_page_3,
@@ -839,44 +1237,91 @@ class GoogleFormBot:
 
             # Process each page
             for page_key in page_sequence:
-                page_config = FORM_STRUCTURE.get(page_key, {})
+                page_config = self.form.structure.get(page_key, {})
                 page_name = page_config.get('name', page_key)
 
                 logger.info(f"🔄 Starting {page_name}...")
 
+                self.deadline.check(page_name)
+                self.apply_default_timeouts()
+                self.current_page = page_key
                 fill_func = page_functions[page_key]
                 success = await fill_func(data)
+                lap(page_key)
 
                 if success and page_key != 'page_7':
                     errors = await self.check_for_form_errors()
                     if errors:
                         logger.error(f"❌ Form validation errors on {page_name}:")
                         for error in errors: logger.error(f"   - {error}")
+                        self.emit('validation_errors', page=page_key, errors=errors)
 
                         if self.page_by_page:
-                            input(f"\n⚠️  Please manually fill required fields and click Next, then press Enter...")
+                            await self.wait_for_user_input(
+                                "⚠️  Please manually fill required fields and click Next, then continue."
+                            )
                         else:
                             logger.error("Cannot proceed due to validation errors.")
+                            result.errors.extend(errors)
                             break
 
+                if not success:
+                    # A step that gave up because the budget ran out reports as a deadline failure
+                    self.deadline.check(page_name)
                 if not success and page_key != 'page_7':
                     logger.error(f"❌ Failed to complete {page_name}")
+                    result.errors.append(f"Failed to complete {page_name}")
                     break
 
+                if page_key == 'page_7':
+                    result.success = success
+                    result.confirmation = self.confirmation
+                    if self.confirmation:
+                        result.errors.extend(self.confirmation.errors)
+                if success:
+                    result.pages_completed.append(page_key)
+                    self.emit('page_filled', page=page_key, name=page_name,
+                              index=len(result.pages_completed), total=len(page_sequence))
                 logger.info(f"✅ {page_name} completed!")
 
+            result.intercepted_request = self.intercepted_request
+            if result.success and dry_run:
+                result.status = "Dry run complete - submission intercepted, nothing was sent"
+            elif result.success:
+                result.status = "Form submitted"
+            elif result.confirmation and result.confirmation.clicked:
+                result.status = f"Submission not confirmed: {'; '.join(result.confirmation.errors)}"
+            else:
+                result.status = "Form not submitted"
             logger.info("🎉 Form automation completed!")
 
-            if self.page_by_page:
-                input("\nPress Enter to close browser...")
-
+            if self.review_when_finished:
+                await self.wait_for_user_input("Automation finished. Continue to close the browser.")
+
+        except DeadlineExceeded as e:
+            logger.error(f"⏱  {e}")
+            result.status = str(e)
+            result.errors.append(str(e))
+            if config.SCREENSHOT_MODE != 'off':
+                self.capture_screenshot('error')
+        except ReviewAborted as e:
+            logger.warning(f"🛑 {e}")
+            result.status = str(e)
+            result.errors.append(str(e))
         except Exception as e:
             logger.error(f"Error during automation: {e}", exc_info=True)
-            if self.page:
-                await self.page.screenshot(path="quote-bot/error_screenshot.png")
-                logger.info("Error screenshot saved as quote-bot/error_screenshot.png")
+            result.status = f"Error during automation: {e}"
+            result.errors.append(str(e))
+            if config.SCREENSHOT_MODE != 'off':
+                self.capture_screenshot('error')
         finally:
+            await self.flush_artifacts()
+            await self.finish_tracing(result, time.monotonic() - started)
             await self.cleanup()
+            result.timings['total'] = int((time.monotonic() - started) * 1000)
+            self.emit('done', success=result.success, status=result.status)
+
+        return result
 
 async def main():
     """Main function to run the bot."""
@@ -901,7 +1346,7 @@ async def main():
     page_by_page = page_by_page_input.lower() != 'n'
 
     # --- Run Bot ---
-    bot = GoogleFormBot(headless=headless, page_by_page=page_by_page)
+    bot = GoogleFormBot(headless=headless, page_by_page=page_by_page, resume_from_cli=True)
     await bot.run_automation(message)
 
 if __name__ == "__main__":
@@ -0,0 +1,135 @@
+"""
+Registry of the Google Forms this deployment can fill, keyed by form id.
+
+Each form carries its own URL, page schema, page plan, MessageParser label
+mappings, concurrency limits and warm-page setting, so one process can serve
+every quote and renewal form. The default form comes from FORM_URL; more are
+loaded from the JSON file named by FORMS_CONFIG:
+
+    {
+        "renewal": {
+            "url": "https://docs.google.com/forms/d/e/.../viewform",
+            "title": "License renewal",
+            "version": "2",
+            "schema": "quote",
+            "field_mappings": {"renewal for": "organization_name"},
+            "max_in_flight": 1,
+            "max_queued": 2,
+            "warm": true
+        }
+    }
+
+`schema` names a registered form whose page schema and plan are reused
+(page conditions are Python, so new schemas are registered in code). Bump
+`version` when the form's layout changes so learned field selectors reset.
+"""
+
+import json
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+
+from .config import config
+from .form_schema import FORM_STRUCTURE, compute_page_sequence
+from .parser_only import MessageParser
+
+logger = logging.getLogger(__name__)
+
+
+class UnknownFormError(KeyError):
+    """No form is registered under the requested id."""
+
+
+class FormDefinition:
+    """Everything needed to parse, validate and fill one Google Form."""
+    def __init__(self, form_id: str, url: str, title: str = "", structure: Optional[dict] = None,
+                 page_plan: Optional[Callable] = None, field_mappings: Optional[Dict[str, str]] = None,
+                 max_in_flight: Optional[int] = None, max_queued: Optional[int] = None,
+                 warm: Optional[bool] = None, version: str = "1"):
+        self.form_id = form_id
+        self.version = version
+        self.url = url
+        self.title = title or form_id
+        self.structure = structure or FORM_STRUCTURE
+        self.page_plan = page_plan or compute_page_sequence
+        self.field_mappings = field_mappings or {}
+        self.max_in_flight = max_in_flight or config.MAX_IN_FLIGHT_JOBS
+        self.max_queued = max_queued if max_queued is not None else config.MAX_QUEUED_JOBS
+        self.warm = config.WARM_FORM_PAGE if warm is None else warm
+
+    def parser(self) -> MessageParser:
+        """A MessageParser that also understands this form's labels."""
+        return MessageParser(self.field_mappings)
+
+    def to_dict(self) -> dict:
+        return {
+            'form_id': self.form_id,
+            'title': self.title,
+            'version': self.version,
+            'url': self.url,
+            'pages': list(self.structure),
+            'max_in_flight': self.max_in_flight,
+            'max_queued': self.max_queued,
+            'warm': self.warm,
+        }
+
+
+class FormRegistry:
+    """Form definitions keyed by form id, with one default."""
+    def __init__(self, default_id: str):
+        self.default_id = default_id
+        self.forms: Dict[str, FormDefinition] = {}
+        self._lock = threading.Lock()
+
+    def register(self, form: FormDefinition) -> FormDefinition:
+        with self._lock:
+            self.forms[form.form_id] = form
+        return form
+
+    def get(self, form_id: Optional[str] = None) -> FormDefinition:
+        """The form registered under `form_id` (the default form if empty)."""
+        form_id = form_id or self.default_id
+        with self._lock:
+            form = self.forms.get(form_id)
+        if form is None:
+            raise UnknownFormError(form_id)
+        return form
+
+    def all(self) -> List[FormDefinition]:
+        with self._lock:
+            return list(self.forms.values())
+
+    def load_file(self, path: str):
+        """Register the forms described in a FORMS_CONFIG JSON file."""
+        with open(path, encoding='utf-8') as f:
+            entries = json.load(f)
+        for form_id, entry in entries.items():
+            base = self.get(entry['schema']) if entry.get('schema') else None
+            self.register(FormDefinition(
+                form_id,
+                url=entry['url'],
+                title=entry.get('title', ''),
+                structure=base.structure if base else None,
+                page_plan=base.page_plan if base else None,
+                field_mappings=entry.get('field_mappings'),
+                max_in_flight=entry.get('max_in_flight'),
+                max_queued=entry.get('max_queued'),
+                warm=entry.get('warm'),
+                version=str(entry.get('version', '1')),
+            ))
+        logger.info(f"Loaded {len(entries)} form(s) from {path}")
+
+
+def _build_registry() -> FormRegistry:
+    registry = FormRegistry(config.DEFAULT_FORM_ID)
+    registry.register(FormDefinition(config.DEFAULT_FORM_ID, config.FORM_URL, title="Premium license quote",
+                                     version=config.FORM_VERSION))
+    if config.FORMS_CONFIG:
+        try:
+            registry.load_file(config.FORMS_CONFIG)
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Could not load forms from {config.FORMS_CONFIG}: {e}")
+    return registry
+
+
+form_registry = _build_registry()
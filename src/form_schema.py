@@ -0,0 +1,135 @@
+"""
+Google Form structure definition and pure helpers over it.
+
+Kept free of browser imports so the parser, pre-flight validation and web
+endpoints can use the schema without loading Playwright.
+"""
+
+import re
+from typing import List, Optional
+
+EMAIL_PATTERN = r'([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})'
+
+# --- Form Structure Definition ---
+FORM_STRUCTURE = {
+    'page_1': {
+        'name': 'Contact Information',
+        'fields': [
+            {'field': 'name', 'required': True, 'type': 'text', 'label': 'Your name'},
+            {'field': 'email', 'required': True, 'type': 'email', 'label': 'Your email'},
+            {'field': 'send_to', 'required': False, 'type': 'email', 'label': 'Send to', 'default_to': 'email'}
+        ]
+    },
+    'page_2': {
+        'name': 'Organization Details',
+        'fields': [
+            {'field': 'organization_name', 'required': True, 'type': 'text', 'label': "Organization's Name"},
+            {'field': 'organization_sector', 'required': True, 'type': 'radio', 'label': 'Sector', 'options': ['Academic', 'Industry']}
+        ]
+    },
+    'page_3': {
+        'name': 'License Details',
+        'fields': [
+            {'field': 'num_premium_users', 'required': True, 'type': 'dropdown', 'label': 'Number of Premium users'},
+            {'field': 'license_length_years', 'required': True, 'type': 'dropdown', 'label': 'Length of license'}
+        ]
+    },
+    'page_4': {
+        'name': 'Admin Information (5+ users)',
+        'condition': lambda data: data.num_premium_users >= 5,
+        'fields': [
+            {'field': 'institution_name', 'required': False, 'type': 'text', 'label': 'Institution name', 'default_to': 'organization_name'},
+            {'field': 'admin_name', 'required': False, 'type': 'text', 'label': 'Admin name', 'default_to': 'name'},
+            {'field': 'admin_email', 'required': False, 'type': 'email', 'label': 'Admin email', 'default_to': 'email'}
+        ]
+    },
+    'page_5': {
+        'name': 'Individual User (1 person)',
+        'condition': lambda data: data.num_premium_users == 1,
+        'fields': [
+            {'field': 'first_user_name', 'required': False, 'type': 'text', 'label': 'First user name', 'default_to': 'name'},
+            {'field': 'first_user_email', 'required': False, 'type': 'email', 'label': 'First user email', 'default_to': 'email'}
+        ]
+    },
+    'page_6': {
+        'name': 'Two Users Information',
+        'condition': lambda data: data.num_premium_users == 2,
+        'fields': [
+            {'field': 'first_user_name', 'required': False, 'type': 'text', 'label': 'First user name', 'default_to': 'name'},
+            {'field': 'first_user_email', 'required': False, 'type': 'email', 'label': 'First user email', 'default_to': 'email'},
+            {'field': 'second_user_name', 'required': True, 'type': 'text', 'label': 'Second user name'},
+            {'field': 'second_user_email', 'required': True, 'type': 'email', 'label': 'Second user email'}
+        ]
+    },
+    'page_7': {
+        'name': 'Billing Information',
+        'fields': [
+            {'field': 'billing_name', 'required': False, 'type': 'text', 'label': 'Billing name'},
+            {'field': 'billing_email', 'required': False, 'type': 'email', 'label': 'Billing email'},
+            {'field': 'billing_address', 'required': False, 'type': 'textarea', 'label': 'Billing address'},
+            {'field': 'shipping_address', 'required': False, 'type': 'textarea', 'label': 'Shipping address'},
+            {'field': 'vat_tax_id', 'required': False, 'type': 'text', 'label': 'VAT or Tax ID'}
+        ]
+    }
+}
+
+# Accessible names of the form's navigation controls, by kind
+NAV_LABELS = {
+    'next': ['Next'],
+    'back': ['Back'],
+    'submit': ['Submit', 'Request Quote', 'Request a Quote', 'Send', 'Finish', 'Done'],
+}
+
+
+def compute_page_sequence(data) -> List[str]:
+    """Pages the form will show for this data, in order."""
+    page_sequence = ['page_1', 'page_2', 'page_3']
+    if data.num_premium_users == 1:
+        page_sequence.extend(['page_5', 'page_7'])
+    elif data.num_premium_users == 2:
+        page_sequence.extend(['page_6', 'page_7'])
+    else:
+        page_sequence.extend(['page_4', 'page_7'])
+    return page_sequence
+
+
+def second_user_from_list(data) -> tuple:
+    """(name, email) of the first non-primary user in `user_names_emails`."""
+    if not data.user_names_emails:
+        return "", ""
+    emails = re.findall(EMAIL_PATTERN, data.user_names_emails)
+    non_primary_emails = [e for e in emails if e.lower() != (data.email or '').lower()]
+    if not non_primary_emails:
+        return "", ""
+    email = non_primary_emails[0]
+    name_part = data.user_names_emails.replace(email, '').strip()
+    name_part = re.sub(r'[\(\)–,]', '', name_part).strip()
+    return name_part, email
+
+
+def resolve_field_value(page_key: str, field_config: dict, data) -> Optional[str]:
+    """Effective value for a field, following `default_to` and derived values."""
+    field_name = field_config['field']
+    value = getattr(data, field_name, None)
+
+    # Special handling for Page 6 second user fields
+    if not value and page_key == 'page_6' and field_name in ['second_user_name', 'second_user_email']:
+        name, email = second_user_from_list(data)
+        value = email if field_name == 'second_user_email' else name
+
+    if not value and field_config.get('default_to'):
+        value = getattr(data, field_config['default_to'], None)
+
+    return value
+
+
+def missing_required_fields(page_key: str, data, structure: Optional[dict] = None) -> List[str]:
+    """Labels of required fields on a page that have no value."""
+    page_config = (structure or FORM_STRUCTURE).get(page_key)
+    if not page_config:
+        return []
+    return [
+        field_config['label']
+        for field_config in page_config['fields']
+        if field_config.get('required', False) and not resolve_field_value(page_key, field_config, data)
+    ]
@@ -0,0 +1,237 @@
+"""
+Raw RFC 822 / .eml ingestion for the parser.
+
+Walks the MIME tree line by line so attachments are skipped without ever
+being buffered, decodes quoted-printable/base64 and charsets incrementally,
+and picks the best text body to feed into the normalizer and MessageParser.
+"""
+
+import base64
+import binascii
+import codecs
+import io
+import logging
+import os
+from email import policy
+from email.parser import BytesHeaderParser
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union
+
+from .normalizer import extract_form_data
+from .parser_only import FormData, MessageParser
+from .preprocess import html_to_text
+
+logger = logging.getLogger(__name__)
+
+# Longest line read at once; longer (binary) lines are consumed in chunks
+READ_CHUNK = 64 * 1024
+# Cap on decoded text kept per body part
+MAX_TEXT_BYTES = 1024 * 1024
+# Deepest message/rfc822 nesting we descend into
+MAX_NESTING = 8
+
+EmailSource = Union[bytes, bytearray, str, os.PathLike, BinaryIO]
+
+
+class EmailContent:
+    """Text body and metadata extracted from a raw email."""
+    def __init__(self):
+        self.subject = ""
+        self.sender = ""
+        self.text = ""
+        self.content_type = ""
+        self.skipped_attachments: List[Tuple[str, str]] = []
+
+
+class _TextPart:
+    def __init__(self, content_type: str, text: str, message_index: int):
+        self.content_type = content_type
+        self.text = text
+        self.message_index = message_index
+
+
+class _StreamingDecoder:
+    """Incrementally decode a transfer encoding and charset, one line at a time."""
+    def __init__(self, transfer_encoding: str, charset: str):
+        self.transfer_encoding = (transfer_encoding or '7bit').strip().lower()
+        try:
+            self.text_decoder = codecs.getincrementaldecoder(charset or 'utf-8')(errors='replace')
+        except LookupError:
+            self.text_decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._b64_pending = b''
+        self.parts: List[str] = []
+        self.size = 0
+
+    def feed(self, line: bytes):
+        if self.size >= MAX_TEXT_BYTES:
+            return
+        if self.transfer_encoding == 'base64':
+            data = self._b64_pending + b''.join(line.split())
+            usable = len(data) - len(data) % 4
+            self._b64_pending = data[usable:]
+            try:
+                raw = base64.b64decode(data[:usable])
+            except (binascii.Error, ValueError):
+                raw = b''
+        elif self.transfer_encoding == 'quoted-printable':
+            raw = binascii.a2b_qp(line)
+        else:
+            raw = line
+        self.size += len(raw)
+        self.parts.append(self.text_decoder.decode(raw))
+
+    def finish(self) -> str:
+        if self._b64_pending:
+            try:
+                self.parts.append(self.text_decoder.decode(base64.b64decode(self._b64_pending + b'==')))
+            except (binascii.Error, ValueError):
+                pass
+        self.parts.append(self.text_decoder.decode(b'', final=True))
+        return ''.join(self.parts)
+
+
+def _iter_lines(source: EmailSource) -> Iterator[bytes]:
+    if isinstance(source, (bytes, bytearray)):
+        stream = io.BytesIO(bytes(source))
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            yield from iter(lambda: f.readline(READ_CHUNK), b'')
+        return
+    else:
+        stream = source
+    yield from iter(lambda: stream.readline(READ_CHUNK), b'')
+
+
+class _MimeWalker:
+    """Single-pass MIME walker over a line iterator."""
+    def __init__(self, lines: Iterator[bytes], content: EmailContent):
+        self.lines = lines
+        self.content = content
+        self.text_parts: List[_TextPart] = []
+        # 0 is the outer message; each nested message/rfc822 gets the next index
+        self.message_count = 1
+        self.header_parser = BytesHeaderParser(policy=policy.default)
+
+    def _read_headers(self):
+        raw = []
+        for line in self.lines:
+            if line in (b'\r\n', b'\n'):
+                break
+            raw.append(line)
+        return self.header_parser.parsebytes(b''.join(raw))
+
+    @staticmethod
+    def _match_boundary(line: bytes, boundaries: List[bytes]) -> Optional[Tuple[bytes, bool]]:
+        if not line.startswith(b'--'):
+            return None
+        stripped = line.rstrip()
+        for boundary in reversed(boundaries):
+            if stripped == b'--' + boundary:
+                return boundary, False
+            if stripped == b'--' + boundary + b'--':
+                return boundary, True
+        return None
+
+    def _consume_until_boundary(self, boundaries: List[bytes], sink=None) -> Optional[Tuple[bytes, bool]]:
+        """Read lines until one of the active boundaries; feed body lines to `sink`."""
+        for line in self.lines:
+            match = self._match_boundary(line, boundaries) if boundaries else None
+            if match:
+                return match
+            if sink is not None:
+                sink(line)
+        return None
+
+    def walk(self, boundaries: List[bytes], depth: int = 0,
+             message_index: int = 0) -> Optional[Tuple[bytes, bool]]:
+        """Parse one entity; returns the boundary line that ended it (None at EOF)."""
+        headers = self._read_headers()
+        content_type = headers.get_content_type()
+        disposition = headers.get_content_disposition()
+
+        if depth == 0:
+            self.content.subject = str(headers.get('Subject', '') or '')
+            self.content.sender = str(headers.get('From', '') or '')
+
+        if content_type.startswith('multipart/'):
+            boundary = headers.get_param('boundary')
+            if not boundary:
+                return self._consume_until_boundary(boundaries)
+            inner = boundaries + [boundary.encode('utf-8', 'replace')]
+            # Skip the preamble
+            end = self._consume_until_boundary(inner)
+            while end and end[0] == inner[-1] and not end[1]:
+                end = self.walk(inner, depth + 1, message_index)
+            if end and end[0] == inner[-1]:
+                # Closing delimiter; skip the epilogue up to the parent boundary
+                return self._consume_until_boundary(boundaries)
+            return end
+
+        if content_type == 'message/rfc822' and depth < MAX_NESTING:
+            # Forwarded mail, inline or as an attachment: walk into it
+            nested_index = self.message_count
+            self.message_count += 1
+            return self.walk(boundaries, depth + 1, nested_index)
+
+        is_text = content_type in ('text/plain', 'text/html')
+        if disposition == 'attachment' or not is_text:
+            self.content.skipped_attachments.append((headers.get_filename() or '', content_type))
+            return self._consume_until_boundary(boundaries)
+
+        decoder = _StreamingDecoder(headers.get('Content-Transfer-Encoding', '7bit'),
+                                    headers.get_content_charset() or 'utf-8')
+        end = self._consume_until_boundary(boundaries, decoder.feed)
+        self.text_parts.append(_TextPart(content_type, decoder.finish(), message_index))
+        return end
+
+
+def _part_text(part: _TextPart) -> str:
+    text = html_to_text(part.text) if part.content_type == 'text/html' else part.text
+    return text.replace('\r\n', '\n').strip()
+
+
+def _best_part(parts: List[_TextPart], message_index: int) -> Optional[_TextPart]:
+    """First non-empty plain-text body of a message, falling back to HTML."""
+    candidates = [p for p in parts if p.message_index == message_index and p.text.strip()]
+    for part in candidates:
+        if part.content_type == 'text/plain':
+            return part
+    return candidates[0] if candidates else None
+
+
+def read_email(source: EmailSource) -> EmailContent:
+    """Extract the best text body from raw RFC 822 bytes, a file object or a .eml path."""
+    content = EmailContent()
+    walker = _MimeWalker(_iter_lines(source), content)
+    walker.walk([])
+
+    best_parts = [_best_part(walker.text_parts, i) for i in range(walker.message_count)]
+    best_parts = [p for p in best_parts if p is not None]
+    if not best_parts:
+        return content
+
+    content.content_type = best_parts[0].content_type
+    sections = [_part_text(best_parts[0])]
+    # Forwarded messages attached as message/rfc822 usually carry the real request
+    for part in best_parts[1:]:
+        sections.append('---------- Forwarded message ---------\n' + _part_text(part))
+
+    content.text = '\n\n'.join(s for s in sections if s)
+    logger.info(f"Read email body ({content.content_type}, {len(content.text)} chars, "
+                f"{len(content.skipped_attachments)} attachment(s) skipped)")
+    return content
+
+
+def email_to_text(source: EmailSource) -> str:
+    """Raw email to the plain text the normalizer expects, with sender and subject up front."""
+    content = read_email(source)
+    header_lines = []
+    if content.sender:
+        header_lines.append(f"From: {content.sender}")
+    if content.subject:
+        header_lines.append(f"Subject: {content.subject}")
+    return '\n'.join(header_lines + ['', content.text]).strip()
+
+
+def parse_email_message(source: EmailSource, parser: Optional[MessageParser] = None) -> FormData:
+    """Read a raw email and run it through normalization and MessageParser."""
+    return extract_form_data(email_to_text(source), parser)
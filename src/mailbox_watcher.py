@@ -0,0 +1,320 @@
+"""
+Mailbox watcher that feeds parse and submit jobs automatically.
+
+Watches a Maildir (or an IMAP folder) for new messages, checkpoints which ones
+have been processed, and pushes each message through
+
+    normalize -> parse -> validate -> submit
+
+as pipelined asyncio stages joined by bounded queues, so the next email is
+normalized while the browser is still filling the current one.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import imaplib
+import io
+import json
+import logging
+import mailbox
+import os
+import threading
+import time
+from typing import Callable, List, Optional, Set, Tuple
+
+from .config import config
+from .form_automation import GoogleFormBot
+from .ingest import email_to_text
+from .normalizer import normalize_email_text, normalize_to_form_data
+from .parser_only import FormData, MessageParser
+from .preflight import preflight_validate
+
+logger = logging.getLogger(__name__)
+
+
+# Stages whose failures are usually transient (IMAP, OpenAI, the browser) and are retried
+RETRYABLE_STAGES = {'normalize', 'submit'}
+
+
+class NeedsReview(Exception):
+    """A human has to finish the message: required fields are missing, or a submit was not confirmed."""
+
+
+class MailJob:
+    """A single message moving through the pipeline."""
+    def __init__(self, key: str, load: Callable):
+        self.key = key
+        self.load = load
+        self.text = ""
+        self.normalized = ""
+        self.data: Optional[FormData] = None
+        self.status = "pending"
+        self.started = time.monotonic()
+
+
+def _read_text(load: Callable) -> str:
+    with contextlib.closing(load()) as f:
+        return email_to_text(f)
+
+
+class MaildirSource:
+    """Message source backed by a local Maildir (also the stand-in for IMAP in tests)."""
+    def __init__(self, path: str):
+        self.path = path
+        self.maildir = mailbox.Maildir(path, factory=None, create=True)
+
+    def name(self) -> str:
+        return f"maildir:{self.path}"
+
+    def poll(self) -> List[Tuple[str, Callable]]:
+        """Return (key, loader) pairs for every message currently in the Maildir."""
+        # Maildir unique names start with the delivery time, so key order is arrival order
+        keys = sorted(self.maildir.iterkeys())
+        # get_file returns a binary file object, so the body is streamed by ingest
+        return [(key, (lambda k=key: self.maildir.get_file(k))) for key in keys]
+
+
+class ImapSource:
+    """Message source that polls an IMAP folder by UID.
+
+    imaplib connections are not thread-safe, and polling and fetching run in
+    worker threads, so every command goes through one lock.
+    """
+    def __init__(self, host: str, user: str, password: str, folder: str = 'INBOX', port: int = 993):
+        self.host = host
+        self.user = user
+        self.password = password
+        self.folder = folder
+        self.port = port
+        self.connection: Optional[imaplib.IMAP4_SSL] = None
+        self.uidvalidity = ""
+        self._lock = threading.Lock()
+
+    def name(self) -> str:
+        return f"imap:{self.user}@{self.host}/{self.folder}"
+
+    def _connect(self) -> imaplib.IMAP4_SSL:
+        """The logged-in connection with the folder selected (selected once per connection)."""
+        if self.connection is None:
+            connection = imaplib.IMAP4_SSL(self.host, self.port)
+            connection.login(self.user, self.password)
+            connection.select(self.folder, readonly=True)
+            status = connection.response('UIDVALIDITY')[1]
+            self.uidvalidity = status[0].decode() if status and status[0] else ""
+            self.connection = connection
+        return self.connection
+
+    def _reset(self):
+        """Drop a broken connection; the next command reconnects."""
+        connection, self.connection = self.connection, None
+        if connection is not None:
+            with contextlib.suppress(Exception):
+                connection.logout()
+
+    def poll(self) -> List[Tuple[str, Callable]]:
+        with self._lock:
+            try:
+                _, data = self._connect().uid('search', None, 'ALL')
+            except (imaplib.IMAP4.error, OSError) as e:
+                logger.warning(f"IMAP poll failed, reconnecting next time: {e}")
+                self._reset()
+                return []
+            uidvalidity = self.uidvalidity
+        uids = data[0].split() if data and data[0] else []
+        return [(f"{uidvalidity}:{uid.decode()}", (lambda u=uid: self._fetch(u))) for uid in uids]
+
+    def _fetch(self, uid: bytes):
+        with self._lock:
+            try:
+                _, data = self._connect().uid('fetch', uid, '(RFC822)')
+            except (imaplib.IMAP4.error, OSError):
+                self._reset()
+                raise
+        raw = next((part[1] for part in data if isinstance(part, tuple)), b'')
+        return io.BytesIO(raw)
+
+
+class Checkpoint:
+    """Persistent record of processed message keys (JSON file, atomically rewritten).
+
+    Messages waiting to be retried are recorded with a "retrying:<stage>"
+    status and their attempt count, and do not count as processed.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.processed: dict = {}
+        try:
+            with open(path, encoding='utf-8') as f:
+                self.processed = json.load(f)
+        except (OSError, ValueError):
+            self.processed = {}
+
+    def __contains__(self, key: str) -> bool:
+        entry = self.processed.get(key)
+        return entry is not None and not entry['status'].startswith('retrying:')
+
+    def attempts(self, key: str) -> int:
+        return self.processed.get(key, {}).get('attempts', 0)
+
+    def mark(self, key: str, status: str, attempts: Optional[int] = None):
+        self.processed[key] = {'status': status, 'at': time.time()}
+        if attempts is not None:
+            self.processed[key]['attempts'] = attempts
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.processed, f)
+        os.replace(tmp_path, self.path)
+
+
+class MailboxPipeline:
+    """Pipelined normalize -> parse -> validate -> submit over a message source."""
+    def __init__(self, source, checkpoint: Checkpoint, queue_size: int = None,
+                 poll_interval: float = None, normalize_workers: int = 2,
+                 submit_workers: int = 1, headless: bool = True):
+        self.source = source
+        self.checkpoint = checkpoint
+        self.queue_size = queue_size or config.WATCHER_QUEUE_SIZE
+        self.poll_interval = poll_interval or config.WATCHER_POLL_INTERVAL
+        self.normalize_workers = normalize_workers
+        self.submit_workers = submit_workers
+        self.headless = headless
+        self.parser = MessageParser()
+        self.in_flight: Set[str] = set()
+
+    # --- Stages ---
+
+    async def normalize(self, job: MailJob):
+        job.text = await asyncio.to_thread(_read_text, job.load)
+        if config.NORMALIZER_MODE == 'structured':
+            job.data = await asyncio.to_thread(normalize_to_form_data, job.text)
+        if job.data is None:
+            job.normalized = await asyncio.to_thread(normalize_email_text, job.text)
+
+    async def parse(self, job: MailJob):
+        if job.data is None:
+            job.data = self.parser.extract_data(job.normalized)
+
+    async def validate(self, job: MailJob):
+        validation = preflight_validate(job.data)
+        if not validation.ok:
+            raise NeedsReview(validation.summary())
+
+    async def submit(self, job: MailJob):
+        bot = GoogleFormBot(headless=self.headless, page_by_page=False)
+        result = await bot.run_automation(data=job.data)
+        if result.success:
+            return
+        if result.confirmation and result.confirmation.clicked:
+            # The form may have recorded it anyway; retrying could submit twice
+            raise NeedsReview(result.status or "submission not confirmed")
+        raise RuntimeError(result.status or "form not submitted")
+
+    # --- Plumbing ---
+
+    def _finish(self, job: MailJob, status: str, attempts: Optional[int] = None):
+        job.status = status
+        self.checkpoint.mark(job.key, status, attempts)
+        self.in_flight.discard(job.key)
+        logger.info(f"[{job.key}] {status} in {time.monotonic() - job.started:.1f}s")
+
+    async def _stage_worker(self, name: str, handler, inbox: asyncio.Queue,
+                            outbox: Optional[asyncio.Queue]):
+        while True:
+            job = await inbox.get()
+            try:
+                await handler(job)
+            except asyncio.CancelledError:
+                raise
+            except NeedsReview as e:
+                logger.warning(f"[{job.key}] routed to human review: {e}")
+                self._finish(job, "needs_review")
+            except Exception as e:
+                logger.error(f"[{job.key}] {name} failed: {e}")
+                attempts = self.checkpoint.attempts(job.key) + 1
+                if name in RETRYABLE_STAGES and attempts < config.WATCHER_MAX_ATTEMPTS:
+                    # Picked up again by the next poll
+                    self._finish(job, f"retrying:{name}", attempts)
+                else:
+                    self._finish(job, f"failed:{name}", attempts)
+            else:
+                if outbox is not None:
+                    # Blocks when the next stage is saturated (backpressure)
+                    await outbox.put(job)
+                else:
+                    self._finish(job, "submitted")
+            finally:
+                inbox.task_done()
+
+    async def poll_once(self, inbox: asyncio.Queue) -> int:
+        """Enqueue messages not yet checkpointed; returns how many were queued."""
+        queued = 0
+        for key, load in await asyncio.to_thread(self.source.poll):
+            if key in self.checkpoint or key in self.in_flight:
+                continue
+            self.in_flight.add(key)
+            await inbox.put(MailJob(key, load))
+            queued += 1
+        return queued
+
+    async def run(self, once: bool = False):
+        """Watch the source forever (or drain what is there now when `once`)."""
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in range(4)]
+        stages = [
+            ('normalize', self.normalize, self.normalize_workers),
+            ('parse', self.parse, 1),
+            ('validate', self.validate, 1),
+            ('submit', self.submit, self.submit_workers),
+        ]
+        workers = []
+        for i, (name, handler, count) in enumerate(stages):
+            outbox = queues[i + 1] if i + 1 < len(queues) else None
+            for _ in range(count):
+                workers.append(asyncio.create_task(
+                    self._stage_worker(name, handler, queues[i], outbox)))
+
+        logger.info(f"Watching {self.source.name()}")
+        try:
+            while True:
+                queued = await self.poll_once(queues[0])
+                if queued:
+                    logger.info(f"Queued {queued} new message(s)")
+                if once:
+                    for queue in queues:
+                        await queue.join()
+                    return
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+
+def build_source(args):
+    if args.imap_host:
+        return ImapSource(args.imap_host, args.imap_user, os.getenv('IMAP_PASSWORD', ''), args.imap_folder)
+    return MaildirSource(args.maildir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch a mailbox and submit quote requests")
+    parser.add_argument('--maildir', default=config.WATCHER_MAILDIR)
+    parser.add_argument('--imap-host', default=os.getenv('IMAP_HOST'))
+    parser.add_argument('--imap-user', default=os.getenv('IMAP_USER'))
+    parser.add_argument('--imap-folder', default=os.getenv('IMAP_FOLDER', 'INBOX'))
+    parser.add_argument('--checkpoint', default=config.WATCHER_CHECKPOINT)
+    parser.add_argument('--once', action='store_true', help="Process the current backlog and exit")
+    args = parser.parse_args()
+
+    pipeline = MailboxPipeline(build_source(args), Checkpoint(args.checkpoint))
+    try:
+        asyncio.run(pipeline.run(once=args.once))
+    except KeyboardInterrupt:
+        logger.info("Mailbox watcher stopped.")
+
+
+if __name__ == "__main__":
+    main()
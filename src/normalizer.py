@@ -1,84 +1,324 @@
+import hashlib
+import json
 import os
+import re
+import time
+from typing import Optional
+
 from dotenv import load_dotenv
 
+from .config import config
+from .parser_only import FormData, MessageParser
+from .preprocess import preprocess_email
+
 load_dotenv()
 
+MODEL = "gpt-4o-mini"
+
+# FormData fields the structured mode asks the model for, in form order.
+STRUCTURED_FIELDS = [
+    'name',
+    'email',
+    'alternate_email',
+    'organization_name',
+    'organization_sector',
+    'num_premium_users',
+    'license_length_years',
+    'institution_name',
+    'user_names_emails',
+    'admin_name',
+    'admin_email',
+    'billing_name',
+    'billing_email',
+    'billing_address',
+    'shipping_address',
+    'vat_tax_id',
+]
+
+INTEGER_FIELDS = {'num_premium_users', 'license_length_years'}
+EMAIL_FIELDS = {'email', 'alternate_email', 'admin_email', 'billing_email'}
+SECTOR_VALUES = ['Academic', 'Industry', '']
+
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+FORM_DATA_SCHEMA = {
+    'name': 'form_data',
+    'strict': True,
+    'schema': {
+        'type': 'object',
+        'properties': {
+            field: (
+                {'type': ['integer', 'null']} if field in INTEGER_FIELDS
+                else {'type': 'string', 'enum': SECTOR_VALUES} if field == 'organization_sector'
+                else {'type': 'string'}
+            )
+            for field in STRUCTURED_FIELDS
+        },
+        'required': STRUCTURED_FIELDS,
+        'additionalProperties': False,
+    },
+}
+
+
+def _get_client(api_key: str, max_retries: int = 2):
+    # Lazy import to avoid hard dependency when not used
+    from openai import OpenAI
+    print("OpenAI import successful")
+
+    # Callers with their own retry policy (batch) pass max_retries=0
+    client = OpenAI(api_key=api_key, max_retries=max_retries)
+    print("OpenAI client created")
+    return client
+
 
-def normalize_email_text(raw: str) -> str:
+def _prepare_input(raw: str) -> str:
+    """Run local pre-processing on the raw email and report the tokens it saved."""
+    if not config.PREPROCESS_EMAILS:
+        return raw
+
+    result = preprocess_email(raw)
+    print(f"Pre-processing: {result.original_tokens} -> {result.tokens} tokens "
+          f"(saved {result.tokens_saved})")
+    return result.text or raw
+
+
+NORMALIZE_SYSTEM_PROMPT = (
+    "You normalize messy emails into strict 'Key: Value' lines for a downstream parser. "
+    "Output ONLY the lines below, in this exact order, one per line, with these exact labels and punctuation. "
+    "If a value is unknown, leave it blank after the colon. Do not add any extra text.\n\n"
+    "Your name:\n"
+    "Your email:\n"
+    "Alternate email (optional; if the quote should be sent elsewhere):\n"
+    "Organization name:\n"
+    "Organization sector (Academic or Industry):\n"
+    "How many people need Premium access?:\n"
+    "Length of license (in years):\n"
+    "Name of institution, enterprise, lab, or team (optional; leave blank to use your organization name):\n"
+    "Names and emails of intended users (optional; leave blank to use your own email or if it is a license just for yourself):\n"
+    "Admin name (optional; leave blank to use your name):\n"
+    "Admin email (optional; leave blank to use your email):\n"
+    "Billing name (optional):\n"
+    "Billing email (optional):\n"
+    "Billing address (optional):\n"
+    "Shipping address (optional):\n"
+    "VAT or Tax ID number (optional):"
+)
+
+NORMALIZE_MAX_TOKENS = 700
+
+
+def _cache_path(text: str) -> str:
+    key = hashlib.sha256(f"{MODEL}\n{NORMALIZE_SYSTEM_PROMPT}\n{text}".encode('utf-8')).hexdigest()
+    return os.path.join(config.NORMALIZER_CACHE_DIR, f"{key}.txt")
+
+
+def read_cached_normalization(text: str) -> Optional[str]:
+    """Return a previously normalized result for this (pre-processed) text, if cached."""
+    if not config.NORMALIZER_CACHE_DIR:
+        return None
+    path = _cache_path(text)
+    try:
+        if time.time() - os.path.getmtime(path) > config.NORMALIZER_CACHE_TTL:
+            os.remove(path)
+            return None
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _prune_normalizer_cache() -> None:
+    """Drop expired entries, then the oldest ones beyond NORMALIZER_CACHE_MAX_ENTRIES."""
+    directory = config.NORMALIZER_CACHE_DIR
+    entries = []
+    for entry in os.scandir(directory):
+        if entry.is_file() and entry.name.endswith('.txt'):
+            entries.append((entry.stat().st_mtime, entry.path))
+    cutoff = time.time() - config.NORMALIZER_CACHE_TTL
+    entries.sort()
+    excess = len(entries) - config.NORMALIZER_CACHE_MAX_ENTRIES
+    for n, (mtime, path) in enumerate(entries):
+        if mtime < cutoff or n < excess:
+            os.remove(path)
+
+
+def write_cached_normalization(text: str, result: str) -> None:
+    """Persist a normalized result so batch runs can resume without re-calling the API."""
+    if not config.NORMALIZER_CACHE_DIR:
+        return
+    try:
+        os.makedirs(config.NORMALIZER_CACHE_DIR, exist_ok=True)
+        path = _cache_path(text)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(result)
+        os.replace(tmp_path, path)
+        _prune_normalizer_cache()
+    except OSError as e:
+        print(f"Could not write normalizer cache: {e}")
+
+
+def request_normalized_text(client, cleaned: str) -> Optional[str]:
+    """Call the model to normalize already pre-processed text. Raises on API errors."""
+    user = (
+        "Normalize the following email. Return ONLY the 16 lines above, exactly once each, in order, filled with values. If a field is missing, keep the label and a trailing colon with nothing after it.\n\n"
+        + cleaned
+    )
+
+    resp = client.chat.completions.create(
+        model=MODEL,
+        messages=[
+            {"role": "system", "content": NORMALIZE_SYSTEM_PROMPT},
+            {"role": "user", "content": user},
+        ],
+        temperature=0.1,
+        max_tokens=NORMALIZE_MAX_TOKENS,
+    )
+
+    content = resp.choices[0].message.content if resp.choices else None
+    # Ensure we only return the lines (some models can add surrounding whitespace)
+    return content.strip() if content else None
+
+
+def normalize_email_text(raw: str, use_cache: Optional[bool] = None) -> str:
     """Optionally normalize raw email text into strict `Key: Value` lines using OpenAI.
 
     - If `OPENAI_API_KEY` is not set or the OpenAI SDK is unavailable, returns input unchanged.
     - Output must use EXACT labels in the specified order, one per line, no extra commentary.
+    - The disk cache is only used when `use_cache` (default: NORMALIZER_CACHE_INTERACTIVE).
     """
+    if use_cache is None:
+        use_cache = config.NORMALIZER_CACHE_INTERACTIVE
     api_key = os.getenv('OPENAI_API_KEY')
-    
+
     print(f"\n=== NORMALIZER DEBUG ===")
     print(f"API Key found: {bool(api_key)}")
     print(f"API Key starts with: {api_key[:10] + '...' if api_key else 'None'}")
     print(f"Raw text length: {len(raw) if raw else 0}")
-    
+
     if not api_key or not raw or not raw.strip():
         print("Returning original text (no API key or empty input)")
         return raw
 
     try:
-        # Lazy import to avoid hard dependency when not used
-        from openai import OpenAI
-        print("OpenAI import successful")
-        
-        client = OpenAI(api_key=api_key)
-        print("OpenAI client created")
+        cleaned = _prepare_input(raw)
 
-        system = (
-            "You normalize messy emails into strict 'Key: Value' lines for a downstream parser. "
-            "Output ONLY the lines below, in this exact order, one per line, with these exact labels and punctuation. "
-            "If a value is unknown, leave it blank after the colon. Do not add any extra text.\n\n"
-            "Your name:\n"
-            "Your email:\n"
-            "Alternate email (optional; if the quote should be sent elsewhere):\n"
-            "Organization name:\n"
-            "Organization sector (Academic or Industry):\n"
-            "How many people need Premium access?:\n"
-            "Length of license (in years):\n"
-            "Name of institution, enterprise, lab, or team (optional; leave blank to use your organization name):\n"
-            "Names and emails of intended users (optional; leave blank to use your own email or if it is a license just for yourself):\n"
-            "Admin name (optional; leave blank to use your name):\n"
-            "Admin email (optional; leave blank to use your email):\n"
-            "Billing name (optional):\n"
-            "Billing email (optional):\n"
-            "Billing address (optional):\n"
-            "Shipping address (optional):\n"
-            "VAT or Tax ID number (optional):"
-        )
+        cached = read_cached_normalization(cleaned) if use_cache else None
+        if cached is not None:
+            print("Returning cached normalized text")
+            return cached
 
-        user = (
-            "Normalize the following email. Return ONLY the 16 lines above, exactly once each, in order, filled with values. If a field is missing, keep the label and a trailing colon with nothing after it.\n\n"
-            + raw
-        )
+        client = _get_client(api_key)
 
         print("Calling OpenAI API...")
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system},
-                {"role": "user", "content": user},
-            ],
-            temperature=0.1,
-            max_tokens=700,
-        )
+        result = request_normalized_text(client, cleaned)
+        print(f"OpenAI response received: {bool(result)}")
 
-        content = resp.choices[0].message.content if resp.choices else None
-        print(f"OpenAI response received: {bool(content)}")
-        
-        if not content:
+        if not result:
             print("No content in OpenAI response, returning original")
             return raw
 
-        # Ensure we only return the lines (some models can add surrounding whitespace)
-        result = content.strip()
+        if use_cache:
+            write_cached_normalization(cleaned, result)
         print(f"Returning normalized text (length: {len(result)})")
         return result
     except Exception as e:
         print(f"OpenAI error: {str(e)}")
         # Fail open to original raw text on any error
         return raw
+
+
+def validate_structured_fields(fields) -> dict:
+    """Strictly validate a structured normalizer payload against the FormData schema.
+
+    Raises ValueError describing the first problem found.
+    """
+    if not isinstance(fields, dict):
+        raise ValueError("structured output is not a JSON object")
+
+    missing = [f for f in STRUCTURED_FIELDS if f not in fields]
+    if missing:
+        raise ValueError(f"missing fields: {', '.join(missing)}")
+    extra = [f for f in fields if f not in STRUCTURED_FIELDS]
+    if extra:
+        raise ValueError(f"unexpected fields: {', '.join(extra)}")
+
+    for field in STRUCTURED_FIELDS:
+        value = fields[field]
+        if field in INTEGER_FIELDS:
+            if value is None:
+                continue
+            if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+                raise ValueError(f"{field} must be a positive integer or null, got {value!r}")
+        elif not isinstance(value, str):
+            raise ValueError(f"{field} must be a string, got {type(value).__name__}")
+        elif field == 'organization_sector' and value not in SECTOR_VALUES:
+            raise ValueError(f"organization_sector must be one of {SECTOR_VALUES}, got {value!r}")
+        elif field in EMAIL_FIELDS and value.strip() and not EMAIL_PATTERN.match(value.strip()):
+            raise ValueError(f"{field} is not a valid email address: {value!r}")
+
+    return fields
+
+
+def normalize_to_form_data(raw: str) -> Optional[FormData]:
+    """Normalize raw email text straight into FormData using structured (JSON schema) output.
+
+    Skips the `Key: Value` text round trip. Returns None when the structured path is
+    unavailable or its output fails validation, so callers can fall back to the text path.
+    """
+    api_key = os.getenv('OPENAI_API_KEY')
+    if not api_key or not raw or not raw.strip():
+        return None
+
+    try:
+        client = _get_client(api_key)
+        cleaned = _prepare_input(raw)
+
+        system = (
+            "You extract quote request details from messy emails. "
+            "Return a JSON object with every field in the schema. "
+            "Use an empty string for unknown text fields and null for unknown numbers. "
+            "organization_sector must be 'Academic', 'Industry' or empty. "
+            "Only copy values stated in the email; never invent them."
+        )
+
+        print("Calling OpenAI API (structured)...")
+        resp = client.chat.completions.create(
+            model=MODEL,
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": cleaned},
+            ],
+            temperature=0,
+            max_tokens=500,
+            response_format={"type": "json_schema", "json_schema": FORM_DATA_SCHEMA},
+        )
+
+        content = resp.choices[0].message.content if resp.choices else None
+        if not content:
+            print("No content in structured OpenAI response")
+            return None
+
+        fields = validate_structured_fields(json.loads(content))
+        print("Structured output validated")
+        return MessageParser().build_from_fields(fields)
+    except Exception as e:
+        print(f"Structured normalization failed: {str(e)}")
+        return None
+
+
+def extract_form_data(raw: str, parser: Optional[MessageParser] = None) -> FormData:
+    """Turn a raw email into FormData using the configured normalizer mode.
+
+    In `structured` mode the model output is used directly when it validates;
+    otherwise (or in `text` mode) the text normalizer + MessageParser path runs.
+    """
+    parser = parser or MessageParser()
+
+    if config.NORMALIZER_MODE == 'structured':
+        data = normalize_to_form_data(raw)
+        if data is not None:
+            return data
+        print("Falling back to text normalization")
+
+    return parser.extract_data(normalize_email_text(raw))
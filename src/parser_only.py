@@ -4,6 +4,7 @@ Enhanced message parser for structured form data
 
 import re
 import logging
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
@@ -43,7 +44,7 @@ class FormData:
 class MessageParser:
     """Enhanced parser with better field matching"""
     
-    def __init__(self):
+    def __init__(self, field_mappings: Optional[dict] = None):
         # Define exact field mappings - now includes both formats
         self.field_mappings = {
             # Original format mappings
@@ -73,6 +74,10 @@ class MessageParser:
             'number of individuals the license is intended for': 'num_premium_users',
             'license length': 'license_length_years'
         }
+        
+        # Per-form label mappings (see form_registry) extend the defaults
+        if field_mappings:
+            self.field_mappings.update({label.lower(): field for label, field in field_mappings.items()})
     
     def extract_data(self, message: str) -> FormData:
         """Extract structured data from the input message"""
@@ -129,44 +134,66 @@ class MessageParser:
                     break
             
             if field_name:
-                # Special handling for specific fields
-                if field_name == 'organization_sector':
-                    value_lower = value.lower()
-                    # Check for academic indicators
-                    if any(word in value_lower for word in ['acad', 'university', 'college', 'edu']):
-                        setattr(data, field_name, 'Academic')
-                    elif 'industry' in value_lower or 'commercial' in value_lower:
-                        setattr(data, field_name, 'Industry')
-                    else:
-                        # Default based on presence of keywords
-                        setattr(data, field_name, 'Academic' if 'academic' in value_lower else 'Industry')
-                elif field_name == 'num_premium_users':
-                    # Extract number
-                    numbers = re.findall(r'\d+', value)
-                    if numbers:
-                        num_users = int(numbers[0])
-                        # Coerce 3-4 license requests to 5
-                        if 3 <= num_users <= 4:
-                            num_users = 5
-                        setattr(data, field_name, num_users)
-                elif field_name == 'license_length_years':
-                    # Extract number
-                    numbers = re.findall(r'\d+', value)
-                    if numbers:
-                        setattr(data, field_name, int(numbers[0]))
-                    else:
-                        # Default to 1 if not specified
-                        setattr(data, field_name, 1)
-                else:
-                    setattr(data, field_name, value)
-                
-                logger.info(f"Set {field_name} = {getattr(data, field_name)}")
+                self._set_field(data, field_name, value)
         
         # Post-processing
         self._post_process_data(data)
         
         return data
     
+    def build_from_fields(self, fields: dict) -> FormData:
+        """Build FormData from already-structured values (e.g. normalizer JSON output).
+
+        Values go through the same coercion and post-processing as `extract_data`,
+        so both paths produce identical FormData for the same input.
+        """
+        data = FormData()
+        for field_name, value in fields.items():
+            if not hasattr(data, field_name):
+                continue
+            if value is None or (isinstance(value, str) and not value.strip()):
+                continue
+            self._set_field(data, field_name, str(value).strip())
+        
+        self._post_process_data(data)
+        
+        return data
+    
+    def _set_field(self, data: FormData, field_name: str, value: str):
+        """Coerce a raw string value and assign it to the given FormData field"""
+        # Special handling for specific fields
+        if field_name == 'organization_sector':
+            value_lower = value.lower()
+            # Check for academic indicators
+            if any(word in value_lower for word in ['acad', 'university', 'college', 'edu']):
+                setattr(data, field_name, 'Academic')
+            elif 'industry' in value_lower or 'commercial' in value_lower:
+                setattr(data, field_name, 'Industry')
+            else:
+                # Default based on presence of keywords
+                setattr(data, field_name, 'Academic' if 'academic' in value_lower else 'Industry')
+        elif field_name == 'num_premium_users':
+            # Extract number
+            numbers = re.findall(r'\d+', value)
+            if numbers:
+                num_users = int(numbers[0])
+                # Coerce 3-4 license requests to 5
+                if 3 <= num_users <= 4:
+                    num_users = 5
+                setattr(data, field_name, num_users)
+        elif field_name == 'license_length_years':
+            # Extract number
+            numbers = re.findall(r'\d+', value)
+            if numbers:
+                setattr(data, field_name, int(numbers[0]))
+            else:
+                # Default to 1 if not specified
+                setattr(data, field_name, 1)
+        else:
+            setattr(data, field_name, value)
+        
+        logger.info(f"Set {field_name} = {getattr(data, field_name)}")
+    
     def _post_process_data(self, data: FormData):
         """Post-process extracted data"""
         # Set institution name default
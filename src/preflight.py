@@ -0,0 +1,78 @@
+"""
+Pre-flight validation of extracted form data.
+
+Synchronous and browser-free: evaluates every page the form will show for
+the data, resolves `default_to` values, and decides whether the request can
+be submitted or needs human review, before any browser work starts.
+"""
+
+from typing import Dict, List, Optional
+
+from .form_schema import FORM_STRUCTURE, compute_page_sequence, missing_required_fields, resolve_field_value
+
+
+class PreflightResult:
+    """Outcome of validating FormData against every active page."""
+    def __init__(self, page_sequence: List[str], structure: Optional[dict] = None, form_id: Optional[str] = None):
+        self.page_sequence = page_sequence
+        self.structure = structure or FORM_STRUCTURE
+        self.form_id = form_id
+        self.missing: Dict[str, List[str]] = {}
+        self.resolved: Dict[str, object] = {}
+
+    @property
+    def ok(self) -> bool:
+        return not self.missing
+
+    @property
+    def needs_review(self) -> bool:
+        return not self.ok
+
+    def missing_labels(self) -> List[str]:
+        return [label for labels in self.missing.values() for label in labels]
+
+    def summary(self) -> str:
+        if self.ok:
+            return "All required fields have data"
+        return "; ".join(
+            f"{self.structure[page_key]['name']}: {', '.join(labels)}"
+            for page_key, labels in self.missing.items()
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            'form_id': self.form_id,
+            'ok': self.ok,
+            'needs_review': self.needs_review,
+            'page_sequence': self.page_sequence,
+            'missing': self.missing,
+            'resolved': self.resolved,
+            'summary': self.summary(),
+        }
+
+
+def preflight_validate(data, form=None) -> PreflightResult:
+    """Validate FormData against every page in its computed sequence.
+
+    `form` is a registered FormDefinition; the default quote form is used without one.
+    """
+    if form is None:
+        result = PreflightResult(compute_page_sequence(data))
+    else:
+        result = PreflightResult(form.page_plan(data), form.structure, form.form_id)
+
+    for page_key in result.page_sequence:
+        page_config = result.structure.get(page_key)
+        if not page_config:
+            continue
+
+        missing = missing_required_fields(page_key, data, result.structure)
+        if missing:
+            result.missing[page_key] = missing
+
+        for field_config in page_config['fields']:
+            value = resolve_field_value(page_key, field_config, data)
+            if value:
+                result.resolved[field_config['field']] = value
+
+    return result
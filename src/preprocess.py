@@ -0,0 +1,261 @@
+"""
+Local email pre-processing to shrink what we send to the normalizer LLM.
+
+Drops quoted reply history, signature noise and legal disclaimers, converts
+HTML remnants to text, collapses whitespace and finally enforces a token
+budget that keeps the lines most likely to hold form fields.
+"""
+
+import html
+import re
+from html.parser import HTMLParser
+from typing import List, Optional
+
+from .config import config
+
+EMAIL_PATTERN = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+HTML_PATTERN = re.compile(r'<\s*(html|body|div|p|br|table|span|td)\b', re.IGNORECASE)
+
+# Lines that start the quoted history of a reply
+REPLY_HEADER_PATTERNS = [
+    re.compile(r'^\s*On\s.{0,200}\bwrote:\s*$', re.IGNORECASE),
+    re.compile(r'^\s*-{2,}\s*Original Message\s*-{2,}\s*$', re.IGNORECASE),
+    re.compile(r'^\s*_{10,}\s*$'),
+]
+FORWARD_MARKER = re.compile(r'^\s*-{2,}\s*Forwarded message\s*-{2,}\s*$', re.IGNORECASE)
+OUTLOOK_HEADER = re.compile(r'^\s*\*?(From|Sent|Date|To|Cc|Subject):', re.IGNORECASE)
+
+SIGNATURE_DELIMITER = re.compile(r'^--\s?$')
+SIGN_OFF = re.compile(
+    r'^\s*(best|kind|warm)?\s*(regards|wishes|thanks|thank you|cheers|sincerely|best)[,!.]?\s*$',
+    re.IGNORECASE,
+)
+# Lines kept from a signature block (name, title, organization)
+SIGNATURE_KEEP_LINES = 3
+# A sign-off further than this from the end is treated as body text
+MAX_SIGNATURE_LINES = 10
+# "Key: value" lines mean the block after a sign-off is still form data
+FIELD_LINE = re.compile(r'^\s*[A-Za-z][\w /&().-]{0,40}:\s*\S')
+# Signature lines scoring at least this (see _line_score) are always kept
+FIELD_LINE_SCORE = 3
+
+NOISE_PATTERNS = [
+    re.compile(r'^\s*sent from my \w+', re.IGNORECASE),
+    re.compile(r'^\s*get outlook for \w+', re.IGNORECASE),
+    re.compile(r'(confidential|intended (solely )?for the (use of the )?(addressee|recipient)|'
+               r'if you have received this (e-?mail|message) in error|unsubscribe)', re.IGNORECASE),
+]
+
+# Words that suggest a line carries a form field
+FIELD_KEYWORDS = [
+    'name', 'email', 'organization', 'organisation', 'institution', 'university', 'college',
+    'lab', 'academic', 'industry', 'sector', 'premium', 'license', 'licence', 'seat', 'user',
+    'year', 'admin', 'billing', 'invoice', 'shipping', 'address', 'vat', 'tax', 'quote',
+]
+
+
+class PreprocessResult:
+    """Cleaned email text plus token accounting for the pre-processing stage."""
+    def __init__(self, text: str, original_tokens: int, tokens: int):
+        self.text = text
+        self.original_tokens = original_tokens
+        self.tokens = tokens
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(self.original_tokens - self.tokens, 0)
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate model tokens for text (tiktoken when installed, ~4 chars/token otherwise)."""
+    if not text:
+        return 0
+    try:
+        import tiktoken
+        return len(tiktoken.get_encoding('o200k_base').encode(text))
+    except Exception:
+        return (len(text) + 3) // 4
+
+
+class _TextExtractor(HTMLParser):
+    BLOCK_TAGS = {'p', 'div', 'br', 'tr', 'li', 'table', 'h1', 'h2', 'h3', 'h4', 'blockquote'}
+    SKIP_TAGS = {'script', 'style', 'head', 'title'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skip_depth = 0
+        self._quote_depth = 0
+        # One entry per open <div>: whether it opened a gmail_quote
+        self._div_stack: List[bool] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        if tag == 'div':
+            opens_quote = 'gmail_quote' in (dict(attrs).get('class') or '')
+            self._div_stack.append(opens_quote)
+            if opens_quote:
+                self._quote_depth += 1
+        elif tag == 'blockquote':
+            self._quote_depth += 1
+        if tag in self.BLOCK_TAGS:
+            self.parts.append('\n')
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        if tag == 'div' and self._div_stack:
+            if self._div_stack.pop() and self._quote_depth:
+                self._quote_depth -= 1
+        elif tag == 'blockquote' and self._quote_depth:
+            self._quote_depth -= 1
+        if tag in self.BLOCK_TAGS:
+            self.parts.append('\n')
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self._quote_depth:
+            # Keep quoted HTML recognisable so strip_quoted_history can drop it
+            data = '\n'.join('> ' + line for line in data.split('\n'))
+        self.parts.append(data)
+
+
+def html_to_text(raw: str) -> str:
+    """Convert an HTML fragment or document to plain text."""
+    extractor = _TextExtractor()
+    try:
+        extractor.feed(raw)
+        extractor.close()
+    except Exception:
+        # Malformed markup: strip tags crudely rather than failing
+        return html.unescape(re.sub(r'<[^>]+>', ' ', raw))
+    return ''.join(extractor.parts)
+
+
+def _has_field_signal(lines: List[str]) -> bool:
+    return any(EMAIL_PATTERN.search(line) for line in lines)
+
+
+def strip_quoted_history(lines: List[str]) -> List[str]:
+    """Drop quoted reply history, keeping forwarded content.
+
+    If the new part of the message carries no field signal at all (e.g. a bare
+    "see below" reply), the quoted history is kept with its markers removed.
+    """
+    forwarded = False
+    cut = len(lines)
+    for i, line in enumerate(lines):
+        if FORWARD_MARKER.match(line):
+            forwarded = True
+            continue
+        if forwarded:
+            continue
+        joined = line + ' ' + lines[i + 1] if i + 1 < len(lines) else line
+        if any(p.match(line) or p.match(joined) for p in REPLY_HEADER_PATTERNS):
+            cut = i
+            break
+        if OUTLOOK_HEADER.match(line) and line.strip().lower().lstrip('*').startswith('from:'):
+            following = lines[i + 1:i + 5]
+            if sum(1 for nxt in following if OUTLOOK_HEADER.match(nxt)) >= 2:
+                cut = i
+                break
+
+    head = [line for line in lines[:cut] if not line.lstrip().startswith('>')]
+    if _has_field_signal(head):
+        return head
+
+    # Nothing useful above the quote: unwrap the history instead of dropping it
+    return [re.sub(r'^\s*(>\s?)+', '', line) for line in lines]
+
+
+def strip_signature(lines: List[str]) -> List[str]:
+    """Trim signature blocks and boilerplate, keeping the first few signature lines.
+
+    A sign-off only starts a signature when it sits near the end of the message
+    and the lines after it carry no "Key: value" fields, so a "Thanks!" opener
+    never swallows the body below it. Signature lines that look like fields
+    (emails, addresses, license details) are kept wherever they appear.
+    """
+    lines = [line for line in lines if not any(p.search(line) for p in NOISE_PATTERNS)]
+
+    start = None
+    for i, line in enumerate(lines):
+        if not any(prev.strip() for prev in lines[:i]):
+            continue
+        if SIGNATURE_DELIMITER.match(line) or SIGN_OFF.match(line):
+            rest = [after for after in lines[i + 1:] if after.strip()]
+            if len(rest) <= MAX_SIGNATURE_LINES and not any(FIELD_LINE.match(after) for after in rest):
+                start = i
+                break
+    if start is None:
+        return lines
+
+    kept = lines[:start]
+    signature = [line for line in lines[start + 1:] if line.strip()]
+    for n, line in enumerate(signature):
+        # Name/title/organization usually lead the signature; keep field-like lines anywhere
+        if n < SIGNATURE_KEEP_LINES or _line_score(line) >= FIELD_LINE_SCORE:
+            kept.append(line)
+    return kept
+
+
+def collapse_whitespace(lines: List[str]) -> List[str]:
+    """Normalize runs of spaces and drop blank lines."""
+    collapsed = []
+    for line in lines:
+        line = re.sub(r'[ \t\xa0]+', ' ', line).strip()
+        if line:
+            collapsed.append(line)
+    return collapsed
+
+
+def _line_score(line: str) -> int:
+    lower = line.lower()
+    score = 0
+    if EMAIL_PATTERN.search(line):
+        score += 3
+    if ':' in line[:60]:
+        score += 2
+    if re.search(r'\d', line):
+        score += 1
+    score += sum(1 for word in FIELD_KEYWORDS if word in lower)
+    return score
+
+
+def enforce_token_budget(lines: List[str], budget: int) -> List[str]:
+    """Keep the highest-scoring lines (in original order) that fit within the token budget."""
+    if estimate_tokens('\n'.join(lines)) <= budget:
+        return lines
+
+    ranked = sorted(range(len(lines)), key=lambda i: (-_line_score(lines[i]), i))
+    chosen = set()
+    used = 0
+    for i in ranked:
+        cost = estimate_tokens(lines[i]) + 1
+        if used + cost > budget:
+            continue
+        chosen.add(i)
+        used += cost
+    return [line for i, line in enumerate(lines) if i in chosen]
+
+
+def preprocess_email(raw: str, token_budget: Optional[int] = None) -> PreprocessResult:
+    """Shrink a raw pasted email before it is sent to the normalizer."""
+    if not raw or not raw.strip():
+        return PreprocessResult(raw, 0, 0)
+
+    budget = token_budget if token_budget is not None else config.PREPROCESS_TOKEN_BUDGET
+    original_tokens = estimate_tokens(raw)
+
+    text = html_to_text(raw) if HTML_PATTERN.search(raw) else raw
+    lines = text.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    lines = strip_quoted_history(lines)
+    lines = strip_signature(lines)
+    lines = collapse_whitespace(lines)
+    if budget:
+        lines = enforce_token_budget(lines, budget)
+
+    cleaned = '\n'.join(lines)
+    return PreprocessResult(cleaned, original_tokens, estimate_tokens(cleaned))
@@ -0,0 +1,95 @@
+"""
+Per-job progress channels for live submission status.
+
+Bots publish events from the automation event loop; HTTP handlers on other
+threads subscribe and stream them (e.g. over Server-Sent Events). Each channel
+keeps its history so a subscriber that connects late still sees every event.
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Event types that end a job's stream
+TERMINAL_EVENTS = {'done'}
+
+# How long an idle channel is kept for late subscribers (seconds)
+CHANNEL_TTL = 600
+
+
+class JobChannel:
+    """Thread-safe event history plus live subscriber queues for one job."""
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.history: List[dict] = []
+        self.subscribers: List[queue.Queue] = []
+        self.closed_at: Optional[float] = None
+        self.updated_at = time.time()
+        self._lock = threading.Lock()
+
+    def publish(self, event: dict):
+        with self._lock:
+            self.history.append(event)
+            self.updated_at = time.time()
+            if event.get('type') in TERMINAL_EVENTS:
+                self.closed_at = time.time()
+            for subscriber in self.subscribers:
+                subscriber.put(event)
+
+    def subscribe(self, keepalive: float = 15.0) -> Iterator[Optional[dict]]:
+        """Yield past then live events until the job ends; yields None as a keepalive tick."""
+        inbox: queue.Queue = queue.Queue()
+        with self._lock:
+            backlog = list(self.history)
+            finished = self.closed_at is not None
+            if not finished:
+                self.subscribers.append(inbox)
+        try:
+            for event in backlog:
+                yield event
+            if finished:
+                return
+            while True:
+                try:
+                    event = inbox.get(timeout=keepalive)
+                except queue.Empty:
+                    yield None
+                    continue
+                yield event
+                if event.get('type') in TERMINAL_EVENTS:
+                    return
+        finally:
+            with self._lock:
+                if inbox in self.subscribers:
+                    self.subscribers.remove(inbox)
+
+
+class ProgressHub:
+    """Registry of job channels keyed by job id."""
+    def __init__(self):
+        self.channels: Dict[str, JobChannel] = {}
+        self._lock = threading.Lock()
+
+    def channel(self, job_id: str) -> JobChannel:
+        with self._lock:
+            self._expire()
+            if job_id not in self.channels:
+                self.channels[job_id] = JobChannel(job_id)
+            return self.channels[job_id]
+
+    def publish(self, job_id: str, event: dict):
+        event = dict(event, job_id=job_id)
+        event.setdefault('ts', time.time())
+        self.channel(job_id).publish(event)
+
+    def _expire(self):
+        cutoff = time.time() - CHANNEL_TTL
+        for job_id in [j for j, c in self.channels.items() if c.updated_at < cutoff and not c.subscribers]:
+            del self.channels[job_id]
+
+
+progress_hub = ProgressHub()
@@ -0,0 +1,71 @@
+"""
+Persistent cache of the selector that last located each form field.
+
+Keyed by form id, form version and field name. The bot tries the cached
+selector first (one round trip) and only falls back to resolving all
+candidates when the form has changed and it no longer matches.
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+
+class SelectorCache:
+    """Winning selector per (form, version, field), in an atomically rewritten JSON file."""
+    def __init__(self, path: str):
+        self.path = path
+        self.selectors: Dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if not path:
+            return
+        try:
+            with open(path, encoding='utf-8') as f:
+                self.selectors = json.load(f)
+        except (OSError, ValueError):
+            self.selectors = {}
+
+    @staticmethod
+    def key(form_id: str, version: str, field_name: str) -> str:
+        return f"{form_id}@{version}:{field_name}"
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self.selectors.get(key)
+
+    def record(self, key: str, selector: str):
+        with self._lock:
+            if self.selectors.get(key) == selector:
+                return
+            self.selectors[key] = selector
+            self._save()
+
+    def forget(self, key: str):
+        with self._lock:
+            if self.selectors.pop(key, None) is not None:
+                self._save()
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.selectors, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save selector cache: {e}")
+
+
+selector_cache = SelectorCache(config.SELECTOR_CACHE_PATH)
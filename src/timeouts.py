@@ -0,0 +1,134 @@
+"""
+Adaptive timeouts for browser operations.
+
+Each operation type (navigate, heading, nav_click, field, settle, ...) keeps a
+rolling window of observed latencies. Once it has enough samples its timeout
+becomes a multiple of the window's p99, clamped between a floor and the static
+default, so a stuck step fails in seconds instead of minutes. A per-job
+deadline caps every timeout by the time the job has left.
+
+Operations that time out are recorded too, as censored samples: the real
+latency was at least the timeout, so the op backs off (doubling, up to the
+static default) instead of staying stuck below a slower-than-usual target.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict
+
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+# Static defaults (ms): used until enough samples exist, and as the upper bound after
+DEFAULT_TIMEOUTS = {
+    'navigate': config.NAVIGATION_TIMEOUT,
+    'heading': 20000,
+    'nav_click': 10000,
+    'field': 5000,
+    'settle': 5000,
+    'submit_response': config.DEFAULT_TIMEOUT,
+    'confirm_load': config.DEFAULT_TIMEOUT,
+}
+
+
+class DeadlineExceeded(TimeoutError):
+    """The job used up its overall time budget."""
+
+
+def percentile(samples, q: float) -> float:
+    """Nearest-rank percentile of `samples` (0 < q <= 100)."""
+    ordered = sorted(samples)
+    rank = max(math.ceil(q / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class TimeoutManager:
+    """Rolling latency windows and derived timeouts per operation type (thread-safe)."""
+    def __init__(self, defaults: Dict[str, int], multiplier: float, floor_ms: int,
+                 min_samples: int, window: int):
+        self.defaults = defaults
+        self.multiplier = multiplier
+        self.floor_ms = floor_ms
+        self.min_samples = min_samples
+        self.window = window
+        self.samples: Dict[str, Deque[float]] = {}
+        # Minimum timeout per op after a timeout, until the op next succeeds
+        self.backoff: Dict[str, int] = {}
+        self.timeouts_total: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, op: str, elapsed_ms: float):
+        """Record a completed operation's latency."""
+        with self._lock:
+            self.samples.setdefault(op, deque(maxlen=self.window)).append(elapsed_ms)
+            self.backoff.pop(op, None)
+
+    def record_timeout(self, op: str, timeout_ms: float):
+        """Record an operation that hit its timeout: a censored sample of twice the timeout."""
+        censored = int(min(timeout_ms * 2, self.defaults.get(op, config.DEFAULT_TIMEOUT)))
+        with self._lock:
+            self.samples.setdefault(op, deque(maxlen=self.window)).append(censored)
+            self.backoff[op] = max(self.backoff.get(op, 0), censored)
+            self.timeouts_total[op] = self.timeouts_total.get(op, 0) + 1
+        logger.warning(f"{op} timed out after {timeout_ms:.0f} ms; backing off to {censored} ms")
+
+    def timeout(self, op: str) -> int:
+        """Timeout for `op` in ms: multiplier x p99 once warmed up, else the static default."""
+        default = self.defaults.get(op, config.DEFAULT_TIMEOUT)
+        with self._lock:
+            samples = list(self.samples.get(op, ()))
+            backoff = self.backoff.get(op, 0)
+        if len(samples) < self.min_samples:
+            return default
+        adaptive = int(percentile(samples, 99) * self.multiplier)
+        return max(min(max(adaptive, self.floor_ms), default), backoff)
+
+    def stats(self) -> dict:
+        with self._lock:
+            ops = {op: list(samples) for op, samples in self.samples.items()}
+        return {
+            op: {
+                'samples': len(samples),
+                'p50_ms': round(percentile(samples, 50)) if samples else None,
+                'p99_ms': round(percentile(samples, 99)) if samples else None,
+                'timeout_ms': self.timeout(op),
+                'timeouts': self.timeouts_total.get(op, 0),
+            }
+            for op, samples in sorted(ops.items())
+        }
+
+
+class JobDeadline:
+    """An overall time budget for one job."""
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining_ms(self) -> int:
+        return int((self.expires_at - time.monotonic()) * 1000)
+
+    def extend(self, seconds: float):
+        """Give back time the job spent waiting on something else (e.g. a reviewer)."""
+        self.expires_at += seconds
+
+    def check(self, step: str = ""):
+        if self.remaining_ms() <= 0:
+            raise DeadlineExceeded(f"Job exceeded its {self.seconds:.0f}s deadline{f' at {step}' if step else ''}")
+
+    def cap(self, timeout_ms: int, step: str = "") -> int:
+        """`timeout_ms`, shortened to what is left of the budget."""
+        self.check(step)
+        return min(timeout_ms, self.remaining_ms())
+
+
+timeout_manager = TimeoutManager(
+    DEFAULT_TIMEOUTS,
+    multiplier=config.TIMEOUT_P99_MULTIPLIER,
+    floor_ms=config.TIMEOUT_FLOOR_MS,
+    min_samples=config.TIMEOUT_MIN_SAMPLES,
+    window=config.TIMEOUT_WINDOW,
+)
@@ -8,7 +8,8 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from src.form_automation import GoogleFormBot, MessageParser
+from src.form_automation import GoogleFormBot
+from src.parser_only import MessageParser
 
 test_message = """
 Your name: John Doe
@@ -38,7 +39,7 @@ async def test():
     response = input("Do you want to run the full form automation? (y/n): ")
     if response.lower() == 'y':
         print("\nStarting form automation...")
-        bot = GoogleFormBot(headless=False, page_by_page=True)
+        bot = GoogleFormBot(headless=False, page_by_page=True, resume_from_cli=True)
         await bot.run_automation(test_message)
 
 if __name__ == "__main__":
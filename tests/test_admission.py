@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from src.admission import AdmissionController
+
+
+def test_rejects_once_slots_and_queue_are_full():
+    controller = AdmissionController(max_in_flight=1, max_queued=1)
+    assert controller.try_admit() is not None
+    assert controller.try_admit() is not None
+    assert controller.try_admit() is None
+    assert controller.metrics()['rejected_total'] == 1
+
+
+def test_run_moves_job_from_queue_to_in_flight():
+    controller = AdmissionController(max_in_flight=1, max_queued=0)
+    seen = {}
+
+    async def job():
+        seen.update(controller.metrics())
+        return 'done'
+
+    ticket = controller.try_admit()
+    assert asyncio.run(controller.run(ticket, job())) == 'done'
+    assert (seen['in_flight'], seen['queued']) == (1, 0)
+    metrics = controller.metrics()
+    assert (metrics['in_flight'], metrics['queued'], metrics['completed_total']) == (0, 0, 1)
+    assert controller.try_admit() is not None
+
+
+def test_failed_job_frees_its_slot():
+    controller = AdmissionController(max_in_flight=1, max_queued=0)
+
+    async def job():
+        raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(controller.run(controller.try_admit(), job()))
+    assert controller.metrics()['failed_total'] == 1
+    assert controller.try_admit() is not None
+
+
+def test_release_returns_an_unused_ticket():
+    controller = AdmissionController(max_in_flight=1, max_queued=0)
+    ticket = controller.try_admit()
+    controller.release(ticket)
+    controller.release(ticket)
+    assert controller.metrics()['queued'] == 0
+
+
+def test_retry_after_uses_observed_duration():
+    controller = AdmissionController(max_in_flight=2, max_queued=4, default_retry_after=30)
+    assert controller.retry_after() == 30
+    controller.avg_duration = 10
+    controller.queued = 3
+    assert controller.retry_after() == 20
+
+
+def test_paused_job_lends_its_slot():
+    controller = AdmissionController(max_in_flight=1, max_queued=1)
+    order = []
+
+    async def reviewed(resume: asyncio.Event):
+        order.append('reviewed starts')
+        async with controller.paused(reviewed_ticket):
+            order.append('reviewed paused')
+            await resume.wait()
+        order.append('reviewed resumes')
+
+    async def other():
+        order.append('other runs')
+        assert controller.metrics()['paused'] == 1
+
+    async def scenario():
+        resume = asyncio.Event()
+        first = asyncio.ensure_future(controller.run(reviewed_ticket, reviewed(resume)))
+        await asyncio.sleep(0)
+        await controller.run(controller.try_admit(), other())
+        resume.set()
+        await first
+
+    reviewed_ticket = controller.try_admit()
+    asyncio.run(scenario())
+    assert order == ['reviewed starts', 'reviewed paused', 'other runs', 'reviewed resumes']
+    metrics = controller.metrics()
+    assert (metrics['in_flight'], metrics['paused'], metrics['completed_total']) == (0, 0, 2)
+
+
+def test_pause_time_is_not_job_time():
+    controller = AdmissionController(max_in_flight=1, max_queued=0)
+    ticket = controller.try_admit()
+
+    async def job():
+        async with controller.paused(ticket):
+            await asyncio.sleep(0.05)
+
+    asyncio.run(controller.run(ticket, job()))
+    assert controller.avg_duration < 0.04
@@ -0,0 +1,144 @@
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('playwright')
+
+import app as app_module  # noqa: E402
+from src.admission import AdmissionController  # noqa: E402
+from src.config import config  # noqa: E402
+from src.form_registry import FormDefinition  # noqa: E402
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, 'WARMUP_ON_START', False)
+    monkeypatch.setattr(app_module.artifact_store, 'root', str(tmp_path / 'artifacts'))
+    return app_module.app.test_client()
+
+
+@pytest.mark.parametrize('job_id', ['...', 'a.b', 'x' * 65])
+def test_artifact_routes_reject_invalid_job_ids(client, job_id):
+    assert client.get(f'/jobs/{job_id}/artifacts').status_code == 400
+    assert client.get(f'/jobs/{job_id}/artifacts/trace.zip').status_code == 400
+
+
+def test_artifact_download(client):
+    app_module.artifact_store.add('job-1', 'page_1.jpg', b'jpeg')
+    assert client.get('/jobs/job-1/artifacts').get_json()['artifacts'][0]['name'] == 'page_1.jpg'
+    response = client.get('/jobs/job-1/artifacts/page_1.jpg')
+    assert response.status_code == 200 and response.data == b'jpeg'
+    assert client.get('/jobs/job-1/artifacts/missing.jpg').status_code == 404
+
+
+def test_submit_rejects_invalid_job_id(client):
+    response = client.post('/submit', data={'message': 'Your name: Jane', 'job_id': '../../etc'})
+    assert response.status_code == 400
+
+
+
+class InlineThread:
+    def __init__(self, target, **kwargs):
+        self.target = target
+
+    def start(self):
+        self.target()
+
+
+def test_first_request_starts_warm_up_once(monkeypatch):
+    monkeypatch.setattr(config, 'WARMUP_ON_START', True)
+    monkeypatch.setitem(app_module.warmup_state, 'started', False)
+    monkeypatch.setattr(app_module.threading, 'Thread', InlineThread)
+    runs = []
+    monkeypatch.setattr(app_module, 'warm_up', lambda: runs.append(1))
+    client = app_module.app.test_client()
+    client.get('/healthz')
+    client.get('/healthz')
+    app_module.start_warm_up()
+    assert runs == [1]
+
+
+FULL_MESSAGE = ("Your name: Jane Doe\nYour email: jane@acme.com\nOrganization name: Acme\n"
+                "Organization sector: Academic\nHow many people need Premium access?: 1\n")
+
+
+class FakeResult:
+    success = True
+    status = "Form submitted"
+    confirmation = None
+    timings = {}
+    intercepted_request = None
+
+
+def test_reviewed_web_jobs_run_headless_and_lend_their_slot(client, monkeypatch):
+    built = []
+
+    class FakeBot:
+        def __init__(self, **kwargs):
+            built.append(kwargs)
+
+        async def run_automation(self, data, dry_run=False):
+            async with built[0]['while_paused']():
+                assert app_module.admissions[built[0]['form'].form_id].metrics()['paused'] == 1
+            return FakeResult()
+
+    monkeypatch.setattr(app_module, 'GoogleFormBot', FakeBot)
+    monkeypatch.setattr(config, 'REVIEW_HEADED', False)
+    response = client.post('/submit', data={'message': FULL_MESSAGE, 'page_by_page': '1'},
+                           headers={'Accept': 'application/json'})
+    assert response.get_json()['success'], response.get_json()
+    (kwargs,) = built
+    assert kwargs['headless'] is True
+    assert kwargs['page_by_page'] is True
+    assert kwargs['review_when_finished'] is False
+
+
+def test_ready_without_warm_up(client, monkeypatch):
+    monkeypatch.setattr(config, 'WARMUP_ON_START', False)
+    response = client.get('/readyz')
+    assert response.status_code == 200
+    assert response.get_json()['warmup']['enabled'] is False
+
+
+def test_not_ready_until_warm_up_finishes(client, monkeypatch):
+    monkeypatch.setattr(config, 'WARMUP_ON_START', True)
+    monkeypatch.setitem(app_module.warmup_state, 'started', True)
+    monkeypatch.setitem(app_module.warmup_state, 'finished', False)
+    assert client.get('/readyz').status_code == 503
+
+
+@pytest.mark.parametrize('path, kwargs', [
+    ('/parse', {'json': {'message': 'Your name: Jane', 'form_id': 'missing'}}),
+    ('/parse/eml?form_id=missing', {'data': b'Subject: hi\n\nYour name: Jane'}),
+    ('/validate', {'json': {'message': 'Your name: Jane', 'form_id': 'missing'}}),
+    ('/submit', {'data': {'message': 'Your name: Jane', 'form_id': 'missing'}}),
+])
+def test_unknown_form_is_not_found(client, path, kwargs):
+    response = client.post(path, **kwargs)
+    assert response.status_code == 404
+    assert response.get_json() == {'success': False, 'error': 'Unknown form: missing'}
+
+
+def test_admission_is_per_form(client, monkeypatch):
+    quote = app_module.form_registry.get()
+    renewal = FormDefinition('renewal', 'https://example.com/renewal/viewform', structure=quote.structure,
+                             max_in_flight=1, max_queued=0)
+    monkeypatch.setitem(app_module.form_registry.forms, 'renewal', renewal)
+    monkeypatch.setitem(app_module.admissions, 'renewal', AdmissionController(1, 0, default_retry_after=7))
+
+    class FakeBot:
+        def __init__(self, **kwargs):
+            pass
+
+        async def run_automation(self, data, dry_run=False):
+            return FakeResult()
+
+    monkeypatch.setattr(app_module, 'GoogleFormBot', FakeBot)
+    held = app_module.admissions['renewal'].try_admit()
+    try:
+        busy = client.post('/submit', data={'message': FULL_MESSAGE, 'form_id': 'renewal'})
+        assert busy.status_code == 429
+        assert busy.headers['Retry-After'] == '7'
+        assert client.post('/submit', data={'message': FULL_MESSAGE},
+                           headers={'Accept': 'application/json'}).get_json()['success']
+    finally:
+        app_module.admissions['renewal'].release(held)
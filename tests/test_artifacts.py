@@ -0,0 +1,76 @@
+import os
+import time
+
+import pytest
+
+from src.artifacts import ArtifactStore, valid_job_id
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(str(tmp_path / 'artifacts'), max_bytes=1024 * 1024, retention_seconds=3600)
+
+
+@pytest.mark.parametrize('job_id', ['abc123', 'job-1_a', 'a' * 64, '0b6e4c1e-3f0a-4d7e-9a43-2f1c5b8d9e10'])
+def test_valid_job_ids(job_id):
+    assert valid_job_id(job_id)
+
+
+@pytest.mark.parametrize('job_id', ['', '.', '..', '../etc', 'a/b', 'a' * 65, 'job id', '%2e%2e'])
+def test_invalid_job_ids(job_id):
+    assert not valid_job_id(job_id)
+
+
+def test_add_and_get_round_trip(store):
+    path = store.add('job-1', 'page_1.jpg', b'jpeg')
+    assert store.get('job-1', 'page_1.jpg') == path
+    assert [a['name'] for a in store.list('job-1')] == ['page_1.jpg']
+
+
+def test_traversal_job_id_is_rejected(store, tmp_path):
+    (tmp_path / 'secret.txt').write_text('secret')
+    assert store.get('..', 'secret.txt') is None
+    assert store.list('..') == []
+    with pytest.raises(ValueError):
+        store.path_for('..', 'trace.zip')
+    with pytest.raises(ValueError):
+        store.add('../outside', 'x', b'x')
+    assert not (tmp_path / 'outside').exists()
+
+
+@pytest.mark.parametrize('name', ['.', '..', '../secret.txt', '../../etc/passwd'])
+def test_traversal_names_stay_in_job_dir(store, tmp_path, name):
+    (tmp_path / 'secret.txt').write_text('secret')
+    store.add('job-1', 'page_1.jpg', b'jpeg')
+    path = store.get('job-1', name)
+    assert path is None or os.path.dirname(path) == os.path.join(store.root, 'job-1')
+
+
+def test_symlinked_job_dir_outside_root_is_refused(store, tmp_path):
+    outside = tmp_path / 'outside'
+    outside.mkdir()
+    (outside / 'trace.zip').write_bytes(b'zip')
+    os.makedirs(store.root)
+    os.symlink(outside, os.path.join(store.root, 'linked'))
+    assert store.get('linked', 'trace.zip') is None
+    assert store.list('linked') == []
+
+
+def test_size_cap_evicts_least_recently_used(tmp_path):
+    store = ArtifactStore(str(tmp_path), max_bytes=10, retention_seconds=3600)
+    store.add('job-1', 'old', b'123456')
+    past = time.time() - 60
+    os.utime(store.get('job-1', 'old'), (past, past))
+    store.add('job-2', 'new', b'123456')
+    assert store.get('job-1', 'old') is None
+    assert store.get('job-2', 'new') is not None
+    assert store.evicted == 1
+
+
+def test_expired_artifacts_are_removed(tmp_path):
+    store = ArtifactStore(str(tmp_path), max_bytes=1024, retention_seconds=30)
+    path = store.add('job-1', 'stale', b'x')
+    past = time.time() - 60
+    os.utime(path, (past, past))
+    store.enforce_limits()
+    assert store.list('job-1') == []
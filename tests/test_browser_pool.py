@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip('playwright')
+
+from src import browser_pool  # noqa: E402
+from src.browser_pool import BrowserPool  # noqa: E402
+from src.config import config  # noqa: E402
+
+
+class FakePage:
+    def is_closed(self):
+        return False
+
+
+class FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+
+    async def new_page(self):
+        return FakePage()
+
+    async def close(self):
+        self.browser.contexts.remove(self)
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.contexts = []
+        self.handlers = []
+
+    def on(self, event, handler):
+        self.handlers.append(handler)
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self, **kwargs):
+        context = FakeContext(self)
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        self.connected = False
+
+    def crash(self):
+        self.connected = False
+        for handler in self.handlers:
+            handler(self)
+
+
+class FakePlaywright:
+    async def stop(self):
+        pass
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    launched = []
+
+    async def launch(playwright, headless):
+        await asyncio.sleep(0)
+        launched.append(FakeBrowser())
+        return launched[-1]
+
+    class Starter:
+        async def start(self):
+            return FakePlaywright()
+
+    monkeypatch.setattr(browser_pool, 'launch_or_connect', launch)
+    monkeypatch.setattr(browser_pool, 'async_playwright', Starter)
+    monkeypatch.setattr(config, 'BROWSER_CDP_ENDPOINT', '')
+    monkeypatch.setattr(config, 'BROWSER_WS_ENDPOINT', '')
+    monkeypatch.setattr(config, 'BROWSER_MAX_AGE', 0)
+    monkeypatch.setattr(config, 'BROWSER_MAX_RSS_MB', 0)
+    pool = BrowserPool()
+    pool.launched = launched
+    return pool
+
+
+def test_concurrent_acquires_recycle_once(pool, monkeypatch):
+    monkeypatch.setattr(config, 'BROWSER_MAX_JOBS', 2)
+
+    async def scenario():
+        await pool.start()
+        pool.browser_jobs = 2
+        return await asyncio.gather(*(pool.acquire() for _ in range(4)))
+
+    asyncio.run(scenario())
+    assert len(pool.launched) == 2
+    assert pool.recycles['jobs'] == 1
+    assert pool.browser is pool.launched[1]
+    assert pool.browser_jobs == 4
+
+
+def test_crash_relaunches_the_browser(pool, monkeypatch):
+    monkeypatch.setattr(config, 'BROWSER_MAX_JOBS', 0)
+
+    async def scenario():
+        await pool.start()
+        pool.launched[0].crash()
+        assert not pool.ready
+        for _ in range(10):
+            await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    assert pool.started
+    assert pool.ready
+    assert pool.recycles['crash'] == 1
+    assert pool.browser is pool.launched[1]
@@ -0,0 +1,41 @@
+import asyncio
+import threading
+
+from src.checkpoints import ABORT, CONTINUE, CheckpointRegistry
+
+
+def test_resume_from_another_thread():
+    registry = CheckpointRegistry()
+
+    async def scenario():
+        task = asyncio.ensure_future(registry.pause('job-1', 'Review page 1'))
+        while registry.get('job-1') is None:
+            await asyncio.sleep(0)
+        threading.Thread(target=registry.resume, args=('job-1', ABORT)).start()
+        return await task
+
+    assert asyncio.run(scenario()) == ABORT
+    assert registry.get('job-1') is None
+
+
+def test_timeout_aborts():
+    registry = CheckpointRegistry()
+    assert asyncio.run(registry.pause('job-1', 'Review page 1', timeout=0.01)) == ABORT
+    assert registry.get('job-1') is None
+
+
+def test_first_action_wins():
+    registry = CheckpointRegistry()
+
+    async def scenario():
+        task = asyncio.ensure_future(registry.pause('job-1', 'Review'))
+        await asyncio.sleep(0)
+        registry.resume('job-1', CONTINUE)
+        registry.resume('job-1', ABORT)
+        return await task
+
+    assert asyncio.run(scenario()) == CONTINUE
+
+
+def test_resume_unknown_job():
+    assert CheckpointRegistry().resume('missing') is False
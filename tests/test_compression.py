@@ -0,0 +1,33 @@
+import gzip
+
+import pytest
+
+from src import compression
+from src.compression import PrecompressedBody, choose_encoding
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('gzip, deflate', 'gzip'),
+    ('gzip;q=0', None),
+    ('', None),
+    ('identity', None),
+    ('deflate, gzip;q=0.5', 'gzip'),
+])
+def test_choose_encoding(header, expected, monkeypatch):
+    monkeypatch.setattr(compression, 'brotli', None)
+    assert choose_encoding(header) == expected
+
+
+def test_brotli_preferred_when_available():
+    if compression.brotli is None:
+        pytest.skip('brotli not installed')
+    assert choose_encoding('gzip, br') == 'br'
+
+
+def test_precompressed_body_is_compressed_once():
+    body = PrecompressedBody(b'<html>' + b'x' * 2000 + b'</html>')
+    first, encoding = body.get('gzip')
+    assert encoding == 'gzip'
+    assert gzip.decompress(first) == body.body
+    assert body.get('gzip')[0] is first
+    assert body.get(None) == (body.body, None)
@@ -0,0 +1,103 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('playwright')
+
+from src.form_automation import GoogleFormBot, SubmissionConfirmation  # noqa: E402
+
+
+def observed(status=200, text=True, location=None, landed='https://docs.google.com/forms/d/e/x/formResponse',
+             errors=()):
+    confirmation = SubmissionConfirmation()
+    confirmation.clicked = True
+    confirmation.response_status = status
+    confirmation.redirect_location = location
+    confirmation.landed_url = landed
+    confirmation.confirmation_text = text
+    confirmation.errors = list(errors)
+    return confirmation
+
+
+def test_ok_response_with_confirmation_page_is_confirmed():
+    confirmation = observed()
+    assert confirmation.decide() is True
+    assert confirmation.errors == []
+
+
+def test_ok_response_without_confirmation_page_is_not_confirmed():
+    confirmation = observed(text=False)
+    assert confirmation.decide() is False
+    assert confirmation.errors == ["Confirmation page not seen"]
+
+
+def test_validation_alerts_block_confirmation():
+    confirmation = observed(text=False, errors=['This is a required question'])
+    assert confirmation.decide() is False
+    assert confirmation.errors == ['This is a required question']
+
+
+def test_http_error_is_not_confirmed():
+    confirmation = observed(status=500, text=False)
+    assert confirmation.decide() is False
+    assert confirmation.errors == ["Submission returned HTTP 500"]
+
+
+def test_sign_in_redirect_is_not_confirmed():
+    confirmation = observed(status=302, text=False, location='https://accounts.google.com/ServiceLogin')
+    assert confirmation.decide() is False
+    assert confirmation.errors == ["Submission redirected to Google sign-in"]
+
+
+def test_no_response_is_not_confirmed():
+    confirmation = observed(status=None, text=False, errors=['No submission response: timeout'])
+    assert confirmation.decide() is False
+
+
+class FakeRoute:
+    def __init__(self, method, url, post_data=None):
+        self.request = SimpleNamespace(method=method, url=url, post_data=post_data)
+        self.outcome = None
+
+    async def continue_(self):
+        self.outcome = ('continue',)
+
+    async def fulfill(self, **kwargs):
+        self.outcome = ('fulfill', kwargs['status'])
+
+    async def abort(self, error_code=None):
+        self.outcome = ('abort', error_code)
+
+
+FORM_RESPONSE_URL = 'https://docs.google.com/forms/d/e/x/formResponse'
+
+
+def intercept(route):
+    bot = GoogleFormBot()
+    asyncio.run(bot.intercept_submission(route))
+    return bot
+
+
+def test_dry_run_submission_is_fulfilled_and_recorded():
+    route = FakeRoute('POST', FORM_RESPONSE_URL,
+                      'entry.1=Jane+Doe&entry.2=a&entry.2=b&entry.3=&pageHistory=0,1')
+    bot = intercept(route)
+    assert route.outcome == ('fulfill', 200)
+    assert bot.intercepted_request['url'] == FORM_RESPONSE_URL
+    assert bot.intercepted_request['fields'] == {
+        'entry.1': 'Jane Doe', 'entry.2': ['a', 'b'], 'entry.3': '', 'pageHistory': '0,1'}
+
+
+def test_dry_run_lets_reads_through():
+    route = FakeRoute('GET', 'https://docs.google.com/forms/d/e/x/viewform')
+    bot = intercept(route)
+    assert route.outcome == ('continue',)
+    assert bot.intercepted_request is None
+
+
+def test_dry_run_blocks_other_posts():
+    route = FakeRoute('POST', 'https://docs.google.com/forms/d/e/x/submit?next=formResponse', 'entry.1=x')
+    bot = intercept(route)
+    assert route.outcome == ('abort', 'blockedbyclient')
+    assert bot.intercepted_request is None
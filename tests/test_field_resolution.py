@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip('playwright')
+
+from src import form_automation  # noqa: E402
+from src.form_automation import GoogleFormBot  # noqa: E402
+from src.selector_cache import SelectorCache  # noqa: E402
+
+
+class FakeLocator:
+    def __init__(self, page, selector):
+        self.page = page
+        self.selector = selector
+
+    @property
+    def first(self):
+        return self
+
+    async def fill(self, value, timeout=None):
+        if not any(self.selector.startswith(s) for s in self.page.matching):
+            raise form_automation.PlaywrightTimeoutError(f"no match for {self.selector}")
+        self.page.filled.append((self.selector, value))
+
+
+class FakePage:
+    def __init__(self, matching):
+        self.matching = matching
+        self.filled = []
+        self.evaluations = 0
+
+    def locator(self, selector):
+        return FakeLocator(self, selector)
+
+    async def evaluate(self, script, args):
+        self.evaluations += 1
+        selectors, token = args
+        for i, selector in enumerate(selectors):
+            if selector in self.matching:
+                self.matching.append(f'[data-formbot-field="{token}"]')
+                return i
+        return -1
+
+
+SELECTORS = ['input[aria-label*="billing name" i]', 'input[aria-label*="name" i]']
+
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path):
+    cache = SelectorCache(str(tmp_path / 'selectors.json'))
+    monkeypatch.setattr(form_automation, 'selector_cache', cache)
+    return cache
+
+
+def fill(page):
+    bot = GoogleFormBot()
+    bot.page = page
+    return asyncio.run(bot.fill_field_with_retry(SELECTORS, 'Jane Doe', 'Billing Name'))
+
+
+def test_lower_ranked_winner_is_learned_and_reused(cache):
+    first = FakePage([SELECTORS[1]])
+    assert fill(first)
+    assert first.evaluations == 1
+
+    second = FakePage([SELECTORS[1]])
+    assert fill(second)
+    assert second.evaluations == 0
+    assert second.filled == [(f'{SELECTORS[1]} >> visible=true', 'Jane Doe')]
+    assert cache.hits == 1
+
+
+def test_stale_learned_selector_is_relearned(cache):
+    assert fill(FakePage([SELECTORS[1]]))
+    page = FakePage([SELECTORS[0]])
+    assert fill(page)
+    assert page.evaluations == 1
+    form = GoogleFormBot().form
+    assert cache.get(SelectorCache.key(form.form_id, form.version, 'Billing Name')) == SELECTORS[0]
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from src.form_registry import FormDefinition, FormRegistry, UnknownFormError
+
+
+@pytest.fixture
+def registry():
+    registry = FormRegistry('quote')
+    registry.register(FormDefinition('quote', 'https://example.com/quote/viewform', version='3'))
+    return registry
+
+
+def write_forms(tmp_path, entries):
+    path = tmp_path / 'forms.json'
+    path.write_text(json.dumps(entries))
+    return str(path)
+
+
+def test_load_file_inherits_schema_and_reads_settings(registry, tmp_path):
+    quote = registry.get()
+    registry.load_file(write_forms(tmp_path, {
+        'renewal': {
+            'url': 'https://example.com/renewal/viewform',
+            'title': 'License renewal',
+            'version': 2,
+            'schema': 'quote',
+            'field_mappings': {'Renewal For': 'organization_name'},
+            'max_in_flight': 1,
+            'max_queued': 0,
+            'warm': False,
+        },
+    }))
+    renewal = registry.get('renewal')
+    assert renewal.structure is quote.structure
+    assert renewal.page_plan is quote.page_plan
+    assert renewal.version == '2'
+    assert (renewal.max_in_flight, renewal.max_queued, renewal.warm) == (1, 0, False)
+    assert registry.get().version == '3'
+
+
+def test_field_mappings_reach_the_parser(registry, tmp_path):
+    registry.load_file(write_forms(tmp_path, {
+        'renewal': {'url': 'https://example.com/renewal/viewform',
+                    'field_mappings': {'Renewal For': 'organization_name'}},
+    }))
+    message = 'Your name: Jane Doe\nRenewal for: Acme Labs'
+    assert registry.get('renewal').parser().extract_data(message).organization_name == 'Acme Labs'
+    assert registry.get('quote').parser().extract_data(message).organization_name == ''
+
+
+def test_unknown_base_schema_is_rejected(registry, tmp_path):
+    with pytest.raises(UnknownFormError):
+        registry.load_file(write_forms(tmp_path, {
+            'renewal': {'url': 'https://example.com/renewal/viewform', 'schema': 'missing'},
+        }))
+
+
+def test_unknown_form_id(registry):
+    with pytest.raises(UnknownFormError):
+        registry.get('missing')
+    assert registry.get('').form_id == 'quote'
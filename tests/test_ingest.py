@@ -0,0 +1,56 @@
+from email.message import EmailMessage
+
+from src.ingest import email_to_text, read_email
+
+
+def quote_email() -> EmailMessage:
+    message = EmailMessage()
+    message['From'] = 'Jane Doe <jane@acme.com>'
+    message['Subject'] = 'Quote request'
+    message.set_content('Your name: Jane Doe\nHow many people need Premium access?: 5\n')
+    message.add_alternative('<p>Your name: <b>Jane Doe</b></p>', subtype='html')
+    return message
+
+
+def test_plain_text_preferred_over_html():
+    content = read_email(quote_email().as_bytes())
+    assert content.content_type == 'text/plain'
+    assert 'Premium access?: 5' in content.text
+    assert content.subject == 'Quote request'
+
+
+def test_html_only_email_is_converted():
+    message = EmailMessage()
+    message.set_content('<p>Your name: Jane</p><script>x()</script>', subtype='html')
+    content = read_email(message.as_bytes())
+    assert 'Your name: Jane' in content.text and 'x()' not in content.text
+
+
+def test_attachments_are_skipped():
+    message = quote_email()
+    message.add_attachment(b'\x89PNG' * 1000, maintype='image', subtype='png', filename='logo.png')
+    content = read_email(message.as_bytes())
+    assert content.skipped_attachments
+    assert 'PNG' not in content.text
+
+
+def test_quoted_printable_and_charset_are_decoded():
+    message = EmailMessage()
+    message.set_content('Organization name: Universität Zürich ' + 'x' * 80, cte='quoted-printable')
+    assert 'Universität Zürich' in read_email(message.as_bytes()).text
+
+
+def test_forwarded_message_is_appended():
+    outer = EmailMessage()
+    outer.set_content('See the request below.')
+    outer.add_attachment(quote_email())
+    text = read_email(outer.as_bytes()).text
+    assert text.startswith('See the request below.')
+    assert '---------- Forwarded message ---------\nYour name: Jane Doe' in text
+
+
+def test_email_to_text_puts_headers_first(tmp_path):
+    path = tmp_path / 'quote.eml'
+    path.write_bytes(quote_email().as_bytes())
+    text = email_to_text(str(path))
+    assert text.startswith('From: Jane Doe <jane@acme.com>\nSubject: Quote request\n\nYour name: Jane Doe')
@@ -0,0 +1,123 @@
+import asyncio
+import imaplib
+
+import pytest
+
+pytest.importorskip('playwright')
+
+from src.config import config  # noqa: E402
+from src.mailbox_watcher import Checkpoint, ImapSource, MailboxPipeline, MaildirSource, NeedsReview  # noqa: E402
+
+
+@pytest.fixture
+def maildir(tmp_path):
+    source = MaildirSource(str(tmp_path / 'mail'))
+    source.maildir.add(b'From: jane@acme.com\nSubject: Quote\n\nYour name: Jane Doe\n')
+    return source
+
+
+def pipeline_for(source, checkpoint, submit):
+    pipeline = MailboxPipeline(source, checkpoint, poll_interval=0.01)
+
+    async def passthrough(job):
+        return None
+    pipeline.normalize = pipeline.parse = pipeline.validate = passthrough
+    pipeline.submit = submit
+    return pipeline
+
+
+def run_once(pipeline):
+    asyncio.run(pipeline.run(once=True))
+
+
+def test_transient_failures_are_retried_then_given_up(maildir, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'WATCHER_MAX_ATTEMPTS', 3)
+    checkpoint = Checkpoint(str(tmp_path / 'checkpoint.json'))
+    attempts = []
+
+    async def submit(job):
+        attempts.append(job.key)
+        raise RuntimeError('browser crashed')
+    pipeline = pipeline_for(maildir, checkpoint, submit)
+
+    for expected in ('retrying:submit', 'retrying:submit', 'failed:submit', 'failed:submit'):
+        run_once(pipeline)
+        (entry,) = Checkpoint(checkpoint.path).processed.values()
+        assert entry['status'] == expected
+    assert len(attempts) == 3
+    assert entry['attempts'] == 3
+
+
+def test_retry_succeeds_on_a_later_poll(maildir, tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / 'checkpoint.json'))
+    outcomes = [RuntimeError('timeout'), None]
+
+    async def submit(job):
+        outcome = outcomes.pop(0)
+        if outcome:
+            raise outcome
+    pipeline = pipeline_for(maildir, checkpoint, submit)
+    run_once(pipeline)
+    run_once(pipeline)
+    (entry,) = checkpoint.processed.values()
+    assert entry['status'] == 'submitted'
+
+
+def test_needs_review_is_final(maildir, tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / 'checkpoint.json'))
+    calls = []
+
+    async def submit(job):
+        calls.append(job.key)
+        raise NeedsReview('submission not confirmed')
+    pipeline = pipeline_for(maildir, checkpoint, submit)
+    run_once(pipeline)
+    run_once(pipeline)
+    assert len(calls) == 1
+    (key,) = checkpoint.processed
+    assert key in checkpoint
+
+
+class FakeImap:
+    def __init__(self, fail_fetch=False):
+        self.selects = 0
+        self.fail_fetch = fail_fetch
+
+    def select(self, folder, readonly=False):
+        self.selects += 1
+
+    def response(self, code):
+        return code, [b'42']
+
+    def uid(self, command, *args):
+        if command == 'search':
+            return 'OK', [b'1 2']
+        if self.fail_fetch:
+            raise imaplib.IMAP4.abort('connection reset')
+        return 'OK', [(b'1 (RFC822 {5}', b'hello'), b')']
+
+    def logout(self):
+        pass
+
+
+def test_imap_selects_once_and_resets_on_abort(monkeypatch):
+    connections = []
+
+    def connect(host, port):
+        connection = FakeImap(fail_fetch=not connections)
+        connection.login = lambda user, password: None
+        connections.append(connection)
+        return connection
+    monkeypatch.setattr(imaplib, 'IMAP4_SSL', connect)
+
+    source = ImapSource('imap.example.com', 'quotes', 'secret')
+    messages = source.poll()
+    assert [key for key, _ in messages] == ['42:1', '42:2']
+    with pytest.raises(imaplib.IMAP4.abort):
+        messages[0][1]()
+    assert source.connection is None
+
+    assert messages[0][1]().read() == b'hello'
+    assert messages[1][1]().read() == b'hello'
+    assert len(connections) == 2
+    assert connections[1].selects == 1
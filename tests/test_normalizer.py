@@ -0,0 +1,223 @@
+import asyncio
+import json
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src import batch, normalizer
+from src.config import config
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'NORMALIZER_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(config, 'NORMALIZER_CACHE_TTL', 3600)
+    monkeypatch.setattr(config, 'NORMALIZER_CACHE_MAX_ENTRIES', 3)
+    return tmp_path
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    calls = []
+    monkeypatch.setenv('OPENAI_API_KEY', 'sk-test')
+    monkeypatch.setattr(normalizer, '_get_client', lambda api_key, max_retries=2: object())
+
+    def request(client, cleaned):
+        calls.append(cleaned)
+        return 'Your name: Jane Doe'
+    monkeypatch.setattr(normalizer, 'request_normalized_text', request)
+    return calls
+
+
+def test_cache_round_trip(cache_dir):
+    normalizer.write_cached_normalization('email', 'Your name: Jane')
+    assert normalizer.read_cached_normalization('email') == 'Your name: Jane'
+
+
+def test_expired_entries_are_not_returned(cache_dir):
+    normalizer.write_cached_normalization('email', 'Your name: Jane')
+    path = normalizer._cache_path('email')
+    past = time.time() - 7200
+    os.utime(path, (past, past))
+    assert normalizer.read_cached_normalization('email') is None
+    assert not os.path.exists(path)
+
+
+def test_cache_is_capped_oldest_first(cache_dir):
+    for i in range(5):
+        normalizer.write_cached_normalization(f'email {i}', f'result {i}')
+        past = time.time() - 100 + i
+        os.utime(normalizer._cache_path(f'email {i}'), (past, past))
+    normalizer.write_cached_normalization('email 5', 'result 5')
+    assert len(os.listdir(cache_dir)) == 3
+    assert normalizer.read_cached_normalization('email 0') is None
+    assert normalizer.read_cached_normalization('email 5') == 'result 5'
+
+
+def test_interactive_normalization_does_not_cache_by_default(cache_dir, fake_openai, monkeypatch):
+    monkeypatch.setattr(config, 'NORMALIZER_CACHE_INTERACTIVE', False)
+    assert normalizer.normalize_email_text('name is Jane') == 'Your name: Jane Doe'
+    assert os.listdir(cache_dir) == []
+
+
+def test_interactive_cache_is_opt_in(cache_dir, fake_openai):
+    normalizer.normalize_email_text('name is Jane', use_cache=True)
+    normalizer.normalize_email_text('name is Jane', use_cache=True)
+    assert len(fake_openai) == 1
+
+
+def test_without_api_key_text_is_unchanged(monkeypatch):
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    assert normalizer.normalize_email_text('name is Jane') == 'name is Jane'
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+def test_batch_retries_429_itself_with_sdk_retries_off(cache_dir, monkeypatch):
+    monkeypatch.setenv('OPENAI_API_KEY', 'sk-test')
+    monkeypatch.setattr(batch, 'BASE_BACKOFF_SECONDS', 0.001)
+    clients = []
+    monkeypatch.setattr(batch, '_get_client', lambda api_key, max_retries=2: clients.append(max_retries))
+    outcomes = [RateLimited('slow down'), 'Your name: Jane Doe']
+
+    def request(client, cleaned):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    monkeypatch.setattr(batch, 'request_normalized_text', request)
+
+    assert asyncio.run(batch.normalize_batch(['name is Jane'])) == ['Your name: Jane Doe']
+    assert clients == [0]
+    assert outcomes == []
+
+
+class APIConnectionError(Exception):
+    pass
+
+
+class APITimeoutError(APIConnectionError):
+    pass
+
+
+class ServerError(Exception):
+    status_code = 503
+
+
+class BadRequest(Exception):
+    status_code = 400
+
+
+@pytest.mark.parametrize('error', [APIConnectionError('reset'), APITimeoutError('timeout'), ServerError('down')])
+def test_batch_retries_transient_errors(cache_dir, monkeypatch, error):
+    monkeypatch.setenv('OPENAI_API_KEY', 'sk-test')
+    monkeypatch.setattr(batch, 'BASE_BACKOFF_SECONDS', 0.001)
+    monkeypatch.setattr(batch, '_get_client', lambda api_key, max_retries=2: object())
+    outcomes = [error, 'Your name: Jane Doe']
+
+    def request(client, cleaned):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    monkeypatch.setattr(batch, 'request_normalized_text', request)
+
+    assert asyncio.run(batch.normalize_batch(['name is Jane'])) == ['Your name: Jane Doe']
+
+
+def test_batch_does_not_retry_client_errors(cache_dir, monkeypatch, caplog):
+    monkeypatch.setenv('OPENAI_API_KEY', 'sk-test')
+    monkeypatch.setattr(batch, '_get_client', lambda api_key, max_retries=2: object())
+    calls = []
+
+    def request(client, cleaned):
+        calls.append(cleaned)
+        raise BadRequest('bad request')
+    monkeypatch.setattr(batch, 'request_normalized_text', request)
+
+    assert asyncio.run(batch.normalize_batch(['name is Jane'])) == ['name is Jane']
+    assert len(calls) == 1
+    assert '1 of 1 messages were left unnormalized' in caplog.text
+
+
+# Structured mode
+
+def structured_payload(**overrides):
+    fields = {field: '' for field in normalizer.STRUCTURED_FIELDS}
+    fields.update(num_premium_users=None, license_length_years=None)
+    fields.update(overrides)
+    return fields
+
+
+def test_structured_payload_validates():
+    fields = structured_payload(name='Jane Doe', email='jane@uni.edu',
+                                organization_sector='Academic', num_premium_users=5)
+    assert normalizer.validate_structured_fields(fields) is fields
+
+
+@pytest.mark.parametrize('fields, message', [
+    ({k: v for k, v in structured_payload().items() if k != 'email'}, 'missing fields: email'),
+    (structured_payload(phone='555-0100'), 'unexpected fields: phone'),
+    (structured_payload(num_premium_users=True), 'num_premium_users must be a positive integer'),
+    (structured_payload(license_length_years=0), 'license_length_years must be a positive integer'),
+    (structured_payload(organization_sector='Government'), 'organization_sector must be one of'),
+    (structured_payload(billing_email='billing at uni.edu'), 'billing_email is not a valid email'),
+    (structured_payload(name=None), 'name must be a string'),
+    (['Jane Doe'], 'not a JSON object'),
+])
+def test_structured_payload_is_rejected(fields, message):
+    with pytest.raises(ValueError, match=message):
+        normalizer.validate_structured_fields(fields)
+
+
+def test_build_from_fields_matches_extract_data():
+    from src.parser_only import MessageParser
+    parser = MessageParser()
+    fields = structured_payload(
+        name='Jane Doe', email='jane@uni.edu', organization_name='Uni of Somewhere',
+        organization_sector='Academic', num_premium_users=5, license_length_years=2,
+        admin_email='it@uni.edu', billing_name='Accounts', billing_email='ap@uni.edu',
+        billing_address='1 College Rd', vat_tax_id='GB123')
+    text = '\n'.join([
+        'Your name: Jane Doe', 'Your email: jane@uni.edu', 'Organization name: Uni of Somewhere',
+        'Organization sector: Academic', 'How many people need premium access: 5',
+        'Length of license: 2', 'Admin email: it@uni.edu', 'Billing name: Accounts',
+        'Billing email: ap@uni.edu', 'Billing address: 1 College Rd', 'VAT or tax ID: GB123',
+    ])
+    assert vars(parser.build_from_fields(fields)) == vars(parser.extract_data(text))
+
+
+def test_structured_mode_falls_back_to_the_text_path(monkeypatch):
+    monkeypatch.setattr(config, 'NORMALIZER_MODE', 'structured')
+    monkeypatch.setattr(normalizer, 'normalize_to_form_data', lambda raw: None)
+    monkeypatch.setattr(normalizer, 'normalize_email_text', lambda raw: 'Your name: Jane Doe')
+    assert normalizer.extract_form_data('hi, Jane here').name == 'Jane Doe'
+
+
+def test_structured_mode_uses_validated_output(monkeypatch):
+    from src.parser_only import MessageParser
+    built = MessageParser().build_from_fields(structured_payload(name='Jane Doe'))
+    monkeypatch.setattr(config, 'NORMALIZER_MODE', 'structured')
+    monkeypatch.setattr(normalizer, 'normalize_to_form_data', lambda raw: built)
+    monkeypatch.setattr(normalizer, 'normalize_email_text',
+                        lambda raw: pytest.fail('text path should not run'))
+    assert normalizer.extract_form_data('hi, Jane here') is built
+
+
+@pytest.mark.parametrize('content, expected_name', [
+    (json.dumps(structured_payload(name='Jane Doe')), 'Jane Doe'),
+    (json.dumps(structured_payload(name='Jane Doe', organization_sector='Government')), None),
+    ('not json', None),
+])
+def test_normalize_to_form_data_validates_model_output(monkeypatch, content, expected_name):
+    message = SimpleNamespace(content=content)
+    create = lambda **kwargs: SimpleNamespace(choices=[SimpleNamespace(message=message)])
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setenv('OPENAI_API_KEY', 'sk-test')
+    monkeypatch.setattr(normalizer, '_get_client', lambda api_key, max_retries=2: client)
+    data = normalizer.normalize_to_form_data('hi, Jane here')
+    assert (data.name if data else None) == expected_name
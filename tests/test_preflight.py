@@ -0,0 +1,48 @@
+from src.form_registry import FormDefinition
+from src.parser_only import FormData
+from src.preflight import preflight_validate
+
+
+def form_data(users=1, **fields):
+    data = FormData()
+    data.name = 'Jane Doe'
+    data.email = 'jane@acme.com'
+    data.organization_name = 'Acme'
+    data.organization_sector = 'Academic'
+    data.num_premium_users = users
+    for name, value in fields.items():
+        setattr(data, name, value)
+    return data
+
+
+def test_complete_single_user_request_passes():
+    result = preflight_validate(form_data())
+    assert result.ok
+    assert result.page_sequence == ['page_1', 'page_2', 'page_3', 'page_5', 'page_7']
+    assert result.resolved['first_user_email'] == 'jane@acme.com'
+
+
+def test_missing_fields_are_reported_per_page():
+    result = preflight_validate(form_data(name='', organization_sector=''))
+    assert result.needs_review
+    assert result.missing == {'page_1': ['Your name'], 'page_2': ['Sector']}
+    assert 'Contact Information: Your name' in result.summary()
+
+
+def test_second_user_comes_from_the_user_list():
+    data = form_data(users=2, user_names_emails='Bob Smith (bob@acme.com)')
+    result = preflight_validate(data)
+    assert result.ok
+    assert result.resolved['second_user_email'] == 'bob@acme.com'
+
+
+def test_two_users_without_a_second_user_need_review():
+    result = preflight_validate(form_data(users=2))
+    assert result.missing == {'page_6': ['Second user name', 'Second user email']}
+
+
+def test_registered_form_uses_its_own_plan():
+    form = FormDefinition('short', 'https://example.com/form', page_plan=lambda data: ['page_1'])
+    result = preflight_validate(form_data(organization_name=''), form)
+    assert result.ok
+    assert result.to_dict()['form_id'] == 'short'
@@ -0,0 +1,73 @@
+from src.preprocess import (
+    collapse_whitespace,
+    enforce_token_budget,
+    html_to_text,
+    preprocess_email,
+    strip_quoted_history,
+    strip_signature,
+)
+
+
+def test_fields_after_a_sign_off_are_kept():
+    lines = ['Hi,', 'Please send a quote.', 'Thanks!', 'Name: Jane Doe',
+             'Institution: MIT', 'Seats: 5', 'Years: 2']
+    assert strip_signature(lines) == lines
+
+
+def test_field_bearing_signature_lines_are_kept():
+    lines = ['Hi,', 'Quote for 5 seats please.', 'Regards,', 'Jane Doe', 'Head of Lab',
+             'Acme Bio', '+1 555 0100', 'jane@acme.com', 'Billing address 12 Main St, Boston']
+    stripped = strip_signature(lines)
+    assert 'jane@acme.com' in stripped
+    assert 'Billing address 12 Main St, Boston' in stripped
+    assert '+1 555 0100' not in stripped
+
+
+def test_signature_is_trimmed_to_leading_lines():
+    lines = ['Quote please for jane@acme.com', '--', 'Jane Doe', 'CTO', 'Acme', 'Follow us', 'Our blog']
+    assert strip_signature(lines) == ['Quote please for jane@acme.com', 'Jane Doe', 'CTO', 'Acme']
+
+
+def test_opening_thanks_does_not_swallow_the_body():
+    lines = ['Thanks!'] + [f'line {i}' for i in range(15)]
+    assert strip_signature(lines) == lines
+
+
+def test_noise_lines_are_dropped():
+    assert strip_signature(['Quote please', 'Sent from my iPhone']) == ['Quote please']
+
+
+def test_quoted_history_is_dropped_when_the_reply_has_fields():
+    lines = ['Quote for jane@acme.com', 'On Mon, Jan 1, 2024 Bob wrote:', '> old text']
+    assert strip_quoted_history(lines) == ['Quote for jane@acme.com']
+
+
+def test_quoted_history_is_unwrapped_for_bare_replies():
+    lines = ['See below', 'On Mon, Jan 1, 2024 Bob wrote:', '> Name: Jane', '> jane@acme.com']
+    assert strip_quoted_history(lines)[-2:] == ['Name: Jane', 'jane@acme.com']
+
+
+def test_html_to_text_skips_scripts():
+    text = html_to_text('<html><script>x()</script><p>Name: Jane</p></html>')
+    assert 'Name: Jane' in text and 'x()' not in text
+
+
+def test_gmail_quote_ends_with_its_div():
+    text = html_to_text('<div>Name: Jane</div>'
+                        '<div class="gmail_quote"><div>On Mon, Bob wrote:</div>'
+                        '<blockquote>old</blockquote></div>'
+                        '<div>PS my email is me@x.com</div>')
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    assert lines == ['Name: Jane', '> On Mon, Bob wrote:', '> old', 'PS my email is me@x.com']
+
+
+def test_token_budget_keeps_field_lines():
+    lines = ['Name: Jane Doe'] + ['filler words here'] * 50
+    kept = enforce_token_budget(collapse_whitespace(lines), budget=20)
+    assert kept[0] == 'Name: Jane Doe'
+
+
+def test_preprocess_reports_savings():
+    result = preprocess_email('Name: Jane\njane@acme.com\n\n\nSent from my iPhone', token_budget=0)
+    assert result.text == 'Name: Jane\njane@acme.com'
+    assert result.tokens <= result.original_tokens
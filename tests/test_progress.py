@@ -0,0 +1,37 @@
+import threading
+
+from src.progress import JobChannel, ProgressHub
+
+
+def test_late_subscriber_sees_history():
+    channel = JobChannel('job-1')
+    channel.publish({'type': 'page', 'page': 1})
+    channel.publish({'type': 'done', 'success': True})
+    assert [e['type'] for e in channel.subscribe()] == ['page', 'done']
+
+
+def test_live_events_until_done():
+    channel = JobChannel('job-1')
+    stream = channel.subscribe(keepalive=5)
+    channel.publish({'type': 'page', 'page': 1})
+    assert next(stream)['page'] == 1
+
+    publisher = threading.Timer(0.01, channel.publish, args=({'type': 'done'},))
+    publisher.start()
+    assert [e['type'] for e in stream] == ['done']
+    assert channel.subscribers == []
+
+
+def test_keepalive_ticks_yield_none():
+    channel = JobChannel('job-1')
+    stream = channel.subscribe(keepalive=0.01)
+    assert next(stream) is None
+    stream.close()
+    assert channel.subscribers == []
+
+
+def test_hub_stamps_events():
+    hub = ProgressHub()
+    hub.publish('job-1', {'type': 'started'})
+    event = hub.channel('job-1').history[0]
+    assert event['job_id'] == 'job-1' and 'ts' in event
@@ -0,0 +1,38 @@
+import json
+
+from src.selector_cache import SelectorCache
+
+
+def test_key_includes_form_version():
+    assert SelectorCache.key('quote', '1', 'Email') != SelectorCache.key('quote', '2', 'Email')
+
+
+def test_record_persists_atomically(tmp_path):
+    path = tmp_path / 'cache' / 'selectors.json'
+    cache = SelectorCache(str(path))
+    key = SelectorCache.key('quote', '1', 'Email')
+    cache.record(key, 'input[type="email"]')
+    assert json.loads(path.read_text()) == {key: 'input[type="email"]'}
+    assert not (tmp_path / 'cache' / 'selectors.json.tmp').exists()
+    assert SelectorCache(str(path)).get(key) == 'input[type="email"]'
+
+
+def test_forget_removes_the_selector(tmp_path):
+    path = tmp_path / 'selectors.json'
+    cache = SelectorCache(str(path))
+    cache.record('k', 'input')
+    cache.forget('k')
+    assert cache.get('k') is None
+    assert json.loads(path.read_text()) == {}
+
+
+def test_corrupt_file_starts_empty(tmp_path):
+    path = tmp_path / 'selectors.json'
+    path.write_text('{not json')
+    assert SelectorCache(str(path)).selectors == {}
+
+
+def test_empty_path_keeps_selectors_in_memory(tmp_path):
+    cache = SelectorCache('')
+    cache.record('k', 'input')
+    assert cache.get('k') == 'input'
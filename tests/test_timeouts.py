@@ -0,0 +1,121 @@
+import time
+
+import pytest
+
+from src.timeouts import DeadlineExceeded, JobDeadline, TimeoutManager, percentile
+
+
+def manager(**overrides):
+    settings = dict(defaults={'field': 5000}, multiplier=3.0, floor_ms=500, min_samples=5, window=100)
+    settings.update(overrides)
+    return TimeoutManager(**settings)
+
+
+def test_percentile_is_nearest_rank():
+    samples = list(range(1, 101))
+    assert percentile(samples, 50) == 50
+    assert percentile(samples, 99) == 99
+    assert percentile([7], 99) == 7
+
+
+def test_static_default_until_enough_samples():
+    timeouts = manager()
+    for _ in range(4):
+        timeouts.record('field', 100)
+    assert timeouts.timeout('field') == 5000
+
+
+def test_adaptive_timeout_is_multiple_of_p99():
+    timeouts = manager()
+    for _ in range(10):
+        timeouts.record('field', 1000)
+    assert timeouts.timeout('field') == 3000
+
+
+def test_adaptive_timeout_is_clamped():
+    timeouts = manager()
+    for _ in range(10):
+        timeouts.record('field', 10)
+    assert timeouts.timeout('field') == 500
+    for _ in range(100):
+        timeouts.record('field', 4000)
+    assert timeouts.timeout('field') == 5000
+
+
+def test_window_forgets_old_samples():
+    timeouts = manager(window=5)
+    for _ in range(5):
+        timeouts.record('field', 4000)
+    for _ in range(5):
+        timeouts.record('field', 200)
+    assert timeouts.timeout('field') == 600
+
+
+def test_stats_report_percentiles():
+    timeouts = manager()
+    for ms in (100, 200, 300, 400, 500):
+        timeouts.record('field', ms)
+    stats = timeouts.stats()['field']
+    assert stats['samples'] == 5
+    assert stats['p99_ms'] == 500
+    assert stats['timeout_ms'] == 1500
+
+
+def test_deadline_caps_timeouts():
+    deadline = JobDeadline(2)
+    assert 1000 < deadline.cap(60000) <= 2000
+    assert deadline.cap(100) == 100
+
+
+def test_expired_deadline_raises():
+    deadline = JobDeadline(0.01)
+    time.sleep(0.02)
+    with pytest.raises(DeadlineExceeded, match='at page 2'):
+        deadline.check('page 2')
+
+
+def test_extend_gives_time_back():
+    deadline = JobDeadline(0.01)
+    time.sleep(0.02)
+    deadline.extend(5)
+    deadline.check()
+    assert deadline.remaining_ms() > 4000
+
+
+def test_timeouts_push_a_stuck_floor_back_up():
+    timeouts = manager(defaults={'heading': 20000}, floor_ms=1000)
+    for _ in range(100):
+        timeouts.record('heading', 50)
+    assert timeouts.timeout('heading') == 1000
+
+    # The form slows down: every wait now takes 1.2 s
+    failures = 0
+    for _ in range(5):
+        timeout = timeouts.timeout('heading')
+        if timeout < 1200:
+            timeouts.record_timeout('heading', timeout)
+            failures += 1
+        else:
+            timeouts.record('heading', 1200)
+    assert failures == 1
+    assert timeouts.timeout('heading') >= 1200
+    assert timeouts.stats()['heading']['timeouts'] == 1
+
+
+def test_timeout_backoff_is_capped_by_the_default():
+    timeouts = manager()
+    for _ in range(10):
+        timeouts.record('field', 100)
+    for _ in range(5):
+        timeouts.record_timeout('field', timeouts.timeout('field'))
+    assert timeouts.timeout('field') == 5000
+
+
+def test_success_clears_the_backoff():
+    timeouts = manager(window=1000)
+    for _ in range(200):
+        timeouts.record('field', 100)
+    timeouts.record_timeout('field', 500)
+    assert timeouts.timeout('field') == 1000
+    timeouts.record('field', 100)
+    assert timeouts.timeout('field') == 500